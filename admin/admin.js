@@ -431,6 +431,10 @@ function addQuestionBlock(question = {}) {
     <label>Explanation (optional)
       <textarea class="question-explanation">${question.explanation ? escapeHtml(question.explanation) : ""}</textarea>
     </label>
+    <label class="question-vocabulary-label">
+      <input type="checkbox" class="question-vocabulary" ${question.vocabulary ? "checked" : ""}>
+      Vocabulary item (the correct answer is a direct translation of the prompt)
+    </label>
     <div class="question-options"></div>
     <button type="button" class="question-add-option">Add Option</button>
   `;
@@ -543,6 +547,7 @@ function collectQuestionPayload() {
   blocks.forEach(block => {
     const promptInput = block.querySelector(".question-prompt");
     const explanationInput = block.querySelector(".question-explanation");
+    const vocabularyInput = block.querySelector(".question-vocabulary");
     const optionRows = [...block.querySelectorAll(".option-row")];
 
     const prompt = promptInput?.value.trim();
@@ -564,6 +569,7 @@ function collectQuestionPayload() {
     questions.push({
       prompt,
       explanation: explanationInput?.value.trim() || null,
+      vocabulary: Boolean(vocabularyInput?.checked),
       options,
     });
   });
@@ -863,9 +869,14 @@ async function buildQuizPayload(existing) {
     if (correctPrompt === null) return null;
     const correctIndex = clamp(parseInt(correctPrompt, 10) || defaultCorrect, 1, options.length);
 
+    const vocabulary = confirm(
+      `Is question ${i + 1} a vocabulary item (the correct answer is a direct translation of the prompt)?`,
+    );
+
     questions.push({
       prompt: promptText.trim(),
       explanation: explanation.trim(),
+      vocabulary,
       options: options.map((optText, idx) => ({
         text: optText,
         is_correct: idx + 1 === correctIndex,
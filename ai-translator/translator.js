@@ -30,6 +30,7 @@ const DEFAULT_AVATAR = "../assets/avatar.png";
 const API_BASE = "http://127.0.0.1:5000";
 
 let recorderState = null;
+const LIVE_CHUNK_MS = 1000;
 
 updateWelcomeText();
 
@@ -67,35 +68,67 @@ chatBtn.addEventListener("click", async () => {
   const languages = getSelectedLanguages();
   result.innerText = "⏳ Translating...";
   try {
-    const res = await fetch(`${API_BASE}/translate_explain`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ text, ...languages })
+    let partial = "";
+    const data = await streamExplainTranslation(text, languages, (delta) => {
+      partial += delta;
+      result.innerText = formatExplainOutput(languages, partial, "");
     });
-    const data = await res.json();
-    if (!res.ok) {
-      throw new Error(data.error || `Request failed (${res.status})`);
-    }
     result.innerText = formatExplainOutput(languages, data.translation, data.explanation);
   } catch (err) {
     result.innerText = "❌ Server error: " + err.message;
   }
 });
 
+async function streamExplainTranslation(text, languages, onDelta) {
+  const res = await fetch(`${API_BASE}/translate_explain_stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ text, ...languages })
+  });
+  if (!res.ok || !res.body) {
+    const data = await res.json().catch(() => ({}));
+    throw new Error(data.error || `Request failed (${res.status})`);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let final = { translation: "", explanation: "" };
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      const event = (block.match(/^event: (.*)$/m) || [])[1];
+      const payload = JSON.parse((block.match(/^data: (.*)$/m) || [])[1] || "{}");
+      if (event === "translation") {
+        onDelta(payload.delta || "");
+      } else if (event === "explanation") {
+        final.explanation = payload.explanation || "";
+      } else if (event === "done") {
+        final = payload;
+      } else if (event === "error") {
+        throw new Error(payload.error || "Translation failed");
+      }
+    }
+  }
+  return final;
+}
+
 // -------------------- 2) Translate + Speak --------------------
 voiceBtn.addEventListener("click", () => {
   const languages = getSelectedLanguages();
   handleRecordingFlow(voiceBtn, {
     activeLabel: "⏹ Stop",
     introMessage: "🎙 Speak now to translate.",
-    onComplete: async (audioBlob) => {
+    onComplete: async (audioBlob, streamSession) => {
       hideAudioPlayer();
       result.innerText = "⏳ Recognizing speech...";
       try {
-        const translation = await transcribeAndTranslate(audioBlob, languages);
-        const { original, translatedText, explanation } = translation;
-        result.innerText = formatVoiceResult(original, languages, translatedText, explanation);
-        await maybePlayTts(translatedText);
+        await speakAndTranslate(audioBlob, languages, streamSession);
       } catch (err) {
         console.error("❌ Voice translate failed:", err);
         result.innerText = `❌ Error: ${err.message}`;
@@ -110,14 +143,11 @@ micBtn.addEventListener("click", () => {
   handleRecordingFlow(micBtn, {
     activeLabel: "⏹ Stop",
     introMessage: "🎙 Speak now... tap stop when finished.",
-    onComplete: async (audioBlob) => {
+    onComplete: async (audioBlob, streamSession) => {
       hideAudioPlayer();
       result.innerText = "⏳ Recognizing speech...";
       try {
-        const translation = await transcribeAndTranslate(audioBlob, languages);
-        const { original, translatedText, explanation } = translation;
-        result.innerText = formatVoiceResult(original, languages, translatedText, explanation);
-        await maybePlayTts(translatedText);
+        await speakAndTranslate(audioBlob, languages, streamSession);
       } catch (err) {
         console.error("❌ Speak+Translate failed:", err);
         result.innerText = `❌ Error: ${err.message}`;
@@ -132,50 +162,99 @@ function formatVoiceResult(original, languages, translationText, explanationText
   return recognized + formatExplainOutput(languages, translationText, explanationText);
 }
 
-async function transcribeAndTranslate(audioBlob, languages) {
+// One streamed request: transcript, translation deltas, explanation, then audio clips as they render.
+// A finished live transcript session stands in for the recording, so it is not transcribed twice.
+async function speakAndTranslate(audioBlob, languages, streamSession) {
   const formData = new FormData();
-  formData.append("file", audioBlob, "speech.webm");
+  if (streamSession) {
+    formData.append("stream_session", streamSession);
+  } else {
+    formData.append("file", audioBlob, "speech.webm");
+  }
   formData.append("source_language", languages.source_language);
   formData.append("target_language", languages.target_language);
-  const response = await fetch(`${API_BASE}/stt_explain`, { method: "POST", body: formData });
-  let payload = {};
-  try {
-    payload = await response.json();
-  } catch {
-    throw new Error(`Unexpected server response (${response.status})`);
-  }
-  if (!response.ok) {
+  formData.append("mode", "explain");
+  const response = await fetch(`${API_BASE}/stt_speak`, { method: "POST", body: formData });
+  if (!response.ok || !response.body) {
+    const payload = await response.json().catch(() => ({}));
     throw new Error(payload.error || `Request failed (${response.status})`);
   }
-  return {
-    original: payload.original || "",
-    translatedText: payload.translation || "",
-    explanation: payload.explanation || "",
+
+  let original = "";
+  let translation = "";
+  let explanation = "";
+  let audioError = "";
+  const clips = createClipQueue();
+  const render = () => {
+    result.innerText = formatVoiceResult(original, languages, translation, explanation);
+    if (audioError) {
+      result.innerText += `\n\n⚠ TTS unavailable: ${audioError}`;
+    }
   };
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      const event = (block.match(/^event: (.*)$/m) || [])[1];
+      const payload = JSON.parse((block.match(/^data: (.*)$/m) || [])[1] || "{}");
+      if (event === "transcript") {
+        original = payload.text || "";
+        result.innerText = (original ? `Recognized: ${original}\n\n` : "") + "⏳ Translating...";
+        continue;
+      } else if (event === "translation") {
+        translation += payload.delta || "";
+      } else if (event === "explanation") {
+        explanation = payload.explanation || "";
+      } else if (event === "audio") {
+        clips.push(payload);
+        continue;
+      } else if (event === "audio_error") {
+        audioError = payload.audio_error || "Speech synthesis failed";
+      } else if (event === "done") {
+        translation = payload.translation || translation;
+      } else if (event === "error") {
+        throw new Error(payload.error || "Speech translation failed");
+      }
+      render();
+    }
+  }
 }
 
-async function maybePlayTts(text) {
-  if (!text) return;
-  try {
-    const res = await fetch(`${API_BASE}/tts`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ text }),
-    });
-    if (!res.ok) {
-      const errText = await res.text();
-      throw new Error(errText || `TTS failed (${res.status})`);
+// Plays streamed clips back to back as they arrive.
+function createClipQueue() {
+  const clips = [];
+  let playing = false;
+
+  const playNext = () => {
+    const clip = clips.shift();
+    if (!clip) {
+      playing = false;
+      return;
     }
-    const blob = await res.blob();
-    audioPlayer.src = URL.createObjectURL(blob);
+    playing = true;
+    audioPlayer.src = URL.createObjectURL(clip);
     audioPlayer.style.display = "block";
-    await audioPlayer.play().catch(() => {
-      /* Autoplay might be blocked; user can play manually. */
+    audioPlayer.onended = playNext;
+    audioPlayer.play().catch(() => {
+      /* Autoplay might be blocked; pressing play continues the queue. */
     });
-  } catch (err) {
-    console.error("❌ TTS error:", err);
-    result.innerText += `\n\n⚠ TTS unavailable: ${err.message}`;
-  }
+  };
+
+  return {
+    push(payload) {
+      const bytes = Uint8Array.from(atob(payload.audio), (c) => c.charCodeAt(0));
+      clips.push(new Blob([bytes], { type: payload.audio_mime_type || "audio/mpeg" }));
+      if (!playing) playNext();
+    },
+  };
 }
 
 function hideAudioPlayer() {
@@ -184,6 +263,7 @@ function hideAudioPlayer() {
   } catch {
     /* ignore */
   }
+  audioPlayer.onended = null;
   audioPlayer.removeAttribute("src");
   audioPlayer.style.display = "none";
   audioPlayer.load();
@@ -211,6 +291,12 @@ async function startRecording(button, options) {
     const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
     const mediaRecorder = new MediaRecorder(stream);
     const audioChunks = [];
+    const live = await startLiveTranscript(stream, getSelectedLanguages(), (text) => {
+      result.innerText = `🎙 ${text}`;
+    }).catch((err) => {
+      console.warn("⚠ Live transcript unavailable:", err);
+      return null;
+    });
 
     state = { mediaRecorder, stream, button, idleLabel, options, audioChunks };
     recorderState = state;
@@ -229,8 +315,9 @@ async function startRecording(button, options) {
     mediaRecorder.onstop = async () => {
       const blob = new Blob(state.audioChunks, { type: "audio/webm" });
       cleanupRecorder(state);
+      const streamSession = live ? await live.stop() : null;
       try {
-        await options.onComplete(blob);
+        await options.onComplete(blob, streamSession);
       } catch (err) {
         console.error("❌ Voice handling failed:", err);
         result.innerText = `❌ Error: ${err.message}`;
@@ -248,6 +335,80 @@ async function startRecording(button, options) {
   }
 }
 
+// Live transcript while recording: 16 kHz PCM captured by an AudioWorklet goes to /stt_stream once a
+// second, which the server transcribes in windows as it arrives. stop() resolves to the finished
+// session id, which /stt_speak accepts instead of the recording, or null so the caller uploads it.
+const PCM_CAPTURE_WORKLET = `
+class PcmCapture extends AudioWorkletProcessor {
+  process(inputs) {
+    const channel = inputs[0][0];
+    if (channel) this.port.postMessage(channel.slice(0));
+    return true;
+  }
+}
+registerProcessor("pcm-capture", PcmCapture);
+`;
+
+async function startLiveTranscript(stream, languages, onText) {
+  if (typeof AudioWorkletNode === "undefined") return null;
+  const context = new AudioContext({ sampleRate: 16000 });
+  const moduleUrl = URL.createObjectURL(new Blob([PCM_CAPTURE_WORKLET], { type: "application/javascript" }));
+  try {
+    await context.audioWorklet.addModule(moduleUrl);
+  } finally {
+    URL.revokeObjectURL(moduleUrl);
+  }
+  const source = context.createMediaStreamSource(stream);
+  const capture = new AudioWorkletNode(context, "pcm-capture");
+  let blocks = [];
+  capture.port.onmessage = (event) => blocks.push(event.data);
+  source.connect(capture);
+
+  let session = fetch(`${API_BASE}/stt_stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      source_language: languages.source_language,
+      format: "pcm16",
+      sample_rate: context.sampleRate,
+    }),
+  }).then((res) => (res.ok ? res.json() : Promise.reject(new Error(`Request failed (${res.status})`))));
+
+  const send = (final) => {
+    const length = blocks.reduce((total, block) => total + block.length, 0);
+    const pcm = new Int16Array(length);
+    let offset = 0;
+    for (const block of blocks) {
+      for (const sample of block) pcm[offset++] = Math.max(-1, Math.min(1, sample)) * 0x7fff;
+    }
+    blocks = [];
+    session = session.then(async (data) => {
+      const res = await fetch(`${API_BASE}${data.chunk_url}${final ? "?final=1" : ""}`, { method: "POST", body: pcm });
+      const payload = await res.json().catch(() => ({}));
+      if (!res.ok) throw new Error(payload.error || `Request failed (${res.status})`);
+      if (payload.text) onText(payload.text);
+      return data;
+    });
+    return session;
+  };
+  const timer = setInterval(() => send(false).catch(() => {}), LIVE_CHUNK_MS);
+
+  return {
+    stop: async () => {
+      clearInterval(timer);
+      source.disconnect();
+      capture.disconnect();
+      context.close();
+      try {
+        return (await send(true)).session_id;
+      } catch (err) {
+        console.warn("⚠ Live transcript unavailable:", err);
+        return null;
+      }
+    },
+  };
+}
+
 function stopCurrentRecording() {
   if (recorderState && recorderState.mediaRecorder.state !== "inactive") {
     recorderState.mediaRecorder.stop();
@@ -1,17 +1,52 @@
+import atexit
+import base64
+import hashlib
+import io
+import json
+import math
 import os
 import random
 import re
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import unicodedata
 import uuid
+import wave
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timedelta
+from difflib import SequenceMatcher
 from urllib.parse import unquote
 
 import mysql.connector
 from dotenv import load_dotenv
-from flask import Flask, jsonify, redirect, request, send_from_directory, session, url_for
+from flask import (
+    Flask,
+    Request,
+    Response,
+    jsonify,
+    redirect,
+    request,
+    send_file,
+    send_from_directory,
+    has_request_context,
+    session,
+    stream_with_context,
+    url_for,
+)
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
 from flask_mail import Mail, Message
-from openai import OpenAI
+from openai import APIConnectionError, APIStatusError, APITimeoutError, AsyncOpenAI, OpenAI
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 load_dotenv()
 
@@ -28,9 +63,814 @@ app.config["MAIL_USERNAME"] = os.getenv("MAIL_USERNAME")
 app.config["MAIL_PASSWORD"] = os.getenv("MAIL_PASSWORD")
 default_sender = os.getenv("MAIL_DEFAULT_SENDER") or app.config["MAIL_USERNAME"] or "no-reply@example.com"
 app.config["MAIL_DEFAULT_SENDER"] = default_sender
+# Default body limit; upload routes get their own in UPLOAD_ROUTE_LIMITS.
+app.config["MAX_CONTENT_LENGTH"] = int(os.getenv("MAX_CONTENT_LENGTH", 16 * 1024 * 1024))
 mail = Mail(app)
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+AI_BACKEND = os.getenv("AI_BACKEND", "openai").strip().lower()
+AI_FAKE_SERVER_URL = os.getenv("AI_FAKE_SERVER_URL", "http://127.0.0.1:8089/v1")
+AI_CHAT_MODEL = os.getenv("AI_CHAT_MODEL", "gpt-4o-mini")
+AI_TTS_MODEL = os.getenv("AI_TTS_MODEL", "gpt-4o-mini-tts")
+AI_TTS_VOICE = os.getenv("AI_TTS_VOICE", "alloy")
+AI_TRANSCRIBE_MODEL = os.getenv("AI_TRANSCRIBE_MODEL", "gpt-4o-mini-transcribe")
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", 16))
+AI_MAX_QUEUE = int(os.getenv("AI_MAX_QUEUE", 32))
+AI_QUEUE_TIMEOUT_SECONDS = float(os.getenv("AI_QUEUE_TIMEOUT_SECONDS", 2.0))
+AI_RETRY_AFTER_SECONDS = int(os.getenv("AI_RETRY_AFTER_SECONDS", 2))
+AI_DEADLINE_SECONDS = float(os.getenv("AI_DEADLINE_SECONDS", 30))
+AI_ROUTE_DEADLINES = os.getenv(
+    "AI_ROUTE_DEADLINES",
+    "translate_simple=15,translate_explain=20,translate_explain_stream=20,translate_batch=45,"
+    "tts=20,stt_simple=45,stt_explain=60,stt_speak=60",
+)
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", 2))
+AI_RETRY_BASE_SECONDS = float(os.getenv("AI_RETRY_BASE_SECONDS", 0.25))
+AI_RETRY_MAX_SECONDS = float(os.getenv("AI_RETRY_MAX_SECONDS", 4.0))
+AI_HEDGE_ROUTES = os.getenv("AI_HEDGE_ROUTES", "")
+AI_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("AI_HEDGE_MIN_DELAY_SECONDS", 0.5))
+AI_HEDGE_MIN_SAMPLES = int(os.getenv("AI_HEDGE_MIN_SAMPLES", 20))
+AI_HEDGE_MAX_FRACTION = float(os.getenv("AI_HEDGE_MAX_FRACTION", 0.05))
+USAGE_LOG_ENABLED = os.getenv("USAGE_LOG_ENABLED", "true").lower() == "true"
+USAGE_FLUSH_SECONDS = float(os.getenv("USAGE_FLUSH_SECONDS", 5))
+USAGE_FLUSH_BATCH = int(os.getenv("USAGE_FLUSH_BATCH", 500))
+USAGE_BUFFER_MAX = int(os.getenv("USAGE_BUFFER_MAX", 20000))
+USAGE_EVENT_RETENTION_DAYS = int(os.getenv("USAGE_EVENT_RETENTION_DAYS", 30))
+AI_QUOTA_ENABLED = os.getenv("AI_QUOTA_ENABLED", "true").lower() == "true"
+AI_QUOTA_STORE = os.getenv("AI_QUOTA_STORE", "mysql").strip().lower()
+AI_QUOTA_USER_CAPACITY = float(os.getenv("AI_QUOTA_USER_CAPACITY", 60))
+AI_QUOTA_USER_REFILL_PER_MINUTE = float(os.getenv("AI_QUOTA_USER_REFILL_PER_MINUTE", 20))
+AI_QUOTA_IP_CAPACITY = float(os.getenv("AI_QUOTA_IP_CAPACITY", 240))
+AI_QUOTA_IP_REFILL_PER_MINUTE = float(os.getenv("AI_QUOTA_IP_REFILL_PER_MINUTE", 80))
+AI_QUOTA_CHARS_PER_UNIT = float(os.getenv("AI_QUOTA_CHARS_PER_UNIT", 200))
+AI_QUOTA_AUDIO_SECONDS_PER_UNIT = float(os.getenv("AI_QUOTA_AUDIO_SECONDS_PER_UNIT", 5))
+AI_QUOTA_AUDIO_BYTES_PER_SECOND = float(os.getenv("AI_QUOTA_AUDIO_BYTES_PER_SECOND", 4000))
+PROXY_FIX_HOPS = int(os.getenv("PROXY_FIX_HOPS", 0))
+
+
+class OpenAIBackend:
+    """Chat, speech and transcription calls against an OpenAI-compatible API."""
+
+    name = "openai"
+
+    def __init__(self, api_key=None, base_url=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        # Retries and timeouts are handled by ResilientBackend so they respect the route deadline.
+        self.client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        self.chat_model = AI_CHAT_MODEL
+        self.tts_model = AI_TTS_MODEL
+        self.tts_voice = AI_TTS_VOICE
+        self.transcribe_model = AI_TRANSCRIBE_MODEL
+
+    def chat(self, messages, **options):
+        return self.client.chat.completions.create(model=self.chat_model, messages=messages, **options)
+
+    def speech(self, text, voice=None, stream=False, **options):
+        """Full MP3 response, or with ``stream=True`` an iterator of MP3 chunks as the upstream sends them."""
+        if stream:
+            return self._speech_stream(text, voice, options)
+        return self.client.audio.speech.create(
+            model=self.tts_model, voice=voice or self.tts_voice, input=text, **options
+        )
+
+    def _speech_stream(self, text, voice, options):
+        # Send the request now so connection and status errors surface here, where they can be retried.
+        manager = self.client.audio.speech.with_streaming_response.create(
+            model=self.tts_model, voice=voice or self.tts_voice, input=text, **options
+        )
+        response = manager.__enter__()
+
+        def chunks():
+            try:
+                yield from response.iter_bytes(TTS_STREAM_CHUNK_BYTES)
+            finally:
+                manager.__exit__(None, None, None)
+
+        return chunks()
+
+    def transcribe(self, file, **options):
+        return self.client.audio.transcriptions.create(model=self.transcribe_model, file=file, **options)
+
+    def async_client(self):
+        """AsyncOpenAI client for the same endpoint, used by the ASGI serving path (asgi.py)."""
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+
+
+class FakeServerBackend(OpenAIBackend):
+    """OpenAI backend pointed at scripts/fake_openai_server.py for offline load tests."""
+
+    name = "fake"
+
+    def __init__(self):
+        super().__init__(api_key="fake-key", base_url=AI_FAKE_SERVER_URL)
+
+
+AI_BACKENDS = {
+    OpenAIBackend.name: lambda: OpenAIBackend(api_key=os.getenv("OPENAI_API_KEY"), base_url=os.getenv("OPENAI_BASE_URL")),
+    FakeServerBackend.name: FakeServerBackend,
+}
+
+
+def create_ai_backend(name=AI_BACKEND):
+    factory = AI_BACKENDS.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown AI_BACKEND '{name}'. Expected one of: {', '.join(sorted(AI_BACKENDS))}")
+    return factory()
+
+
+class UpstreamBusyError(Exception):
+    def __init__(self, retry_after):
+        super().__init__("The AI service is busy right now. Please try again shortly.")
+        self.retry_after = retry_after
+
+
+class UpstreamTimeoutError(Exception):
+    def __init__(self, deadline):
+        super().__init__("The AI service took too long to respond. Please try again.")
+        self.deadline = deadline
+
+
+def parse_route_settings(raw, cast=float):
+    settings = {}
+    for item in (raw or "").split(","):
+        route, _, value = item.partition("=")
+        if route.strip() and value.strip():
+            settings[route.strip()] = cast(value)
+    return settings
+
+
+AI_ROUTE_LABEL = threading.local()
+
+
+@contextmanager
+def labelled_ai_route(route, usage=None):
+    """Label backend calls in this thread with ``route``; pool threads also pass on the request's usage record."""
+    previous = getattr(AI_ROUTE_LABEL, "route", None)
+    AI_ROUTE_LABEL.route = route
+    token = AI_USAGE.set(usage) if usage is not None else None
+    try:
+        yield
+    finally:
+        AI_ROUTE_LABEL.route = previous
+        if token is not None:
+            AI_USAGE.reset(token)
+
+
+def current_ai_route():
+    route = getattr(AI_ROUTE_LABEL, "route", None)
+    if route:
+        return route
+    if has_request_context() and request.endpoint:
+        return request.endpoint
+    return "background"
+
+
+class AIUsage:
+    """Accounting for one AI request: languages, characters, tokens, cache outcome, latency and error."""
+
+    COUNTERS = (
+        "characters",
+        "prompt_tokens",
+        "completion_tokens",
+        "upstream_calls",
+        "upstream_seconds",
+        "cache_hits",
+        "cache_misses",
+    )
+
+    def __init__(self, route):
+        self.route = route
+        self.created_at = datetime.utcnow()
+        self.started = time.monotonic()
+        self.source = None
+        self.target = None
+        self.status = None
+        self.error = None
+        self._lock = threading.Lock()
+        for field in self.COUNTERS:
+            setattr(self, field, 0)
+
+    def add(self, **amounts):
+        with self._lock:
+            for field, amount in amounts.items():
+                setattr(self, field, getattr(self, field) + amount)
+
+    def add_tokens(self, usage):
+        if usage is None:
+            return
+        prompt = getattr(usage, "prompt_tokens", None) or getattr(usage, "input_tokens", None)
+        completion = getattr(usage, "completion_tokens", None) or getattr(usage, "output_tokens", None)
+        self.add(
+            prompt_tokens=prompt if isinstance(prompt, int) else 0,
+            completion_tokens=completion if isinstance(completion, int) else 0,
+        )
+
+    def fail(self, exc):
+        self.error = self.error or f"{type(exc).__name__}: {exc}"
+
+    def as_row(self):
+        status = self.status or (500 if self.error else 200)
+        return (
+            self.created_at,
+            self.route[:64],
+            canonical_language(self.source)[:50],
+            canonical_language(self.target)[:50],
+            self.characters,
+            self.prompt_tokens,
+            self.completion_tokens,
+            self.upstream_calls,
+            self.cache_hits,
+            self.cache_misses,
+            int((time.monotonic() - self.started) * 1000),
+            int(self.upstream_seconds * 1000),
+            status,
+            (self.error or "")[:255] or None,
+        )
+
+
+AI_USAGE = ContextVar("ai_usage", default=None)
+
+
+def current_ai_usage():
+    return AI_USAGE.get()
+
+
+def note_ai_usage(**amounts):
+    usage = AI_USAGE.get()
+    if usage is not None:
+        usage.add(**amounts)
+
+
+def note_ai_languages(source, target):
+    usage = AI_USAGE.get()
+    if usage is not None and usage.source is None and usage.target is None:
+        usage.source, usage.target = source, target
+
+
+@contextmanager
+def tracked_ai_usage(route):
+    """Collect the AI calls made inside the block into one usage record and queue it for the usage log."""
+    usage = AIUsage(route)
+    token = AI_USAGE.set(usage)
+    try:
+        with labelled_ai_route(route):
+            yield usage
+    except Exception as exc:
+        usage.fail(exc)
+        raise
+    finally:
+        AI_USAGE.reset(token)
+        USAGE_RECORDER.record(usage)
+
+
+class Bulkhead:
+    """Caps concurrent upstream AI calls; callers wait briefly in a bounded queue or are rejected."""
+
+    def __init__(self, max_concurrent, max_queue, queue_timeout, retry_after):
+        self._condition = threading.Condition()
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.waiting = 0
+        self.routes = {}
+        self.wakers = set()
+
+    def _route_stats(self, route):
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = {
+                "in_flight": 0,
+                "admitted": 0,
+                "rejected": 0,
+                "wait_total": 0.0,
+                "wait_max": 0.0,
+                "waits": deque(maxlen=512),
+            }
+            self.routes[route] = stats
+        return stats
+
+    @contextmanager
+    def slot(self, route, timeout=None):
+        """Hold one slot for the block, waiting at most ``queue_timeout`` (or ``timeout`` if shorter)."""
+        started = time.monotonic()
+        with self._condition:
+            stats = self._route_stats(route)
+            if self.in_flight >= self.max_concurrent:
+                if self.waiting >= self.max_queue:
+                    stats["rejected"] += 1
+                    raise UpstreamBusyError(self.retry_after)
+                self.waiting += 1
+                try:
+                    deadline = started + (self.queue_timeout if timeout is None else min(self.queue_timeout, timeout))
+                    while self.in_flight >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            stats["rejected"] += 1
+                            raise UpstreamBusyError(self.retry_after)
+                        self._condition.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self._admit(stats, started)
+        try:
+            yield
+        finally:
+            self._release(stats)
+
+    def _admit(self, stats, started):
+        """Take a slot; the caller holds ``_condition`` and has checked that one is free."""
+        waited = time.monotonic() - started
+        self.in_flight += 1
+        stats["in_flight"] += 1
+        stats["admitted"] += 1
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+        stats["waits"].append(waited)
+
+    def _release(self, stats):
+        with self._condition:
+            self.in_flight -= 1
+            stats["in_flight"] -= 1
+            self._condition.notify()
+            wakers = list(self.wakers)
+        # Callers that can't block on the condition (the ASGI event loop) register a wake-up callback.
+        for wake in wakers:
+            wake()
+
+    def stats(self):
+        with self._condition:
+            routes = {}
+            for route, stats in self.routes.items():
+                waits = sorted(stats["waits"])
+                p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0
+                routes[route] = {
+                    "in_flight": stats["in_flight"],
+                    "admitted": stats["admitted"],
+                    "rejected": stats["rejected"],
+                    "queue_wait_ms_avg": round(stats["wait_total"] / stats["admitted"] * 1000, 2) if stats["admitted"] else 0.0,
+                    "queue_wait_ms_p95": round(p95 * 1000, 2),
+                    "queue_wait_ms_max": round(stats["wait_max"] * 1000, 2),
+                }
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "routes": routes,
+            }
+
+
+class MeteredBackend:
+    """Adds each backend call's tokens and failure to the current usage record.
+
+    Upstream time is added by ResilientBackend per attempt, so it excludes bulkhead queue waits and
+    retry backoff. Calls made outside a tracked request (e.g. background jobs) are logged as records
+    of their own.
+    """
+
+    def __init__(self, backend, recorder):
+        self.backend = backend
+        self.recorder = recorder
+        self.name = backend.name
+
+    def chat(self, messages, **options):
+        if options.get("stream"):
+            return self._metered_stream(lambda: self.backend.chat(messages, **options))
+        return self._metered(lambda: self.backend.chat(messages, **options))
+
+    def speech(self, text, voice=None, stream=False):
+        if stream:
+            return self._metered_stream(lambda: self.backend.speech(text, voice=voice, stream=True))
+        return self._metered(lambda: self.backend.speech(text, voice=voice))
+
+    def transcribe(self, file, **options):
+        return self._metered(lambda: self.backend.transcribe(file, **options))
+
+    @contextmanager
+    def _usage(self):
+        usage = AI_USAGE.get()
+        standalone = usage is None
+        token = None
+        if standalone:
+            usage = AIUsage(current_ai_route())
+            token = AI_USAGE.set(usage)
+        try:
+            yield usage
+        except Exception as exc:
+            usage.fail(exc)
+            raise
+        finally:
+            usage.add(upstream_calls=1)
+            if standalone:
+                AI_USAGE.reset(token)
+                self.recorder.record(usage)
+
+    def _metered(self, call):
+        with self._usage() as usage:
+            result = call()
+            usage.add_tokens(getattr(result, "usage", None))
+            return result
+
+    def _metered_stream(self, open_stream):
+        with self._usage() as usage:
+            for chunk in open_stream():
+                usage.add_tokens(getattr(chunk, "usage", None))
+                yield chunk
+
+
+def is_retryable_ai_error(exc):
+    if isinstance(exc, APIConnectionError):
+        return True
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in (408, 409, 429) or exc.status_code >= 500
+    return False
+
+
+def retry_after_hint(exc):
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers.get("retry-after")) if response is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class ResilientBackend:
+    """Adds per-route deadlines, jittered retries and optional hedging to backend calls.
+
+    The deadline counts from the start of the request (its usage record), so queue waits, earlier calls
+    and retries all spend the same budget. Every attempt holds its own bulkhead slot, streams until
+    they are fully consumed; backoff sleeps happen between attempts, outside any slot. Only the time
+    attempts spend inside their slot is added to the usage record as upstream time.
+    """
+
+    def __init__(self, backend, bulkhead, deadlines, default_deadline, max_retries, hedge_routes):
+        self.backend = backend
+        self.bulkhead = bulkhead
+        self.name = backend.name
+        self.deadlines = deadlines
+        self.default_deadline = default_deadline
+        self.max_retries = max_retries
+        self.hedge_routes = hedge_routes
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(4, AI_MAX_CONCURRENCY * 2), thread_name_prefix="ai-hedge")
+        self.calls = {}
+
+    def _call_stats(self, key):
+        with self._lock:
+            stats = self.calls.get(key)
+            if stats is None:
+                stats = {
+                    "calls": 0,
+                    "attempts": 0,
+                    "retries": 0,
+                    "failures": 0,
+                    "deadline_exceeded": 0,
+                    "hedged": 0,
+                    "hedge_wins": 0,
+                    "latencies": deque(maxlen=256),
+                }
+                self.calls[key] = stats
+            stats["calls"] += 1
+            return stats
+
+    def _count(self, stats, field, amount=1):
+        with self._lock:
+            stats[field] += amount
+
+    def _hedge_delay(self, stats):
+        with self._lock:
+            latencies = sorted(stats["latencies"])
+            if len(latencies) < AI_HEDGE_MIN_SAMPLES:
+                return None
+            if stats["hedged"] + 1 > stats["calls"] * AI_HEDGE_MAX_FRACTION:
+                return None
+        return max(AI_HEDGE_MIN_DELAY_SECONDS, latencies[int(len(latencies) * 0.95) - 1])
+
+    def chat(self, messages, **options):
+        run = self._stream if options.get("stream") else self._run
+        return run("chat", lambda timeout: self.backend.chat(messages, timeout=timeout, **options))
+
+    def speech(self, text, voice=None, stream=False):
+        run = self._stream if stream else self._run
+        return run("speech", lambda timeout: self.backend.speech(text, voice=voice, stream=stream, timeout=timeout))
+
+    def transcribe(self, file, **options):
+        if isinstance(file, tuple) and hasattr(file[1], "read"):
+            stream = file[1]
+            if stream.seekable():
+                # Rewind for each retry rather than buffering the upload; one stream can't feed a hedge.
+                start = stream.tell()
+
+                def call(timeout):
+                    stream.seek(start)
+                    return self.backend.transcribe(file, timeout=timeout, **options)
+
+                return self._run("transcribe", call, hedge=False)
+            # Buffer the upload once so retries and hedges can resend it.
+            file = (file[0], stream.read(), *file[2:])
+        return self._run("transcribe", lambda timeout: self.backend.transcribe(file, timeout=timeout, **options))
+
+    def _stream(self, kind, call):
+        """Open a stream with the same retries as ``_run``, keeping its slot until it is consumed."""
+        with ExitStack() as held:
+            yield from self._run(kind, call, hedge=False, held=held)
+
+    def _run(self, kind, call, hedge=True, held=None):
+        route = current_ai_route()
+        budget = self.deadlines.get(route, self.default_deadline)
+        usage = AI_USAGE.get()
+        deadline = (usage.started if usage is not None else time.monotonic()) + budget
+        stats = self._call_stats(f"{route}:{kind}")
+        hedge = hedge and route in self.hedge_routes
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._count(stats, "deadline_exceeded")
+                raise UpstreamTimeoutError(budget)
+            attempt += 1
+            try:
+                if hedge:
+                    result = self._hedged(stats, route, call, deadline, usage)
+                else:
+                    result = self._attempt(stats, route, call, deadline, usage, held)
+            except Exception as exc:
+                if isinstance(exc, UpstreamBusyError) and deadline - time.monotonic() <= 0:
+                    self._count(stats, "deadline_exceeded")
+                    raise UpstreamTimeoutError(budget) from exc
+                if isinstance(exc, APITimeoutError) and deadline - time.monotonic() <= 0.05:
+                    self._count(stats, "deadline_exceeded")
+                    raise UpstreamTimeoutError(budget) from exc
+                if attempt > self.max_retries or not is_retryable_ai_error(exc):
+                    self._count(stats, "failures")
+                    raise
+                backoff = random.uniform(0, min(AI_RETRY_MAX_SECONDS, AI_RETRY_BASE_SECONDS * 2 ** (attempt - 1)))
+                backoff = max(backoff, retry_after_hint(exc) or 0)
+                if time.monotonic() + backoff >= deadline:
+                    self._count(stats, "failures")
+                    raise
+                self._count(stats, "retries")
+                time.sleep(backoff)
+                continue
+            return result
+
+    def _attempt(self, stats, route, call, deadline, usage, held=None):
+        """One upstream call inside a bulkhead slot; with ``held``, the slot is handed over to it."""
+        with ExitStack() as slot:
+            slot.enter_context(self.bulkhead.slot(route, deadline - time.monotonic()))
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise UpstreamBusyError(self.bulkhead.retry_after)
+            self._count(stats, "attempts")
+            started = time.monotonic()
+            if usage is not None:
+                # A stream's upstream time runs until its slot is released, once it is consumed.
+                slot.callback(lambda: usage.add(upstream_seconds=time.monotonic() - started))
+            result = call(remaining)
+            with self._lock:
+                stats["latencies"].append(time.monotonic() - started)
+            if held is not None:
+                held.enter_context(slot.pop_all())
+            return result
+
+    def _hedged(self, stats, route, call, deadline, usage):
+        delay = self._hedge_delay(stats)
+        if delay is None or delay >= deadline - time.monotonic():
+            return self._attempt(stats, route, call, deadline, usage)
+        primary = self._pool.submit(self._attempt, stats, route, call, deadline, usage)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeoutError:
+            pass
+        self._count(stats, "hedged")
+        backup = self._pool.submit(self._attempt, stats, route, call, deadline, usage)
+        pending = {primary, backup}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        self._count(stats, "hedge_wins")
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    def stats(self):
+        with self._lock:
+            calls = {}
+            for key, stats in self.calls.items():
+                latencies = sorted(stats["latencies"])
+                calls[key] = {
+                    field: stats[field]
+                    for field in ("calls", "attempts", "retries", "failures", "deadline_exceeded", "hedged", "hedge_wins")
+                }
+                calls[key]["latency_ms_p50"] = round(latencies[len(latencies) // 2] * 1000, 2) if latencies else 0.0
+                calls[key]["latency_ms_p95"] = (
+                    round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2) if latencies else 0.0
+                )
+            return {
+                "default_deadline_seconds": self.default_deadline,
+                "route_deadlines_seconds": dict(self.deadlines),
+                "max_retries": self.max_retries,
+                "hedge_routes": sorted(self.hedge_routes),
+                "hedge_max_fraction": AI_HEDGE_MAX_FRACTION,
+                "calls": calls,
+            }
+
+
+def write_usage_rows(rows):
+    """Insert raw usage events and fold them into the hourly rollups in one transaction."""
+    rollups = {}
+    for row in rows:
+        created_at, route, source, target = row[:4]
+        key = (created_at.replace(minute=0, second=0, microsecond=0), route, source, target)
+        totals = rollups.setdefault(key, [0] * 10)
+        characters, prompt_tokens, completion_tokens, upstream_calls, hits, misses, latency_ms, upstream_ms, status = row[4:13]
+        for index, amount in enumerate(
+            (
+                1,
+                1 if status >= 400 else 0,
+                characters,
+                prompt_tokens,
+                completion_tokens,
+                upstream_calls,
+                hits,
+                misses,
+                latency_ms,
+                upstream_ms,
+            )
+        ):
+            totals[index] += amount
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(
+            """
+            INSERT INTO ai_usage_events (
+                created_at, route, source_language, target_language, characters, prompt_tokens,
+                completion_tokens, upstream_calls, cache_hits, cache_misses, latency_ms, upstream_ms,
+                status, error
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """,
+            rows,
+        )
+        cursor.executemany(
+            """
+            INSERT INTO ai_usage_hourly (
+                hour_start, route, source_language, target_language, requests, errors, characters,
+                prompt_tokens, completion_tokens, upstream_calls, cache_hits, cache_misses,
+                latency_ms_total, upstream_ms_total
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                requests = requests + VALUES(requests),
+                errors = errors + VALUES(errors),
+                characters = characters + VALUES(characters),
+                prompt_tokens = prompt_tokens + VALUES(prompt_tokens),
+                completion_tokens = completion_tokens + VALUES(completion_tokens),
+                upstream_calls = upstream_calls + VALUES(upstream_calls),
+                cache_hits = cache_hits + VALUES(cache_hits),
+                cache_misses = cache_misses + VALUES(cache_misses),
+                latency_ms_total = latency_ms_total + VALUES(latency_ms_total),
+                upstream_ms_total = upstream_ms_total + VALUES(upstream_ms_total)
+            """,
+            [(*key, *totals) for key, totals in rollups.items()],
+        )
+        conn.commit()
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+class UsageRecorder:
+    """Buffers usage records in memory; a background thread writes them to MySQL in batches.
+
+    Requests only append to the buffer. When the database is unreachable, rows are kept for the next
+    flush up to ``max_buffer`` and the oldest are dropped after that.
+    """
+
+    def __init__(self, enabled, flush_seconds, batch_size, max_buffer, retention_days):
+        self.enabled = enabled
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.retention_days = retention_days
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pruned_at = 0.0
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+        self.last_flush_at = None
+
+    def record(self, usage):
+        if not self.enabled:
+            return
+        row = usage.as_row()
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self._buffer.popleft()
+                self.dropped += 1
+            self._buffer.append(row)
+            self.recorded += 1
+            full = len(self._buffer) >= self.batch_size
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="usage-log", daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(timeout=self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+            if time.monotonic() - self._pruned_at >= 3600:
+                self._pruned_at = time.monotonic()
+                self.prune()
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written."""
+        with self._flush_lock:
+            written = 0
+            while True:
+                with self._lock:
+                    batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                if not batch:
+                    return written
+                try:
+                    write_usage_rows(batch)
+                except mysql.connector.Error as exc:
+                    with self._lock:
+                        self.failed_flushes += 1
+                        self._buffer.extendleft(reversed(batch))
+                        while len(self._buffer) > self.max_buffer:
+                            self._buffer.popleft()
+                            self.dropped += 1
+                    print(f"[usage-log] Database error: {exc}")
+                    return written
+                written += len(batch)
+                with self._lock:
+                    self.written += len(batch)
+                    self.last_flush_at = datetime.utcnow()
+
+    def prune(self):
+        try:
+            conn = get_db_connection()
+        except mysql.connector.Error:
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "DELETE FROM ai_usage_events WHERE created_at < %s",
+                (datetime.utcnow() - timedelta(days=self.retention_days),),
+            )
+            conn.commit()
+        except mysql.connector.Error:
+            conn.rollback()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "buffered": len(self._buffer),
+                "recorded": self.recorded,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed_flushes": self.failed_flushes,
+                "last_flush_at": isoformat_utc(self.last_flush_at),
+            }
+
+
+USAGE_RECORDER = UsageRecorder(
+    USAGE_LOG_ENABLED, USAGE_FLUSH_SECONDS, USAGE_FLUSH_BATCH, USAGE_BUFFER_MAX, USAGE_EVENT_RETENTION_DAYS
+)
+# Buffered records would otherwise be lost when the process stops.
+atexit.register(USAGE_RECORDER.flush)
+AI_BULKHEAD = Bulkhead(AI_MAX_CONCURRENCY, AI_MAX_QUEUE, AI_QUEUE_TIMEOUT_SECONDS, AI_RETRY_AFTER_SECONDS)
+AI_CALL_POLICY = ResilientBackend(
+    create_ai_backend(),
+    AI_BULKHEAD,
+    parse_route_settings(AI_ROUTE_DEADLINES),
+    AI_DEADLINE_SECONDS,
+    AI_MAX_RETRIES,
+    {route.strip() for route in AI_HEDGE_ROUTES.split(",") if route.strip()},
+)
+ai_backend = MeteredBackend(AI_CALL_POLICY, USAGE_RECORDER)
 
 DB_CONFIG = {
     "host": os.getenv("MYSQL_HOST", os.getenv("DB_HOST", "localhost")),
@@ -45,9 +885,79 @@ PUBLIC_HTML_PATHS = {"/index.html"}
 
 PROFILE_UPLOAD_SUBDIR = os.getenv("PROFILE_UPLOAD_SUBDIR", "uploads/profile")
 PROFILE_UPLOAD_FOLDER = os.path.abspath(os.path.join(app.root_path, PROFILE_UPLOAD_SUBDIR))
+TTS_CACHE_DIR = os.path.abspath(os.path.join(app.root_path, os.getenv("TTS_CACHE_DIR", "cache/tts")))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+# Set once every web process and the queue-workers process read and write the same TTS_CACHE_DIR
+# (one host, or a volume mounted into every container).
+TTS_CACHE_SHARED = os.getenv("TTS_CACHE_SHARED", "false").lower() == "true"
+TTS_CACHE_SCAN_SECONDS = float(os.getenv("TTS_CACHE_SCAN_SECONDS", 60))
+TTS_STREAM_CHUNK_BYTES = int(os.getenv("TTS_STREAM_CHUNK_BYTES", 4096))
+TTS_SEGMENT_MIN_CHARS = int(os.getenv("TTS_SEGMENT_MIN_CHARS", 300))
+TTS_SEGMENT_CONCURRENCY = int(os.getenv("TTS_SEGMENT_CONCURRENCY", 4))
+TTS_CACHE_MAX_AGE_SECONDS = int(os.getenv("TTS_CACHE_MAX_AGE_SECONDS", 365 * 24 * 3600))
 ALLOWED_PROFILE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
 MAX_PROFILE_IMAGE_BYTES = int(os.getenv("PROFILE_UPLOAD_MAX_BYTES", 5 * 1024 * 1024))
+AUDIO_UPLOAD_MAX_BYTES = int(os.getenv("AUDIO_UPLOAD_MAX_BYTES", 25 * 1024 * 1024))
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", 1024 * 1024))
+# Room for multipart boundaries and the small form fields sent alongside the file.
+UPLOAD_FORM_OVERHEAD_BYTES = 64 * 1024
 REGISTRATION_CODE_EXPIRY_MINUTES = int(os.getenv("REGISTRATION_CODE_EXPIRY_MINUTES", 15))
+TRANSLATION_SINGLEFLIGHT_DB_LOCK = os.getenv("TRANSLATION_SINGLEFLIGHT_DB_LOCK", "false").lower() == "true"
+TRANSLATION_SINGLEFLIGHT_LOCK_TIMEOUT = int(os.getenv("TRANSLATION_SINGLEFLIGHT_LOCK_TIMEOUT", 30))
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", 5000))
+TRANSLATION_CACHE_TTL_SECONDS = int(os.getenv("TRANSLATION_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+TRANSLATION_CACHE_DB = os.getenv("TRANSLATION_CACHE_DB", "true").lower() == "true"
+TRANSCRIPTION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPTION_CACHE_MAX_ENTRIES", 5000))
+TRANSCRIPTION_CACHE_DB = os.getenv("TRANSCRIPTION_CACHE_DB", "true").lower() == "true"
+TRANSCRIPTION_CACHE_RETENTION_DAYS = int(os.getenv("TRANSCRIPTION_CACHE_RETENTION_DAYS", 90))
+STT_CHUNK_SECONDS = float(os.getenv("STT_CHUNK_SECONDS", 30))
+STT_CHUNK_OVERLAP_SECONDS = float(os.getenv("STT_CHUNK_OVERLAP_SECONDS", 2))
+STT_CHUNK_MIN_SECONDS = float(os.getenv("STT_CHUNK_MIN_SECONDS", 45))
+STT_CHUNK_CONCURRENCY = int(os.getenv("STT_CHUNK_CONCURRENCY", 4))
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+FFPROBE_BINARY = os.getenv("FFPROBE_BINARY", "ffprobe")
+STT_STREAM_MAX_SESSIONS = int(os.getenv("STT_STREAM_MAX_SESSIONS", 200))
+STT_STREAM_IDLE_SECONDS = float(os.getenv("STT_STREAM_IDLE_SECONDS", 60))
+STT_STREAM_PARTIAL_SECONDS = float(os.getenv("STT_STREAM_PARTIAL_SECONDS", 1.0))
+STT_STREAM_WORKERS = int(os.getenv("STT_STREAM_WORKERS", 8))
+STT_STREAM_SPOOL_DIR = os.path.abspath(os.path.join(app.root_path, os.getenv("STT_STREAM_SPOOL_DIR", "cache/stt_stream")))
+PRONUNCIATION_BATCH_MAX_ITEMS = int(os.getenv("PRONUNCIATION_BATCH_MAX_ITEMS", 100))
+PRONUNCIATION_CLOSE_THRESHOLD = float(os.getenv("PRONUNCIATION_CLOSE_THRESHOLD", 0.6))
+PRONUNCIATION_MAX_WORDS = int(os.getenv("PRONUNCIATION_MAX_WORDS", 200))
+PRONUNCIATION_ALIGN_BAND = int(os.getenv("PRONUNCIATION_ALIGN_BAND", 24))
+PRONUNCIATION_WORDS_PER_UNIT = float(os.getenv("PRONUNCIATION_WORDS_PER_UNIT", 200))
+TRANSLATION_BATCH_MAX_ITEMS = int(os.getenv("TRANSLATION_BATCH_MAX_ITEMS", 100))
+TRANSLATION_BATCH_CHUNK_ITEMS = int(os.getenv("TRANSLATION_BATCH_CHUNK_ITEMS", 25))
+TRANSLATION_BATCH_CHUNK_CHARS = int(os.getenv("TRANSLATION_BATCH_CHUNK_CHARS", 4000))
+TRANSLATION_BATCH_CONCURRENCY = int(os.getenv("TRANSLATION_BATCH_CONCURRENCY", 4))
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", 20000))
+TRANSLATION_MEMORY_REFERENCE_THRESHOLD = float(os.getenv("TRANSLATION_MEMORY_REFERENCE_THRESHOLD", 0.75))
+GLOSSARY_MAX_TERM_WORDS = int(os.getenv("GLOSSARY_MAX_TERM_WORDS", 6))
+GLOSSARY_REFRESH_SECONDS = int(os.getenv("GLOSSARY_REFRESH_SECONDS", 300))
+LANGID_MIN_CHARS = int(os.getenv("LANGID_MIN_CHARS", 8))
+LANGID_MIN_CONFIDENCE = float(os.getenv("LANGID_MIN_CONFIDENCE", 0.9))
+LANGID_TRAINING_ROWS = int(os.getenv("LANGID_TRAINING_ROWS", 5000))
+PRETRANSLATE_ENABLED = os.getenv("PRETRANSLATE_ENABLED", "true").lower() == "true"
+PRETRANSLATE_TARGET_LANGUAGES = os.getenv(
+    "PRETRANSLATE_TARGET_LANGUAGES", "English,Tagalog,Cebuano,Kapampangan,Bicolano,Waray,Hiligaynon"
+)
+PRETRANSLATE_RATE_PER_MINUTE = float(os.getenv("PRETRANSLATE_RATE_PER_MINUTE", 30))
+PRETRANSLATE_MAX_ATTEMPTS = int(os.getenv("PRETRANSLATE_MAX_ATTEMPTS", 3))
+PRETRANSLATE_RESCAN_SECONDS = int(os.getenv("PRETRANSLATE_RESCAN_SECONDS", 6 * 3600))
+# Pre-rendered audio is written by the queue-workers process but served by the web processes from
+# their own TTS_CACHE_DIR, so rendering it anywhere else would only spend upstream calls.
+SPEECH_PRERENDER_REQUESTED = os.getenv("SPEECH_PRERENDER_ENABLED", "true").lower() == "true"
+SPEECH_PRERENDER_ENABLED = SPEECH_PRERENDER_REQUESTED and TTS_CACHE_SHARED
+SPEECH_PRERENDER_RATE_PER_MINUTE = float(os.getenv("SPEECH_PRERENDER_RATE_PER_MINUTE", 20))
+SPEECH_PRERENDER_MAX_ATTEMPTS = int(os.getenv("SPEECH_PRERENDER_MAX_ATTEMPTS", 3))
+SPEECH_PRERENDER_RESCAN_SECONDS = int(os.getenv("SPEECH_PRERENDER_RESCAN_SECONDS", 6 * 3600))
+BACKGROUND_QUEUE_CLAIM_SECONDS = int(os.getenv("BACKGROUND_QUEUE_CLAIM_SECONDS", 900))
+BACKGROUND_QUEUE_POLL_SECONDS = float(os.getenv("BACKGROUND_QUEUE_POLL_SECONDS", 30))
+BACKGROUND_QUEUE_BUSY_WINDOW_SECONDS = int(os.getenv("BACKGROUND_QUEUE_BUSY_WINDOW_SECONDS", 60))
+BACKGROUND_QUEUE_BUSY_RATE = float(os.getenv("BACKGROUND_QUEUE_BUSY_RATE", 0.05))
+TRANSLATION_SEGMENT_MIN_CHARS = int(os.getenv("TRANSLATION_SEGMENT_MIN_CHARS", 600))
+TRANSLATION_SEGMENT_CONCURRENCY = int(os.getenv("TRANSLATION_SEGMENT_CONCURRENCY", 4))
+TRANSLATION_SEGMENT_PATTERN = re.compile(r"(\s*\n\s*|(?<=[.!?])\s+|(?<=[\u3002\uff01\uff1f])\s*)")
 PASSWORD_POLICY = re.compile(r"^(?=.*[A-Za-z])(?=.*[!@#$%^&*(),.?':{}|<>]).{8,}$")
 
 os.makedirs(PROFILE_UPLOAD_FOLDER, exist_ok=True)
@@ -82,6 +992,9 @@ class ForbiddenRedirectMiddleware:
 
 
 app.wsgi_app = ForbiddenRedirectMiddleware(app.wsgi_app)
+if PROXY_FIX_HOPS > 0:
+    # Per-IP quotas key on request.remote_addr, which is the proxy's address unless its headers are trusted.
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_FIX_HOPS, x_proto=PROXY_FIX_HOPS)
 
 
 def get_db_connection():
@@ -192,6 +1105,7 @@ DEFAULT_QUIZZES = [
         "questions": [
             {
                 "prompt": "Gwapa",
+                "vocabulary": True,
                 "explanation": "The word 'Gwapa' is used to describe someone who is beautiful or attractive.",
                 "options": [
                     {"text": "Maganda", "is_correct": True},
@@ -202,6 +1116,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Dili",
+                "vocabulary": True,
                 "explanation": "'Dili' means 'no' or 'not' in Cebuano.",
                 "options": [
                     {"text": "Oo", "is_correct": False},
@@ -212,6 +1127,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Maayong Buntag",
+                "vocabulary": True,
                 "explanation": "It is the Cebuano greeting for 'Good Morning'.",
                 "options": [
                     {"text": "Magandang Araw", "is_correct": False},
@@ -222,6 +1138,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Lami",
+                "vocabulary": True,
                 "explanation": "'Lami' means 'delicious' or 'tasty' in Cebuano.",
                 "options": [
                     {"text": "Maasim", "is_correct": False},
@@ -232,6 +1149,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Mangaon ta",
+                "vocabulary": True,
                 "explanation": "'Mangaon ta' means 'Let's eat!'.",
                 "options": [
                     {"text": "Kain tayo", "is_correct": True},
@@ -249,6 +1167,7 @@ DEFAULT_QUIZZES = [
         "questions": [
             {
                 "prompt": "“Unsa imong ngalan?”",
+                "vocabulary": True,
                 "explanation": "This is how you ask someone for their name in Cebuano.",
                 "options": [
                     {"text": "What is your name?", "is_correct": True},
@@ -259,6 +1178,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "“Taga-asa ka?”",
+                "vocabulary": True,
                 "explanation": "Common question used when meeting new friends.",
                 "options": [
                     {"text": "Where are you from?", "is_correct": True},
@@ -269,6 +1189,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Meaning of “Salamat kaayo”",
+                "vocabulary": True,
                 "explanation": "The word “kaayo” intensifies the gratitude.",
                 "options": [
                     {"text": "Thank you very much", "is_correct": True},
@@ -279,6 +1200,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "“Pila imong edad?”",
+                "vocabulary": True,
                 "explanation": "Asked when you want to know somebody's age politely.",
                 "options": [
                     {"text": "How old are you?", "is_correct": True},
@@ -296,6 +1218,7 @@ DEFAULT_QUIZZES = [
         "questions": [
             {
                 "prompt": "Maganda",
+                "vocabulary": True,
                 "explanation": "Means 'beautiful' or 'pretty' in Tagalog.",
                 "options": [
                     {"text": "Beautiful", "is_correct": True},
@@ -306,6 +1229,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Kumusta",
+                "vocabulary": True,
                 "explanation": "'Kumusta' asks how someone is doing.",
                 "options": [
                     {"text": "Hello", "is_correct": False},
@@ -316,6 +1240,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Salamat",
+                "vocabulary": True,
                 "explanation": "Expression of gratitude in Tagalog.",
                 "options": [
                     {"text": "Please", "is_correct": False},
@@ -326,6 +1251,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Bahay",
+                "vocabulary": True,
                 "explanation": "'Bahay' translates to house or home.",
                 "options": [
                     {"text": "House", "is_correct": True},
@@ -336,6 +1262,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Kain tayo",
+                "vocabulary": True,
                 "explanation": "An invitation meaning 'Let's eat'.",
                 "options": [
                     {"text": "Let's eat", "is_correct": True},
@@ -363,6 +1290,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "“Pinagpawisan siya matapos ang paglalakbay.” means?",
+                "vocabulary": True,
                 "options": [
                     {"text": "He was drenched in sweat after the journey.", "is_correct": True},
                     {"text": "He fell asleep on the trip.", "is_correct": False},
@@ -372,6 +1300,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "“Bumuhos ang malakas na ulan” best translates to?",
+                "vocabulary": True,
                 "options": [
                     {"text": "Heavy rain poured down.", "is_correct": True},
                     {"text": "The sun rose slowly.", "is_correct": False},
@@ -381,6 +1310,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Meaning of “pangarap na katuparan”",
+                "vocabulary": True,
                 "options": [
                     {"text": "Dream come true", "is_correct": True},
                     {"text": "Unfinished dream", "is_correct": False},
@@ -397,6 +1327,7 @@ DEFAULT_QUIZZES = [
         "questions": [
             {
                 "prompt": "Palangga",
+                "vocabulary": True,
                 "explanation": "Means 'beloved' or 'my love'.",
                 "options": [
                     {"text": "Kaibigan", "is_correct": False},
@@ -407,6 +1338,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Amigo",
+                "vocabulary": True,
                 "explanation": "Borrowed from Spanish, means male friend.",
                 "options": [
                     {"text": "Kaibigan", "is_correct": True},
@@ -417,6 +1349,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Pagkaon",
+                "vocabulary": True,
                 "explanation": "Refers to food, from root word 'kaon'.",
                 "options": [
                     {"text": "Balay", "is_correct": False},
@@ -427,6 +1360,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Asta sa liwat",
+                "vocabulary": True,
                 "explanation": "Means 'See you again'.",
                 "options": [
                     {"text": "Hindi", "is_correct": False},
@@ -437,6 +1371,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Balay",
+                "vocabulary": True,
                 "explanation": "Means 'house' or 'home'.",
                 "options": [
                     {"text": "Bahay", "is_correct": True},
@@ -454,6 +1389,7 @@ DEFAULT_QUIZZES = [
         "questions": [
             {
                 "prompt": "Marhay na aldaw",
+                "vocabulary": True,
                 "explanation": "A greeting meaning 'Good day'.",
                 "options": [
                     {"text": "Magandang umaga", "is_correct": False},
@@ -474,6 +1410,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Pangadyi",
+                "vocabulary": True,
                 "explanation": "Refers to prayer.",
                 "options": [
                     {"text": "Pagkain", "is_correct": False},
@@ -484,6 +1421,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Harayo",
+                "vocabulary": True,
                 "explanation": "Means far or distant.",
                 "options": [
                     {"text": "Malayo", "is_correct": True},
@@ -494,6 +1432,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Kaigwa",
+                "vocabulary": True,
                 "explanation": "Means friend.",
                 "options": [
                     {"text": "Kapitbahay", "is_correct": False},
@@ -511,6 +1450,7 @@ DEFAULT_QUIZZES = [
         "questions": [
             {
                 "prompt": "Mayaus",
+                "vocabulary": True,
                 "explanation": "Means 'beautiful' in Kapampangan.",
                 "options": [
                     {"text": "Matalino", "is_correct": False},
@@ -521,6 +1461,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Mayap a bengi",
+                "vocabulary": True,
                 "explanation": "Means 'good evening'.",
                 "options": [
                     {"text": "Magandang umaga", "is_correct": False},
@@ -531,6 +1472,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Dakal a salamat",
+                "vocabulary": True,
                 "explanation": "Means 'thank you very much'.",
                 "options": [
                     {"text": "Magandang umaga", "is_correct": False},
@@ -541,6 +1483,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Balen",
+                "vocabulary": True,
                 "explanation": "Means 'house'.",
                 "options": [
                     {"text": "Lalaki", "is_correct": False},
@@ -551,6 +1494,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Mangan tamu",
+                "vocabulary": True,
                 "explanation": "Means 'let's eat'.",
                 "options": [
                     {"text": "Kain na tayo", "is_correct": True},
@@ -568,6 +1512,7 @@ DEFAULT_QUIZZES = [
         "questions": [
             {
                 "prompt": "“Diin ka makadto?” asks about?",
+                "vocabulary": True,
                 "options": [
                     {"text": "Where are you going?", "is_correct": True},
                     {"text": "What is your name?", "is_correct": False},
@@ -577,6 +1522,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "“Palihog” in Hiligaynon",
+                "vocabulary": True,
                 "options": [
                     {"text": "Please", "is_correct": True},
                     {"text": "Thank you", "is_correct": False},
@@ -586,6 +1532,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Meaning of “Gani?”",
+                "vocabulary": True,
                 "options": [
                     {"text": "Really?", "is_correct": True},
                     {"text": "Later", "is_correct": False},
@@ -595,6 +1542,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "“Lakat na kita” best matches?",
+                "vocabulary": True,
                 "options": [
                     {"text": "Let’s start walking.", "is_correct": True},
                     {"text": "Sit down now.", "is_correct": False},
@@ -611,6 +1559,7 @@ DEFAULT_QUIZZES = [
         "questions": [
             {
                 "prompt": "“Dios mabalos” conveys?",
+                "vocabulary": True,
                 "options": [
                     {"text": "Thank you", "is_correct": True},
                     {"text": "Goodbye", "is_correct": False},
@@ -620,6 +1569,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Meaning of “dakula”",
+                "vocabulary": True,
                 "options": [
                     {"text": "Big", "is_correct": True},
                     {"text": "Small", "is_correct": False},
@@ -629,6 +1579,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "“Masiram” refers to",
+                "vocabulary": True,
                 "options": [
                     {"text": "Delicious", "is_correct": True},
                     {"text": "Bitter", "is_correct": False},
@@ -638,6 +1589,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "“Harong” best translates to",
+                "vocabulary": True,
                 "options": [
                     {"text": "House", "is_correct": True},
                     {"text": "School", "is_correct": False},
@@ -654,6 +1606,7 @@ DEFAULT_QUIZZES = [
         "questions": [
             {
                 "prompt": "“Kamusta ka man?” means",
+                "vocabulary": True,
                 "options": [
                     {"text": "How are you?", "is_correct": True},
                     {"text": "Where are you going?", "is_correct": False},
@@ -663,6 +1616,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Translation of “Magayon”",
+                "vocabulary": True,
                 "options": [
                     {"text": "Beautiful", "is_correct": True},
                     {"text": "Angry", "is_correct": False},
@@ -672,6 +1626,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "“Tara na” conveys",
+                "vocabulary": True,
                 "options": [
                     {"text": "Let’s go", "is_correct": True},
                     {"text": "Stay quiet", "is_correct": False},
@@ -681,6 +1636,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Meaning of “Nagadan”",
+                "vocabulary": True,
                 "options": [
                     {"text": "Passing through", "is_correct": True},
                     {"text": "Falling down", "is_correct": False},
@@ -697,6 +1653,7 @@ DEFAULT_QUIZZES = [
         "questions": [
             {
                 "prompt": "“Maupay nga aga” translates to",
+                "vocabulary": True,
                 "options": [
                     {"text": "Good morning", "is_correct": True},
                     {"text": "Good afternoon", "is_correct": False},
@@ -706,6 +1663,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "Meaning of “Salamat han imo bulig”",
+                "vocabulary": True,
                 "options": [
                     {"text": "Thank you for your help", "is_correct": True},
                     {"text": "Can you help me?", "is_correct": False},
@@ -715,6 +1673,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "“Kumusta ka?” equals",
+                "vocabulary": True,
                 "options": [
                     {"text": "How are you?", "is_correct": True},
                     {"text": "Where are you going?", "is_correct": False},
@@ -724,6 +1683,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "“Pasayloa ako” best means",
+                "vocabulary": True,
                 "options": [
                     {"text": "Forgive me", "is_correct": True},
                     {"text": "Come here", "is_correct": False},
@@ -740,6 +1700,7 @@ DEFAULT_QUIZZES = [
         "questions": [
             {
                 "prompt": "Meaning of “Karuyag mo ba?”",
+                "vocabulary": True,
                 "options": [
                     {"text": "Do you like it?", "is_correct": True},
                     {"text": "Are you afraid?", "is_correct": False},
@@ -758,6 +1719,7 @@ DEFAULT_QUIZZES = [
             },
             {
                 "prompt": "“Ayaw kabaraka” best matches",
+                "vocabulary": True,
                 "options": [
                     {"text": "Don't worry.", "is_correct": True},
                     {"text": "Don't move.", "is_correct": False},
@@ -975,6 +1937,7 @@ def normalize_quiz_questions(questions):
             {
                 "prompt": prompt,
                 "explanation": (question.get("explanation") or "").strip() or None,
+                "vocabulary": bool(question.get("vocabulary")),
                 "options": filtered_options,
             }
         )
@@ -1090,6 +2053,7 @@ TABLE_DEFINITIONS = [
         quiz_id INT NOT NULL,
         prompt TEXT NOT NULL,
         explanation TEXT,
+        is_vocabulary TINYINT(1) NOT NULL DEFAULT 0,
         order_index INT DEFAULT 0,
         CONSTRAINT fk_quiz_questions_quiz FOREIGN KEY (quiz_id)
             REFERENCES quizzes(id) ON DELETE CASCADE,
@@ -1190,6 +2154,7 @@ TABLE_DEFINITIONS = [
         quiz_id INT NOT NULL,
         prompt TEXT NOT NULL,
         explanation TEXT,
+        is_vocabulary TINYINT(1) NOT NULL DEFAULT 0,
         order_index INT DEFAULT 0,
         CONSTRAINT fk_module_course_quiz_questions_quiz FOREIGN KEY (quiz_id)
             REFERENCES module_course_quizzes(id) ON DELETE CASCADE
@@ -1251,6 +2216,142 @@ TABLE_DEFINITIONS = [
             REFERENCES module_courses(id) ON DELETE CASCADE
     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
     """,
+    """
+    CREATE TABLE IF NOT EXISTS translation_cache (
+        cache_key VARCHAR(64) PRIMARY KEY,
+        mode VARCHAR(16) NOT NULL,
+        source_language VARCHAR(50),
+        source_detected TINYINT(1) NOT NULL DEFAULT 0,
+        target_language VARCHAR(50),
+        source_text TEXT NOT NULL,
+        translation TEXT NOT NULL,
+        explanation TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        INDEX idx_translation_cache_updated (updated_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS transcription_cache (
+        cache_key VARCHAR(64) PRIMARY KEY,
+        model VARCHAR(100) NOT NULL,
+        language VARCHAR(50),
+        audio_bytes INT NOT NULL,
+        transcript TEXT NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        INDEX idx_transcription_cache_updated (updated_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dialect_glossary (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        term VARCHAR(255) NOT NULL,
+        term_language VARCHAR(50) NOT NULL,
+        translation VARCHAR(255) NOT NULL,
+        translation_language VARCHAR(50) NOT NULL,
+        explanation TEXT,
+        created_by INT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        UNIQUE KEY uniq_dialect_glossary_term (term_language, term, translation_language)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS pretranslation_queue (
+        cache_key VARCHAR(64) PRIMARY KEY,
+        source_language VARCHAR(50) NOT NULL,
+        target_language VARCHAR(50) NOT NULL,
+        source_text TEXT NOT NULL,
+        status VARCHAR(16) NOT NULL DEFAULT 'pending',
+        attempts INT DEFAULT 0,
+        last_error VARCHAR(255),
+        claimed_by VARCHAR(64) NULL,
+        claimed_at DATETIME NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        INDEX idx_pretranslation_status (status, created_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS speech_prerender_queue (
+        cache_key VARCHAR(64) PRIMARY KEY,
+        language VARCHAR(50) NOT NULL,
+        source_text TEXT NOT NULL,
+        status VARCHAR(16) NOT NULL DEFAULT 'pending',
+        attempts INT DEFAULT 0,
+        last_error VARCHAR(255),
+        claimed_by VARCHAR(64) NULL,
+        claimed_at DATETIME NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        INDEX idx_speech_prerender_status (status, created_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ai_usage_events (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        created_at DATETIME NOT NULL,
+        route VARCHAR(64) NOT NULL,
+        source_language VARCHAR(50) NOT NULL DEFAULT '',
+        target_language VARCHAR(50) NOT NULL DEFAULT '',
+        characters INT DEFAULT 0,
+        prompt_tokens INT DEFAULT 0,
+        completion_tokens INT DEFAULT 0,
+        upstream_calls INT DEFAULT 0,
+        cache_hits INT DEFAULT 0,
+        cache_misses INT DEFAULT 0,
+        latency_ms INT DEFAULT 0,
+        upstream_ms INT DEFAULT 0,
+        status SMALLINT NOT NULL,
+        error VARCHAR(255),
+        INDEX idx_ai_usage_events_created (created_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ai_quota_buckets (
+        bucket_key VARCHAR(128) PRIMARY KEY,
+        tokens DOUBLE NOT NULL,
+        updated_at DOUBLE NOT NULL
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS stt_stream_sessions (
+        id CHAR(32) PRIMARY KEY,
+        source_language VARCHAR(50) NOT NULL DEFAULT '',
+        audio_format VARCHAR(16) NOT NULL,
+        sample_rate INT NOT NULL,
+        quota_kind VARCHAR(8) NULL,
+        quota_identity VARCHAR(128) NULL,
+        transcript MEDIUMTEXT NOT NULL,
+        transcript_bytes BIGINT NOT NULL DEFAULT 0,
+        windows MEDIUMTEXT NULL,
+        finished TINYINT(1) NOT NULL DEFAULT 0,
+        refreshing_until DOUBLE NOT NULL DEFAULT 0,
+        refreshed_at DOUBLE NOT NULL DEFAULT 0,
+        touched_at DOUBLE NOT NULL,
+        INDEX idx_stt_stream_sessions_touched (touched_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ai_usage_hourly (
+        hour_start DATETIME NOT NULL,
+        route VARCHAR(64) NOT NULL,
+        source_language VARCHAR(50) NOT NULL DEFAULT '',
+        target_language VARCHAR(50) NOT NULL DEFAULT '',
+        requests INT DEFAULT 0,
+        errors INT DEFAULT 0,
+        characters BIGINT DEFAULT 0,
+        prompt_tokens BIGINT DEFAULT 0,
+        completion_tokens BIGINT DEFAULT 0,
+        upstream_calls INT DEFAULT 0,
+        cache_hits INT DEFAULT 0,
+        cache_misses INT DEFAULT 0,
+        latency_ms_total BIGINT DEFAULT 0,
+        upstream_ms_total BIGINT DEFAULT 0,
+        PRIMARY KEY (hour_start, route, source_language, target_language)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
 ]
 
 
@@ -1315,6 +2416,70 @@ def ensure_profile_image_column(cursor):
         pass
 
 
+def ensure_translation_cache_source_detected(cursor):
+    try:
+        cursor.execute("SHOW COLUMNS FROM translation_cache LIKE 'source_detected'")
+        if cursor.fetchone():
+            return
+        cursor.execute(
+            """
+            ALTER TABLE translation_cache
+            ADD COLUMN source_detected TINYINT(1) NOT NULL DEFAULT 0 AFTER source_language
+            """
+        )
+    except mysql.connector.Error:
+        pass
+
+
+def ensure_transcription_cache_updated_index(cursor):
+    try:
+        cursor.execute("SHOW INDEX FROM transcription_cache WHERE Key_name = 'idx_transcription_cache_updated'")
+        if cursor.fetchall():
+            return
+        cursor.execute("ALTER TABLE transcription_cache ADD INDEX idx_transcription_cache_updated (updated_at)")
+    except mysql.connector.Error:
+        pass
+
+
+def ensure_quiz_vocabulary_columns(cursor):
+    """Add is_vocabulary and mark the seeded questions that are plain word/phrase translations."""
+    prompts = [
+        question["prompt"]
+        for quiz in DEFAULT_QUIZZES
+        for question in quiz.get("questions", [])
+        if question.get("vocabulary")
+    ]
+    placeholders = ", ".join(["%s"] * len(prompts))
+    for table in ("quiz_questions", "module_course_quiz_questions"):
+        try:
+            cursor.execute(f"SHOW COLUMNS FROM {table} LIKE 'is_vocabulary'")
+            if cursor.fetchone():
+                continue
+            cursor.execute(
+                f"ALTER TABLE {table} ADD COLUMN is_vocabulary TINYINT(1) NOT NULL DEFAULT 0 AFTER explanation"
+            )
+            cursor.execute(f"UPDATE {table} SET is_vocabulary = 1 WHERE prompt IN ({placeholders})", prompts)
+        except mysql.connector.Error:
+            pass
+
+
+def ensure_queue_claim_columns(cursor):
+    for table in ("pretranslation_queue", "speech_prerender_queue"):
+        try:
+            cursor.execute(f"SHOW COLUMNS FROM {table} LIKE 'claimed_by'")
+            if cursor.fetchone():
+                continue
+            cursor.execute(
+                f"""
+                ALTER TABLE {table}
+                ADD COLUMN claimed_by VARCHAR(64) NULL AFTER last_error,
+                ADD COLUMN claimed_at DATETIME NULL AFTER claimed_by
+                """
+            )
+        except mysql.connector.Error:
+            pass
+
+
 def seed_default_quizzes(cursor):
     try:
         cursor.execute("SELECT title FROM quizzes")
@@ -1343,10 +2508,16 @@ def seed_default_quizzes(cursor):
         for index, question in enumerate(quiz.get("questions", []), start=1):
             cursor.execute(
                 """
-                INSERT INTO quiz_questions (quiz_id, prompt, explanation, order_index)
-                VALUES (%s, %s, %s, %s)
+                INSERT INTO quiz_questions (quiz_id, prompt, explanation, is_vocabulary, order_index)
+                VALUES (%s, %s, %s, %s, %s)
                 """,
-                (quiz_id, question["prompt"], question.get("explanation"), index),
+                (
+                    quiz_id,
+                    question["prompt"],
+                    question.get("explanation"),
+                    int(bool(question.get("vocabulary"))),
+                    index,
+                ),
             )
             question_id = cursor.lastrowid
             for option in question.get("options", []):
@@ -1520,13 +2691,14 @@ def seed_default_module_data(cursor):
             for question_index, question in enumerate(default_quiz.get("questions", []), start=1):
                 cursor.execute(
                     """
-                    INSERT INTO module_course_quiz_questions (quiz_id, prompt, explanation, order_index)
-                    VALUES (%s, %s, %s, %s)
+                    INSERT INTO module_course_quiz_questions (quiz_id, prompt, explanation, is_vocabulary, order_index)
+                    VALUES (%s, %s, %s, %s, %s)
                     """,
                     (
                         quiz_id,
                         question.get("prompt"),
                         question.get("explanation"),
+                        int(bool(question.get("vocabulary"))),
                         question_index,
                     ),
                 )
@@ -1558,6 +2730,10 @@ def initialize_database():
             cursor.execute(ddl)
         ensure_reading_progress_schema(cursor)
         ensure_profile_image_column(cursor)
+        ensure_queue_claim_columns(cursor)
+        ensure_quiz_vocabulary_columns(cursor)
+        ensure_translation_cache_source_detected(cursor)
+        ensure_transcription_cache_updated_index(cursor)
         seed_default_quizzes(cursor)
         seed_default_module_data(cursor)
         conn.commit()
@@ -1763,7 +2939,7 @@ def fetch_module_course_quiz(cursor, course_id, include_correct=False):
 
     cursor.execute(
         """
-        SELECT id, prompt, explanation, order_index
+        SELECT id, prompt, explanation, is_vocabulary, order_index
         FROM module_course_quiz_questions
         WHERE quiz_id = %s
         ORDER BY order_index ASC, id ASC
@@ -1793,6 +2969,7 @@ def fetch_module_course_quiz(cursor, course_id, include_correct=False):
             option_payload = {
                 "id": option.get("id"),
                 "text": option.get("text"),
+                "audio_url": speech_audio_url(option.get("text")),
             }
             if include_correct:
                 option_payload["is_correct"] = bool(option.get("is_correct"))
@@ -1807,7 +2984,9 @@ def fetch_module_course_quiz(cursor, course_id, include_correct=False):
             {
                 "id": question_id,
                 "prompt": question.get("prompt"),
+                "prompt_audio_url": speech_audio_url(question.get("prompt")),
                 "explanation": question.get("explanation"),
+                "vocabulary": bool(question.get("is_vocabulary")),
                 "order_index": question.get("order_index"),
                 "options": options_by_question.get(question_id, []),
                 "correct_option_id": correct_option_by_question.get(question_id),
@@ -1908,6 +3087,7 @@ def normalize_module_quiz_questions(raw_questions):
             {
                 "prompt": prompt,
                 "explanation": (question.get("explanation") or "").strip() or None,
+                "vocabulary": bool(question.get("vocabulary")),
                 "options": normalized_options,
             }
         )
@@ -2146,7 +3326,7 @@ def fetch_quiz_detail(cursor, quiz_id, include_correct=False):
 
     cursor.execute(
         """
-        SELECT id, prompt, explanation, order_index
+        SELECT id, prompt, explanation, is_vocabulary, order_index
         FROM quiz_questions
         WHERE quiz_id = %s
         ORDER BY order_index ASC, id ASC
@@ -2174,6 +3354,7 @@ def fetch_quiz_detail(cursor, quiz_id, include_correct=False):
             option_payload = {
                 "id": option["id"],
                 "text": option["text"],
+                "audio_url": speech_audio_url(option["text"]),
             }
             if include_correct:
                 option_payload["is_correct"] = bool(option.get("is_correct"))
@@ -2186,7 +3367,9 @@ def fetch_quiz_detail(cursor, quiz_id, include_correct=False):
         entry = {
             "id": question["id"],
             "prompt": question["prompt"],
+            "prompt_audio_url": speech_audio_url(question["prompt"]),
             "explanation": question.get("explanation"),
+            "vocabulary": bool(question.get("is_vocabulary")),
             "order_index": question.get("order_index"),
             "options": options_by_question.get(question["id"], []),
         }
@@ -3345,10 +4528,10 @@ def admin_module_courses_collection():
         for question_index, question in enumerate(questions, start=1):
             cursor.execute(
                 """
-                INSERT INTO module_course_quiz_questions (quiz_id, prompt, explanation, order_index)
-                VALUES (%s, %s, %s, %s)
+                INSERT INTO module_course_quiz_questions (quiz_id, prompt, explanation, is_vocabulary, order_index)
+                VALUES (%s, %s, %s, %s, %s)
                 """,
-                (quiz_id, question["prompt"], question.get("explanation"), question_index),
+                (quiz_id, question["prompt"], question.get("explanation"), int(question["vocabulary"]), question_index),
             )
             question_id = cursor.lastrowid
             for option in question["options"]:
@@ -3361,6 +4544,7 @@ def admin_module_courses_collection():
                 )
 
         conn.commit()
+        on_learning_content_changed()
         detail = fetch_module_course_admin_detail(cursor, course_id)
         return json_response(True, "Module course created.", {"course": detail})
     except (ValueError, TypeError) as exc:
@@ -3519,10 +4703,10 @@ def admin_module_course_resource(course_id):
         for question_index, question in enumerate(questions, start=1):
             cursor.execute(
                 """
-                INSERT INTO module_course_quiz_questions (quiz_id, prompt, explanation, order_index)
-                VALUES (%s, %s, %s, %s)
+                INSERT INTO module_course_quiz_questions (quiz_id, prompt, explanation, is_vocabulary, order_index)
+                VALUES (%s, %s, %s, %s, %s)
                 """,
-                (quiz_id, question["prompt"], question.get("explanation"), question_index),
+                (quiz_id, question["prompt"], question.get("explanation"), int(question["vocabulary"]), question_index),
             )
             question_id = cursor.lastrowid
             for option in question["options"]:
@@ -3535,6 +4719,7 @@ def admin_module_course_resource(course_id):
                 )
 
         conn.commit()
+        on_learning_content_changed()
         detail = fetch_module_course_admin_detail(cursor, course_id)
         return json_response(True, "Module course updated.", {"course": detail})
     except (ValueError, TypeError) as exc:
@@ -3620,6 +4805,41 @@ def admin_analytics():
         )
         attempts_by_day = cursor.fetchall() or []
 
+        route_placeholders = ", ".join(["%s"] * len(TRANSLATION_USAGE_ROUTES))
+        cursor.execute(
+            f"""
+            SELECT DATE(hour_start) AS day, SUM(requests - errors) AS translations
+            FROM ai_usage_hourly
+            WHERE hour_start >= %s AND route IN ({route_placeholders})
+            GROUP BY DATE(hour_start)
+            ORDER BY DATE(hour_start) ASC
+            """,
+            (last_7d_start, *TRANSLATION_USAGE_ROUTES),
+        )
+        translations_by_day = cursor.fetchall() or []
+
+        # Hourly buckets: the window starts at the top of the hour 24 hours ago.
+        cursor.execute(
+            """
+            SELECT
+                route,
+                SUM(requests) AS requests,
+                SUM(errors) AS errors,
+                SUM(characters) AS characters,
+                SUM(prompt_tokens) AS prompt_tokens,
+                SUM(completion_tokens) AS completion_tokens,
+                SUM(cache_hits) AS cache_hits,
+                SUM(cache_misses) AS cache_misses,
+                SUM(latency_ms_total) AS latency_ms_total
+            FROM ai_usage_hourly
+            WHERE hour_start >= %s
+            GROUP BY route
+            ORDER BY route ASC
+            """,
+            (last_24h.replace(minute=0, second=0, microsecond=0),),
+        )
+        usage_by_route = cursor.fetchall() or []
+
         daily_signups_lookup = {
             row["day"].isoformat() if hasattr(row["day"], "isoformat") else str(row["day"]): row.get("signups", 0) or 0
             for row in signups_by_day
@@ -3630,6 +4850,28 @@ def admin_analytics():
             for row in attempts_by_day
             if row.get("day") is not None
         }
+        daily_translations_lookup = {
+            row["day"].isoformat() if hasattr(row["day"], "isoformat") else str(row["day"]): int(row.get("translations") or 0)
+            for row in translations_by_day
+            if row.get("day") is not None
+        }
+        ai_usage_last_24h = []
+        for row in usage_by_route:
+            requests = int(row.get("requests") or 0)
+            hits = int(row.get("cache_hits") or 0)
+            lookups = hits + int(row.get("cache_misses") or 0)
+            ai_usage_last_24h.append(
+                {
+                    "route": row["route"],
+                    "requests": requests,
+                    "errors": int(row.get("errors") or 0),
+                    "characters": int(row.get("characters") or 0),
+                    "prompt_tokens": int(row.get("prompt_tokens") or 0),
+                    "completion_tokens": int(row.get("completion_tokens") or 0),
+                    "cache_hit_rate": round(hits / lookups, 3) if lookups else None,
+                    "avg_latency_ms": round(int(row.get("latency_ms_total") or 0) / requests, 1) if requests else 0.0,
+                }
+            )
 
         daily_series = []
         for offset in range(7):
@@ -3639,6 +4881,7 @@ def admin_analytics():
                     "date": day,
                     "quiz_attempts": daily_attempts_lookup.get(day, 0),
                     "signups": daily_signups_lookup.get(day, 0),
+                    "translations": daily_translations_lookup.get(day, 0),
                 }
             )
 
@@ -3651,7 +4894,12 @@ def admin_analytics():
             "total_attempts": attempt_stats.get("total_attempts", 0) or 0,
             "attempts_last_24h": attempt_stats.get("attempts_24h", 0) or 0,
             "reading_updates_last_24h": reading_stats.get("recent_reads", 0) or 0,
-            "translations_last_24h": 0,
+            "translations_last_24h": sum(
+                item["requests"] - item["errors"]
+                for item in ai_usage_last_24h
+                if item["route"] in TRANSLATION_USAGE_ROUTES
+            ),
+            "ai_usage_last_24h": ai_usage_last_24h,
             "daily_activity": daily_series,
         }
         return json_response(True, "Analytics fetched.", {"analytics": analytics})
@@ -3660,38 +4908,247 @@ def admin_analytics():
         conn.close()
 
 
-@app.route("/api/quizzes", methods=["GET", "POST"])
-def quizzes_collection():
-    if request.method == "GET":
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        try:
-            quizzes = fetch_quiz_list(cursor)
-            return json_response(True, "Quizzes fetched.", {"quizzes": quizzes})
-        finally:
-            cursor.close()
-            conn.close()
+# Extra metric sources registered by other serving paths in the same process (see asgi.py).
+AI_METRICS_PROVIDERS = {}
 
-    # POST
-    user_id = session.get("user_id")
-    if not user_id:
-        return json_response(False, "Authentication required.", status=401)
 
-    data = request.get_json() or {}
-    title = (data.get("title") or "").strip()
-    if not title:
-        return json_response(False, "Quiz title is required.", status=400)
+@app.route("/api/admin/ai_metrics", methods=["GET"])
+def admin_ai_metrics():
+    auth_error = ensure_authenticated()
+    if auth_error:
+        return auth_error
+    metrics = {
+        "translation_singleflight": TRANSLATION_FLIGHTS.stats(),
+        "translation_cache": TRANSLATION_CACHE.stats(),
+        "tts_cache": TTS_CACHE.stats(),
+        "transcription_cache": TRANSCRIPTION_CACHE.stats(),
+        "streaming_transcriptions": STREAMING_TRANSCRIPTIONS.stats(),
+        "translation_memory": TRANSLATION_MEMORY.stats(),
+        "dialect_glossary": DIALECT_GLOSSARY.stats(),
+        "language_identifier": LANGUAGE_IDENTIFIER.stats(),
+        "pretranslation": PRETRANSLATION_WORKER.stats(),
+        "speech_prerender": SPEECH_PRERENDER_WORKER.stats(),
+        "bulkhead": AI_BULKHEAD.stats(),
+        "quotas": AI_QUOTA.stats(),
+        "upstream_calls": AI_CALL_POLICY.stats(),
+        "usage_log": USAGE_RECORDER.stats(),
+    }
+    for name, provider in AI_METRICS_PROVIDERS.items():
+        metrics[name] = provider()
+    return json_response(True, "AI metrics fetched.", {"metrics": metrics})
 
-    try:
-        normalized_questions = normalize_quiz_questions(data.get("questions"))
-    except ValueError as exc:
-        return json_response(False, str(exc), status=400)
 
-    description = (data.get("description") or "").strip() or None
-    language = (data.get("language") or "").strip() or None
-    is_active = 1 if data.get("is_active", True) else 0
+@app.route("/api/admin/pretranslation", methods=["GET", "POST"])
+def admin_pretranslation():
+    auth_error = ensure_authenticated()
+    if auth_error:
+        return auth_error
+    if request.method == "POST":
+        if not (PRETRANSLATE_ENABLED and TRANSLATION_CACHE_DB):
+            return json_response(False, "Pre-translation is disabled.", status=409)
+        if (request.get_json(silent=True) or {}).get("retry_failed"):
+            PRETRANSLATION_WORKER.retry_failed()
+        PRETRANSLATION_WORKER.request_scan()
+        return json_response(True, "Pre-translation scan scheduled.", {"status": PRETRANSLATION_WORKER.stats()})
+    return json_response(True, "Pre-translation status fetched.", {"status": PRETRANSLATION_WORKER.stats()})
+
+
+@app.route("/api/admin/speech_prerender", methods=["GET", "POST"])
+def admin_speech_prerender():
+    auth_error = ensure_authenticated()
+    if auth_error:
+        return auth_error
+    if request.method == "POST":
+        if not SPEECH_PRERENDER_ENABLED:
+            message = "Speech pre-rendering is disabled."
+            if SPEECH_PRERENDER_REQUESTED:
+                message = "Speech pre-rendering needs TTS_CACHE_SHARED=true (a TTS_CACHE_DIR shared by every process)."
+            return json_response(False, message, status=409)
+        if (request.get_json(silent=True) or {}).get("retry_failed"):
+            SPEECH_PRERENDER_WORKER.retry_failed()
+        SPEECH_PRERENDER_WORKER.request_scan()
+        return json_response(True, "Speech pre-render scan scheduled.", {"status": SPEECH_PRERENDER_WORKER.stats()})
+    return json_response(True, "Speech pre-render status fetched.", {"status": SPEECH_PRERENDER_WORKER.stats()})
+
+
+def serialize_glossary_entry(row):
+    return {
+        "id": row["id"],
+        "term": row["term"],
+        "term_language": row["term_language"],
+        "translation": row["translation"],
+        "translation_language": row["translation_language"],
+        "explanation": row.get("explanation"),
+        "updated_at": isoformat_utc(row.get("updated_at")),
+    }
 
-    conn = get_db_connection()
+
+def parse_glossary_payload(data):
+    fields = {}
+    for field in ("term", "term_language", "translation", "translation_language"):
+        value = (data.get(field) or "").strip()
+        if not value:
+            raise ValueError(f"{field} is required.")
+        fields[field] = value
+    fields["explanation"] = (data.get("explanation") or "").strip() or None
+    return fields
+
+
+@app.route("/api/admin/glossary", methods=["GET", "POST"])
+def admin_glossary_collection():
+    auth_error = ensure_authenticated()
+    if auth_error:
+        return auth_error
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        if request.method == "GET":
+            search = (request.args.get("search") or "").strip()
+            if search:
+                cursor.execute(
+                    """
+                    SELECT * FROM dialect_glossary
+                    WHERE term LIKE %s OR translation LIKE %s
+                    ORDER BY term_language ASC, term ASC
+                    """,
+                    (f"%{search}%", f"%{search}%"),
+                )
+            else:
+                cursor.execute("SELECT * FROM dialect_glossary ORDER BY term_language ASC, term ASC")
+            entries = [serialize_glossary_entry(row) for row in cursor.fetchall()]
+            return json_response(
+                True, "Glossary fetched.", {"entries": entries, "stats": DIALECT_GLOSSARY.stats()}
+            )
+
+        try:
+            fields = parse_glossary_payload(request.get_json() or {})
+        except ValueError as exc:
+            return json_response(False, str(exc), status=400)
+        cursor.execute(
+            """
+            INSERT INTO dialect_glossary (
+                term, term_language, translation, translation_language, explanation, created_by
+            )
+            VALUES (%s, %s, %s, %s, %s, %s)
+            """,
+            (
+                fields["term"],
+                fields["term_language"],
+                fields["translation"],
+                fields["translation_language"],
+                fields["explanation"],
+                session.get("user_id"),
+            ),
+        )
+        conn.commit()
+        cursor.execute("SELECT * FROM dialect_glossary WHERE id = %s", (cursor.lastrowid,))
+        entry = serialize_glossary_entry(cursor.fetchone())
+        DIALECT_GLOSSARY.invalidate()
+        if SPEECH_PRERENDER_ENABLED:
+            SPEECH_PRERENDER_WORKER.request_scan()
+        return json_response(True, "Glossary entry created.", {"entry": entry}, status=201)
+    except mysql.connector.IntegrityError:
+        conn.rollback()
+        return json_response(False, "This term already has a translation for that language.", status=409)
+    except mysql.connector.Error as exc:
+        conn.rollback()
+        return json_response(False, f"Database error: {exc}", status=500)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+@app.route("/api/admin/glossary/<int:entry_id>", methods=["PUT", "DELETE"])
+def admin_glossary_resource(entry_id):
+    auth_error = ensure_authenticated()
+    if auth_error:
+        return auth_error
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        if request.method == "DELETE":
+            cursor.execute("DELETE FROM dialect_glossary WHERE id = %s", (entry_id,))
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return json_response(False, "Glossary entry not found.", status=404)
+            conn.commit()
+            DIALECT_GLOSSARY.invalidate()
+            return json_response(True, "Glossary entry deleted.", {"entry_id": entry_id})
+
+        try:
+            fields = parse_glossary_payload(request.get_json() or {})
+        except ValueError as exc:
+            return json_response(False, str(exc), status=400)
+        cursor.execute(
+            """
+            UPDATE dialect_glossary
+            SET term = %s, term_language = %s, translation = %s, translation_language = %s, explanation = %s
+            WHERE id = %s
+            """,
+            (
+                fields["term"],
+                fields["term_language"],
+                fields["translation"],
+                fields["translation_language"],
+                fields["explanation"],
+                entry_id,
+            ),
+        )
+        cursor.execute("SELECT * FROM dialect_glossary WHERE id = %s", (entry_id,))
+        row = cursor.fetchone()
+        if not row:
+            conn.rollback()
+            return json_response(False, "Glossary entry not found.", status=404)
+        conn.commit()
+        DIALECT_GLOSSARY.invalidate()
+        if SPEECH_PRERENDER_ENABLED:
+            SPEECH_PRERENDER_WORKER.request_scan()
+        return json_response(True, "Glossary entry updated.", {"entry": serialize_glossary_entry(row)})
+    except mysql.connector.IntegrityError:
+        conn.rollback()
+        return json_response(False, "This term already has a translation for that language.", status=409)
+    except mysql.connector.Error as exc:
+        conn.rollback()
+        return json_response(False, f"Database error: {exc}", status=500)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+@app.route("/api/quizzes", methods=["GET", "POST"])
+def quizzes_collection():
+    if request.method == "GET":
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            quizzes = fetch_quiz_list(cursor)
+            return json_response(True, "Quizzes fetched.", {"quizzes": quizzes})
+        finally:
+            cursor.close()
+            conn.close()
+
+    # POST
+    user_id = session.get("user_id")
+    if not user_id:
+        return json_response(False, "Authentication required.", status=401)
+
+    data = request.get_json() or {}
+    title = (data.get("title") or "").strip()
+    if not title:
+        return json_response(False, "Quiz title is required.", status=400)
+
+    try:
+        normalized_questions = normalize_quiz_questions(data.get("questions"))
+    except ValueError as exc:
+        return json_response(False, str(exc), status=400)
+
+    description = (data.get("description") or "").strip() or None
+    language = (data.get("language") or "").strip() or None
+    is_active = 1 if data.get("is_active", True) else 0
+
+    conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     try:
         cursor.execute(
@@ -3706,10 +5163,16 @@ def quizzes_collection():
         for index, question in enumerate(normalized_questions, start=1):
             cursor.execute(
                 """
-                INSERT INTO quiz_questions (quiz_id, prompt, explanation, order_index)
-                VALUES (%s, %s, %s, %s)
+                INSERT INTO quiz_questions (quiz_id, prompt, explanation, is_vocabulary, order_index)
+                VALUES (%s, %s, %s, %s, %s)
                 """,
-                (quiz_id, question["prompt"], question.get("explanation"), index),
+                (
+                    quiz_id,
+                    question["prompt"],
+                    question.get("explanation"),
+                    int(bool(question.get("vocabulary"))),
+                    index,
+                ),
             )
             question_id = cursor.lastrowid
             for option in question["options"]:
@@ -3722,6 +5185,7 @@ def quizzes_collection():
                 )
 
         conn.commit()
+        on_learning_content_changed()
         quiz = fetch_quiz_detail(cursor, quiz_id, include_correct=True)
         return json_response(True, "Quiz created.", {"quiz": quiz}, status=201)
     except mysql.connector.Error as exc:
@@ -3812,10 +5276,10 @@ def quiz_resource(quiz_id):
             for index, question in enumerate(normalized_questions, start=1):
                 cursor.execute(
                     """
-                    INSERT INTO quiz_questions (quiz_id, prompt, explanation, order_index)
-                    VALUES (%s, %s, %s, %s)
+                    INSERT INTO quiz_questions (quiz_id, prompt, explanation, is_vocabulary, order_index)
+                    VALUES (%s, %s, %s, %s, %s)
                     """,
-                    (quiz_id, question["prompt"], question.get("explanation"), index),
+                    (quiz_id, question["prompt"], question.get("explanation"), int(question["vocabulary"]), index),
                 )
                 question_id = cursor.lastrowid
                 for option in question["options"]:
@@ -3828,6 +5292,7 @@ def quiz_resource(quiz_id):
                     )
 
         conn.commit()
+        on_learning_content_changed()
         updated_quiz = fetch_quiz_detail(cursor, quiz_id, include_correct=True)
         return json_response(True, "Quiz updated.", {"quiz": updated_quiz})
     except mysql.connector.Error as exc:
@@ -4209,171 +5674,3775 @@ def unified_history():
         conn.close()
 
 
-@app.route("/translate_explain", methods=["POST"])
-def translate_explain():
-    data = request.get_json() or {}
-    text = data.get("text", "")
-    source_language = data.get("source_language", "")
-    target_language = data.get("target_language", "")
-    if not text:
-        return jsonify({"error": "No text provided"}), 400
+def ai_error_response(exc):
+    if isinstance(exc, UpstreamBusyError):
+        response = jsonify({"error": str(exc)})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(exc.retry_after)
+        return response
+    if isinstance(exc, UpstreamTimeoutError):
+        return jsonify({"error": str(exc)}), 504
+    return jsonify({"error": str(exc)}), 500
 
-    try:
-        translation, explanation = perform_explain_translation(text, source_language, target_language)
-        return jsonify({"translation": translation, "explanation": explanation})
-    except Exception as exc:  # pragma: no cover - OpenAI dependency
-        return jsonify({"error": str(exc)}), 500
 
+TRANSLATION_USAGE_ROUTES = (
+    "translate_simple",
+    "translate_explain",
+    "translate_explain_stream",
+    "translate_batch",
+    "translate_speak",
+    "stt_simple",
+    "stt_explain",
+    "stt_speak",
+)
+STT_ROUTES = ("stt_simple", "stt_explain", "stt_speak", "pronunciation_score")
+AI_USAGE_ROUTES = {*TRANSLATION_USAGE_ROUTES, "tts", "stt_stream", "stt_stream_chunk", "pronunciation_score"}
 
-def perform_simple_translation(text: str, source_language: str, target_language: str) -> str:
-    """Translate text with language context for the simple translator routes."""
-    source = (source_language or "").strip() or "English"
-    target = (target_language or "").strip() or "Tagalog"
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are an accurate translation engine similar to Google Translate.\n"
-                    f"Translate user text from {source} to {target}.\n"
-                    "Return only the translated text with no additional commentary or formatting.\n"
-                    "Avoid using the * character unless it appears in the translation naturally."
-                ),
-            },
-            {
-                "role": "user",
-                "content": (
-                    f"Source language: {source}\n"
-                    f"Target language: {target}\n"
-                    f"Text: {text}"
-                ),
-            },
-        ],
-    )
-    return response.choices[0].message.content
 
+@app.before_request
+def start_ai_usage():
+    # Always set, so a pooled worker thread never carries a finished request's record.
+    tracked = request.method == "POST" and request.endpoint in AI_USAGE_ROUTES
+    AI_USAGE.set(AIUsage(request.endpoint) if tracked else None)
 
-def parse_translation_response(raw_text: str) -> tuple[str, str]:
-    translation = ""
-    explanation = ""
-    for line in (raw_text or "").splitlines():
-        stripped = line.strip()
-        lowered = stripped.lower()
-        if lowered.startswith("translation:"):
-            translation = stripped.split(":", 1)[1].strip()
-        elif lowered.startswith("explanation:"):
-            explanation = stripped.split(":", 1)[1].strip()
-        elif not translation and stripped:
-            translation = stripped
-    translation = translation or (raw_text or "").strip()
-    return translation, explanation
 
+@app.after_request
+def finish_ai_usage(response):
+    usage = AI_USAGE.get()
+    if usage is not None:
+        usage.status = response.status_code
+        # Streamed responses are still running here; log once the body has been sent.
+        response.call_on_close(lambda: USAGE_RECORDER.record(usage))
+    return response
 
-def perform_explain_translation(text: str, source_language: str, target_language: str) -> tuple[str, str]:
-    """Translate text with optional explanation while honoring selected languages."""
-    source_raw = (source_language or "").strip()
-    auto_detect = not source_raw or source_raw.lower() == "auto"
-    source = source_raw if source_raw else "Auto"
-    target = (target_language or "").strip() or "Tagalog"
-    system_instructions = (
-        "You are a helpful translation assistant similar to Google Translate but with brief tips.\n"
-        f"{'Detect the language of the user text before translating it.' if auto_detect else f'The user text is in {source}.'}\n"
-        f"Translate the text into {target}.\n"
-        "Respond using exactly two lines:\n"
-        "Translation: <translated text in the target language>\n"
-        "Explanation: <a short usage tip in English>\n"
-        "Do not add extra text, emojis, or markdown. Avoid the * character unless required by the translation."
-    )
-    user_prompt = (
-        f"Source language: {source}\n"
-        f"Target language: {target}\n"
-        f"Text: {text}"
-    )
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system_instructions},
-            {"role": "user", "content": user_prompt},
-        ],
-    )
-    raw = response.choices[0].message.content or ""
-    return parse_translation_response(raw)
 
+class QuotaExceededError(Exception):
+    def __init__(self, retry_after):
+        super().__init__("Too many AI requests. Please slow down and try again shortly.")
+        self.retry_after = retry_after
 
-@app.route("/translate_simple", methods=["POST"])
-def translate_simple():
-    data = request.get_json() or {}
-    text = data.get("text", "")
-    source_language = data.get("source_language", "")
-    target_language = data.get("target_language", "")
-    if not text:
-        return jsonify({"error": "No text provided"}), 400
 
-    try:
-        translation = perform_simple_translation(text, source_language, target_language)
-        return jsonify({"translation": translation})
-    except Exception as exc:  # pragma: no cover - OpenAI dependency
-        return jsonify({"error": str(exc)}), 500
+def refill_bucket(tokens, updated_at, now, capacity, refill_per_second):
+    return min(capacity, tokens + max(0.0, now - updated_at) * refill_per_second)
 
 
-@app.route("/tts", methods=["POST"])
-def tts():
-    data = request.get_json() or {}
-    text = data.get("text", "")
-    if not text:
-        return jsonify({"error": "No text provided"}), 400
-    try:
-        response = client.audio.speech.create(
-            model="gpt-4o-mini-tts",
-            voice="alloy",
-            input=text,
-        )
-        audio_bytes = b"".join(response.iter_bytes())
-        return app.response_class(audio_bytes, mimetype="audio/mpeg")
-    except Exception as exc:  # pragma: no cover - OpenAI dependency
-        return jsonify({"error": str(exc)}), 500
+class LocalQuotaStore:
+    """Token buckets in this process; the stand-in for a shared store in single-worker deployments."""
 
+    name = "memory"
+    blocking = False
 
-@app.route("/stt_explain", methods=["POST"])
-def stt_explain():
-    if "file" not in request.files:
-        return jsonify({"error": "No file uploaded"}), 400
-    audio_file = request.files["file"]
-    source_language = request.form.get("source_language", "")
-    target_language = request.form.get("target_language", "")
-    try:
-        transcription = client.audio.transcriptions.create(
-            model="gpt-4o-mini-transcribe",
-            file=(audio_file.filename, audio_file.stream, audio_file.content_type),
-        )
-        text = transcription.text
-        translation, explanation = perform_explain_translation(text, source_language, target_language)
-        return jsonify({"original": text, "translation": translation, "explanation": explanation})
-    except Exception as exc:  # pragma: no cover - OpenAI dependency
-        return jsonify({"error": str(exc)}), 500
+    def __init__(self, max_keys=50000):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._pruned_at = 0.0
+        self.max_keys = max_keys
 
+    def take(self, key, cost, capacity, refill_per_second):
+        """Consume ``cost`` tokens; returns seconds until enough tokens are available, or 0 when admitted."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = refill_bucket(tokens, updated_at, now, capacity, refill_per_second)
+            wait_seconds = (cost - tokens) / refill_per_second if tokens < cost else 0.0
+            if not wait_seconds:
+                tokens -= cost
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / refill_per_second)
+            if len(self._buckets) > self.max_keys and now - self._pruned_at >= 1.0:
+                self._prune(now)
+            return wait_seconds
 
-@app.route("/stt_simple", methods=["POST"])
-def stt_simple():
-    if "file" not in request.files:
-        return jsonify({"error": "No file uploaded"}), 400
-    audio_file = request.files["file"]
-    source_language = request.form.get("source_language", "")
-    target_language = request.form.get("target_language", "")
-    try:
-        transcription = client.audio.transcriptions.create(
-            model="gpt-4o-mini-transcribe",
-            file=(audio_file.filename, audio_file.stream, audio_file.content_type),
-        )
-        text = transcription.text
-        translation = perform_simple_translation(text, source_language, target_language)
-        return jsonify({"original": text, "translation": translation})
-    except Exception as exc:  # pragma: no cover - OpenAI dependency
-        return jsonify({"error": str(exc)}), 500
+    def _prune(self, now):
+        # Buckets that have refilled completely behave exactly like missing ones.
+        self._pruned_at = now
+        for key, (_, _, full_at) in list(self._buckets.items()):
+            if full_at <= now:
+                del self._buckets[key]
+
+
+class MySQLQuotaStore:
+    """Token buckets in the ai_quota_buckets table, shared by every worker and server."""
+
+    name = "mysql"
+    blocking = True
+
+    def take(self, key, cost, capacity, refill_per_second):
+        now = time.time()
+        try:
+            conn = get_db_connection()
+        except mysql.connector.Error:
+            return 0.0
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "INSERT IGNORE INTO ai_quota_buckets (bucket_key, tokens, updated_at) VALUES (%s, %s, %s)",
+                (key, capacity, now),
+            )
+            cursor.execute(
+                "SELECT tokens, updated_at FROM ai_quota_buckets WHERE bucket_key = %s FOR UPDATE", (key,)
+            )
+            tokens, updated_at = cursor.fetchone()
+            tokens = refill_bucket(float(tokens), float(updated_at), now, capacity, refill_per_second)
+            wait_seconds = (cost - tokens) / refill_per_second if tokens < cost else 0.0
+            cursor.execute(
+                "UPDATE ai_quota_buckets SET tokens = %s, updated_at = %s WHERE bucket_key = %s",
+                (tokens if wait_seconds else tokens - cost, now, key),
+            )
+            conn.commit()
+            return wait_seconds
+        except mysql.connector.Error as exc:
+            # Fail open: an unavailable quota table must not take the translator down with it.
+            conn.rollback()
+            print(f"[quota] Database error: {exc}")
+            return 0.0
+        finally:
+            cursor.close()
+            conn.close()
+
+
+QUOTA_STORES = {
+    LocalQuotaStore.name: LocalQuotaStore,
+    MySQLQuotaStore.name: MySQLQuotaStore,
+}
+
+
+def create_quota_store(name=AI_QUOTA_STORE):
+    factory = QUOTA_STORES.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown AI_QUOTA_STORE '{name}'. Expected one of: {', '.join(sorted(QUOTA_STORES))}")
+    return factory()
+
+
+def estimate_ai_cost(characters=0, audio_bytes=0, audio_seconds=0.0):
+    """Quota units for one request: 1 per call plus its share of characters and audio seconds."""
+    audio_seconds += audio_bytes / AI_QUOTA_AUDIO_BYTES_PER_SECOND
+    return 1.0 + characters / AI_QUOTA_CHARS_PER_UNIT + audio_seconds / AI_QUOTA_AUDIO_SECONDS_PER_UNIT
+
+
+class AIQuota:
+    """Per-user token buckets for the AI routes (per client IP when not logged in), weighted by cost."""
+
+    def __init__(self, store, user_limits, ip_limits):
+        self.store = store
+        # (capacity, refill per second) for each kind of identity.
+        self.limits = {
+            "user": (user_limits[0], user_limits[1] / 60.0),
+            "ip": (ip_limits[0], ip_limits[1] / 60.0),
+        }
+        self._lock = threading.Lock()
+        self.routes = {}
+
+    def take(self, kind, identity, route, cost):
+        """Charge ``cost`` to the caller's bucket or raise QuotaExceededError."""
+        capacity, refill_per_second = self.limits[kind]
+        # A request bigger than the whole bucket still gets through once the bucket is full.
+        wait_seconds = self.store.take(f"{kind}:{identity}", min(cost, capacity), capacity, refill_per_second)
+        with self._lock:
+            stats = self.routes.setdefault(route, {"admitted": 0, "rejected": 0, "units": 0.0})
+            if wait_seconds:
+                stats["rejected"] += 1
+            else:
+                stats["admitted"] += 1
+                stats["units"] += cost
+        if wait_seconds:
+            raise QuotaExceededError(max(1, math.ceil(wait_seconds)))
+
+    def stats(self):
+        with self._lock:
+            routes = {
+                route: {**stats, "units": round(stats["units"], 1)} for route, stats in self.routes.items()
+            }
+        return {
+            "enabled": AI_QUOTA_ENABLED,
+            "store": self.store.name,
+            "user_capacity": self.limits["user"][0],
+            "user_refill_per_minute": round(self.limits["user"][1] * 60, 2),
+            "ip_capacity": self.limits["ip"][0],
+            "ip_refill_per_minute": round(self.limits["ip"][1] * 60, 2),
+            "routes": routes,
+        }
+
+
+AI_QUOTA = AIQuota(
+    create_quota_store(),
+    (AI_QUOTA_USER_CAPACITY, AI_QUOTA_USER_REFILL_PER_MINUTE),
+    (AI_QUOTA_IP_CAPACITY, AI_QUOTA_IP_REFILL_PER_MINUTE),
+)
+
+
+def quota_error_response(exc):
+    response = jsonify({"error": str(exc)})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response
+
+
+def current_request_cost():
+    """Quota cost of the current AI request from its text length or upload size, before any work is done."""
+    if request.endpoint == "pronunciation_score" and request.mimetype != "multipart/form-data":
+        # Scoring transcripts the client already has makes no AI call, but aligning them is paid per word.
+        return estimate_ai_cost() + pronunciation_request_words() / PRONUNCIATION_WORDS_PER_UNIT
+    if request.endpoint in STT_ROUTES:
+        return estimate_ai_cost(audio_bytes=request.content_length or 0)
+    if request.endpoint == "stt_stream_chunk":
+        # Chunks only store audio; the session pays for each upstream transcription as it is sent.
+        return 0.0
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return estimate_ai_cost()
+    if request.endpoint == "translate_batch":
+        texts = data.get("texts") if isinstance(data.get("texts"), list) else []
+        return estimate_ai_cost(characters=sum(len(text) for text in texts if isinstance(text, str)))
+    text = data.get("text") if isinstance(data.get("text"), str) else ""
+    # translate_speak also synthesizes its translation, which is about as long again.
+    return estimate_ai_cost(characters=len(text) * (2 if request.endpoint == "translate_speak" else 1))
+
+
+class SpooledUploadRequest(Request):
+    """Keeps uploaded files in memory up to UPLOAD_SPOOL_BYTES and spills larger ones to a temp file."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES, mode="w+b")
+
+
+app.request_class = SpooledUploadRequest
+
+UPLOAD_ROUTE_LIMITS = {
+    **{route: AUDIO_UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD_BYTES for route in STT_ROUTES},
+    "stt_stream_chunk": AUDIO_UPLOAD_MAX_BYTES,
+    "upload_profile_avatar": MAX_PROFILE_IMAGE_BYTES + UPLOAD_FORM_OVERHEAD_BYTES,
+}
+
+
+def request_too_large_response(limit):
+    message = f"Upload exceeds the {limit // (1024 * 1024)} MB limit."
+    if request.path.startswith("/api/"):
+        return json_response(False, message, status=413)
+    return jsonify({"error": message}), 413
+
+
+@app.before_request
+def apply_upload_limit():
+    """Per-route body limits: reject from Content-Length before reading, and cap chunked bodies while parsing."""
+    limit = UPLOAD_ROUTE_LIMITS.get(request.endpoint)
+    if limit is None:
+        return None
+    request.max_content_length = limit
+    if request.content_length is not None and request.content_length > limit:
+        return request_too_large_response(limit)
+    return None
+
+
+@app.errorhandler(413)
+def handle_request_too_large(error):
+    return request_too_large_response(request.max_content_length or 0)
+
+
+def quota_identity():
+    """(kind, identity) of the bucket the current caller is charged to."""
+    user_id = session.get("user_id")
+    return ("user", user_id) if user_id else ("ip", request.remote_addr or "unknown")
+
+
+@app.before_request
+def enforce_ai_quota():
+    if not AI_QUOTA_ENABLED or AI_USAGE.get() is None:
+        return None
+    kind, identity = quota_identity()
+    try:
+        AI_QUOTA.take(kind, identity, request.endpoint, current_request_cost())
+    except QuotaExceededError as exc:
+        return quota_error_response(exc)
+    return None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls sharing a key so only one of them runs."""
+
+    def __init__(self, lock_factory=None):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._lock_factory = lock_factory
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {"event": threading.Event(), "result": None, "error": None}
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call["event"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            if self._lock_factory is not None:
+                with self._lock_factory(key):
+                    call["result"] = fn()
+            else:
+                call["result"] = fn()
+            return call["result"]
+        except Exception as exc:
+            call["error"] = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call["event"].set()
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._calls)
+        return {
+            "in_flight": in_flight,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
+
+
+@contextmanager
+def mysql_named_lock(name, timeout=TRANSLATION_SINGLEFLIGHT_LOCK_TIMEOUT):
+    """Serializes work across workers with MySQL GET_LOCK; degrades to a no-op when unavailable."""
+    try:
+        conn = get_db_connection()
+    except mysql.connector.Error:
+        yield False
+        return
+
+    cursor = conn.cursor()
+    acquired = False
+    try:
+        try:
+            cursor.execute("SELECT GET_LOCK(%s, %s)", (name, timeout))
+            row = cursor.fetchone()
+            acquired = bool(row and row[0] == 1)
+        except mysql.connector.Error:
+            acquired = False
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (name,))
+                cursor.fetchone()
+            except mysql.connector.Error:
+                pass
+        cursor.close()
+        conn.close()
+
+
+def build_translation_key(mode, text, source, target):
+    # Canonical names so "Bicolano" and "Bikol" requests share cache entries.
+    digest = hashlib.sha256(
+        "\x1f".join([mode, canonical_language(source), canonical_language(target), text]).encode("utf-8")
+    )
+    return f"tr:{digest.hexdigest()[:40]}"
+
+
+TRANSLATION_FLIGHTS = SingleFlight(lock_factory=mysql_named_lock if TRANSLATION_SINGLEFLIGHT_DB_LOCK else None)
+
+
+def fetch_cached_translation(cache_key, max_age_seconds):
+    # Ages are compared in SQL: updated_at is stamped by the database clock, in the session time zone.
+    try:
+        conn = get_db_connection()
+    except mysql.connector.Error:
+        return None
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT mode, translation, explanation
+            FROM translation_cache
+            WHERE cache_key = %s AND updated_at >= NOW() - INTERVAL %s SECOND
+            """,
+            (cache_key, max_age_seconds),
+        )
+        return cursor.fetchone()
+    except mysql.connector.Error:
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def store_cached_translation(cache_key, mode, text, source, target, translation, explanation, source_detected=False):
+    try:
+        conn = get_db_connection()
+    except mysql.connector.Error:
+        return
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            """
+            INSERT INTO translation_cache (
+                cache_key, mode, source_language, source_detected, target_language, source_text, translation,
+                explanation
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                translation = VALUES(translation),
+                explanation = VALUES(explanation),
+                updated_at = CURRENT_TIMESTAMP
+            """,
+            (cache_key, mode, source[:50], int(source_detected), target[:50], text, translation, explanation),
+        )
+        conn.commit()
+    except mysql.connector.Error:
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def fetch_recent_translations(limit, max_age_seconds):
+    """Newest cached translations, or None when the table can't be read."""
+    try:
+        conn = get_db_connection()
+    except mysql.connector.Error:
+        return None
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT mode, source_language, source_detected, target_language, source_text, translation, explanation
+            FROM translation_cache
+            WHERE updated_at >= NOW() - INTERVAL %s SECOND
+            ORDER BY updated_at DESC
+            LIMIT %s
+            """,
+            (max_age_seconds, limit),
+        )
+        return cursor.fetchall()
+    except mysql.connector.Error:
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def normalize_memory_text(text):
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return " ".join(re.sub(r"[^\w]+", " ", text).split())
+
+
+def memory_ngrams(normalized, size=3):
+    padded = f" {normalized} "
+    return {padded[index:index + size] for index in range(max(1, len(padded) - size + 1))}
+
+
+class TranslationMemory:
+    """Fuzzy lookup over past translations using a character trigram index.
+
+    Only a text whose normalized form equals a stored one is served as-is: a changed number or an added
+    "not" barely moves the similarity of a long sentence, so near matches are only passed to the model
+    as a reference.
+    """
+
+    def __init__(self, max_entries, reference_threshold, persist=True):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._postings = {}
+        self._next_id = 0
+        self._loaded = not persist
+        self.max_entries = max_entries
+        self.reference_threshold = reference_threshold
+        self.lookups = 0
+        self.served = 0
+        self.referenced = 0
+
+    def add(self, mode, text, source, target, value):
+        normalized = normalize_memory_text(text)
+        if not normalized:
+            return
+        lane = (mode, source.lower(), target.lower())
+        grams = memory_ngrams(normalized)
+        with self._lock:
+            self._next_id += 1
+            entry_id = self._next_id
+            self._entries[entry_id] = (lane, normalized, grams, text, value)
+            postings = self._postings.setdefault(lane, {})
+            for gram in grams:
+                postings.setdefault(gram, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                old_id, (old_lane, _, old_grams, _, _) = self._entries.popitem(last=False)
+                old_postings = self._postings.get(old_lane, {})
+                for gram in old_grams:
+                    ids = old_postings.get(gram)
+                    if ids is not None:
+                        ids.discard(old_id)
+                        if not ids:
+                            del old_postings[gram]
+
+    def lookup(self, mode, text, source, target):
+        """Return (score, source_text, value) for the closest stored translation, or None."""
+        self._load_recent()
+        normalized = normalize_memory_text(text)
+        if not normalized:
+            return None
+        lane = (mode, source.lower(), target.lower())
+        grams = memory_ngrams(normalized)
+        # Prefix filter: any entry reaching the Dice cut-off must share one of the rarest grams,
+        # so only those posting lists are scanned and the common ones are skipped.
+        cutoff = self.reference_threshold * 0.8
+        with self._lock:
+            self.lookups += 1
+            postings = self._postings.get(lane)
+            if not postings:
+                return None
+            ordered = sorted(grams, key=lambda gram: len(postings.get(gram, ())))
+            prefix = len(ordered) - math.ceil(cutoff * len(ordered) / (2 - cutoff)) + 1
+            seen = set()
+            for gram in ordered[:max(1, prefix)]:
+                seen.update(postings.get(gram, ()))
+            # Entries are immutable tuples, so they can be scored after the lock is released.
+            entries = [self._entries[entry_id] for entry_id in seen]
+        candidates = []
+        for entry in entries:
+            shared = len(grams & entry[2])
+            if 2 * shared / (len(grams) + len(entry[2])) >= cutoff:
+                candidates.append((shared, entry))
+        candidates.sort(key=lambda item: item[0], reverse=True)
+        best = None
+        for _, (_, stored, _, stored_text, value) in candidates[:8]:
+            score = 1.0 if stored == normalized else SequenceMatcher(None, normalized, stored).ratio()
+            if best is None or score > best[0]:
+                best = (score, stored_text, value)
+        if best is None or best[0] < self.reference_threshold:
+            return None
+        with self._lock:
+            if self.exact(best):
+                self.served += 1
+            else:
+                self.referenced += 1
+        return best
+
+    @staticmethod
+    def exact(match):
+        """Whether a lookup result is the same text up to case, punctuation and spacing."""
+        return match is not None and match[0] == 1.0
+
+    def _load_recent(self):
+        # The first lookup starts the load on a background thread; lookups meanwhile see only what
+        # has been added so far instead of waiting for up to ``max_entries`` rows.
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+        threading.Thread(target=self._load_in_background, name="memory-load", daemon=True).start()
+
+    def _load_in_background(self):
+        try:
+            rows = fetch_recent_translations(self.max_entries, TRANSLATION_CACHE_TTL_SECONDS)
+            for row in reversed(rows or []):
+                if row.get("mode") == "explain":
+                    value = (row.get("translation") or "", row.get("explanation") or "")
+                else:
+                    value = row.get("translation") or ""
+                self.add(row["mode"], row["source_text"], row["source_language"], row["target_language"], value)
+        except Exception as exc:  # pragma: no cover - defensive
+            print(f"[translation-memory] Load failed: {exc}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "lookups": self.lookups,
+                "served": self.served,
+                "referenced": self.referenced,
+                "match_rate": round((self.served + self.referenced) / self.lookups, 4) if self.lookups else 0.0,
+                "reference_threshold": self.reference_threshold,
+            }
+
+
+TRANSLATION_MEMORY = TranslationMemory(
+    TRANSLATION_MEMORY_MAX_ENTRIES,
+    TRANSLATION_MEMORY_REFERENCE_THRESHOLD,
+    persist=TRANSLATION_CACHE_DB,
+)
+
+
+class TranslationCache:
+    """LRU of finished translations in front of the shared translation_cache table."""
+
+    def __init__(self, max_entries, ttl_seconds, persist=True, memory=None):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory = memory
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist = persist
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def get(self, cache_key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[cache_key]
+
+        if self.persist:
+            row = fetch_cached_translation(cache_key, self.ttl_seconds)
+            if row:
+                if row.get("mode") == "explain":
+                    value = (row.get("translation") or "", row.get("explanation") or "")
+                else:
+                    value = row.get("translation") or ""
+                self._remember(cache_key, value)
+                with self._lock:
+                    self.db_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, cache_key, value, mode, text, source, target, source_detected=False):
+        self._remember(cache_key, value)
+        if self.memory is not None:
+            self.memory.add(mode, text, source, target, value)
+        if self.persist:
+            if isinstance(value, tuple):
+                translation, explanation = value
+            else:
+                translation, explanation = value, None
+            store_cached_translation(cache_key, mode, text, source, target, translation, explanation, source_detected)
+
+    def _remember(self, cache_key, value):
+        with self._lock:
+            self._entries[cache_key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+            }
+
+
+TRANSLATION_CACHE = TranslationCache(
+    TRANSLATION_CACHE_MAX_ENTRIES,
+    TRANSLATION_CACHE_TTL_SECONDS,
+    persist=TRANSLATION_CACHE_DB,
+    memory=TRANSLATION_MEMORY,
+)
+
+
+def build_transcription_key(audio_digest, language, chunked=False):
+    """Key transcripts by the recording's SHA-256 plus everything that can change the text for them.
+
+    Windowed transcripts are stitched from overlapping clips and can differ from a single pass over the
+    same recording, so ``chunked`` is part of the key.
+    """
+    mode = "chunked" if chunked else "whole"
+    parts = [AI_BACKEND, AI_TRANSCRIBE_MODEL, canonical_language(language), mode, audio_digest]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class TranscriptionCache:
+    """LRU of transcripts in front of the shared transcription_cache table.
+
+    Recordings never change, so entries have no TTL; rows not re-stored for ``retention_days`` are pruned
+    at most hourly, from a background thread started by ``set``.
+    """
+
+    def __init__(self, max_entries, persist=True, retention_days=90):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.persist = persist
+        self.retention_days = retention_days
+        self._pruned_at = None
+        self.pruned = 0
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def get(self, cache_key):
+        with self._lock:
+            transcript = self._entries.get(cache_key)
+            if transcript is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return transcript
+
+        if self.persist:
+            transcript = self._fetch(cache_key)
+            if transcript is not None:
+                self._remember(cache_key, transcript)
+                with self._lock:
+                    self.db_hits += 1
+                return transcript
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, cache_key, transcript, language, audio_bytes):
+        self._remember(cache_key, transcript)
+        if self.persist:
+            self._store(cache_key, transcript, language, audio_bytes)
+            with self._lock:
+                due = self._pruned_at is None or time.monotonic() - self._pruned_at >= 3600
+                if due:
+                    self._pruned_at = time.monotonic()
+            if due:
+                threading.Thread(target=self.prune, name="transcription-prune", daemon=True).start()
+
+    def _remember(self, cache_key, transcript):
+        with self._lock:
+            self._entries[cache_key] = transcript
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _fetch(self, cache_key):
+        try:
+            conn = get_db_connection()
+        except mysql.connector.Error:
+            return None
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT transcript FROM transcription_cache WHERE cache_key = %s", (cache_key,))
+            row = cursor.fetchone()
+            return row["transcript"] if row else None
+        except mysql.connector.Error:
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _store(self, cache_key, transcript, language, audio_bytes):
+        try:
+            conn = get_db_connection()
+        except mysql.connector.Error:
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                """
+                INSERT INTO transcription_cache (cache_key, model, language, audio_bytes, transcript)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE transcript = VALUES(transcript), updated_at = CURRENT_TIMESTAMP
+                """,
+                (cache_key, AI_TRANSCRIBE_MODEL[:100], (language or "")[:50], audio_bytes, transcript),
+            )
+            conn.commit()
+        except mysql.connector.Error:
+            conn.rollback()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def prune(self):
+        try:
+            conn = get_db_connection()
+        except mysql.connector.Error:
+            return
+        cursor = conn.cursor()
+        try:
+            # Compared in SQL so the cutoff uses the same clock that stamped updated_at.
+            cursor.execute(
+                "DELETE FROM transcription_cache WHERE updated_at < NOW() - INTERVAL %s DAY",
+                (self.retention_days,),
+            )
+            conn.commit()
+            with self._lock:
+                self.pruned += cursor.rowcount
+        except mysql.connector.Error:
+            conn.rollback()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "pruned": self.pruned,
+            }
+
+
+TRANSCRIPTION_CACHE = TranscriptionCache(
+    TRANSCRIPTION_CACHE_MAX_ENTRIES,
+    persist=TRANSCRIPTION_CACHE_DB,
+    retention_days=TRANSCRIPTION_CACHE_RETENTION_DAYS,
+)
+TRANSCRIPTION_FLIGHTS = SingleFlight()
+
+
+LANGUAGE_ALIASES = {
+    "bicol": "bikol",
+    "bicolano": "bikol",
+    "bikolano": "bikol",
+    "bisaya": "cebuano",
+    "binisaya": "cebuano",
+    "visayan": "cebuano",
+    "ilonggo": "hiligaynon",
+    "filipino": "tagalog",
+    "winaray": "waray",
+    "waray-waray": "waray",
+}
+ENGLISH_MARKER_WORDS = {
+    "a", "an", "and", "are", "do", "does", "don't", "for", "he", "how", "i", "is", "it", "let's",
+    "of", "or", "please", "she", "thank", "the", "there", "they", "to", "was", "we", "what",
+    "where", "who", "you", "your",
+}
+
+
+def canonical_language(language):
+    key = (language or "").strip().lower()
+    return LANGUAGE_ALIASES.get(key, key)
+
+
+def extract_glossary_term(prompt):
+    """Quiz prompts often wrap the term in quotes ("Meaning of “Gani?”"); use the quoted part when present."""
+    quoted = re.search(r"[“\"]([^”\"]+)[”\"]", prompt or "")
+    return (quoted.group(1) if quoted else prompt or "").strip()
+
+
+def guess_answer_language(answers):
+    """Quizzes answer either in English or Tagalog; English answers contain common function words."""
+    for answer in answers:
+        words = set(re.findall(r"[a-z']+", (answer or "").lower().replace("’", "'")))
+        if words & ENGLISH_MARKER_WORDS:
+            return "English"
+    return "Tagalog"
+
+
+def fetch_glossary_rows():
+    try:
+        conn = get_db_connection()
+    except mysql.connector.Error:
+        return None
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT id, term, term_language, translation, translation_language, explanation
+            FROM dialect_glossary
+            ORDER BY id ASC
+            """
+        )
+        return cursor.fetchall()
+    except mysql.connector.Error:
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def fetch_quiz_glossary_sources():
+    """Questions with their correct answers from stored quizzes and module course quizzes; None when unavailable."""
+    try:
+        conn = get_db_connection()
+    except mysql.connector.Error:
+        return None
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT CONCAT('quiz:', q.id) AS source_id, q.language, qq.prompt, qq.explanation,
+                   qq.is_vocabulary AS vocabulary, qo.text AS answer
+            FROM quiz_questions qq
+            JOIN quizzes q ON q.id = qq.quiz_id
+            JOIN quiz_options qo ON qo.question_id = qq.id AND qo.is_correct = 1
+            WHERE q.is_active = 1
+            """
+        )
+        rows = cursor.fetchall() or []
+        cursor.execute(
+            """
+            SELECT CONCAT('course:', c.id) AS source_id, d.dialect AS language, qq.prompt, qq.explanation,
+                   qq.is_vocabulary AS vocabulary, qo.text AS answer
+            FROM module_course_quiz_questions qq
+            JOIN module_course_quizzes q ON q.id = qq.quiz_id
+            JOIN module_courses c ON c.id = q.course_id
+            JOIN module_definitions d ON d.id = c.module_id
+            JOIN module_course_quiz_options qo ON qo.question_id = qq.id AND qo.is_correct = 1
+            """
+        )
+        return rows + (cursor.fetchall() or [])
+    except mysql.connector.Error:
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def default_quiz_glossary_sources():
+    rows = []
+    for index, quiz in enumerate(DEFAULT_QUIZZES):
+        for question in quiz.get("questions", []):
+            for option in question.get("options", []):
+                if option.get("is_correct"):
+                    rows.append(
+                        {
+                            "source_id": f"default:{index}",
+                            "language": quiz.get("language"),
+                            "prompt": question.get("prompt"),
+                            "explanation": question.get("explanation"),
+                            "vocabulary": bool(question.get("vocabulary")),
+                            "answer": option.get("text"),
+                        }
+                    )
+    return rows
+
+
+class DialectGlossary:
+    """Hash index of dialect words and short phrases answered without calling the model.
+
+    Built from the admin ``dialect_glossary`` rows plus quiz questions marked as vocabulary (other quiz
+    answers are descriptions, not translations). The index is rebuilt on a background thread every
+    ``refresh_seconds``; lookups use the previous one meanwhile, and it is kept when the database can't
+    be read.
+    """
+
+    def __init__(self, max_term_words, refresh_seconds):
+        self._lock = threading.Lock()
+        self._index = {}
+        self._built_at = None
+        self.max_term_words = max_term_words
+        self.refresh_seconds = refresh_seconds
+        self.lookups = 0
+        self.hits = 0
+        self.hits_by_language = {}
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def _add(self, index, term, term_language, translation, translation_language, explanation):
+        normalized = normalize_memory_text(term)
+        if not normalized or not translation or len(normalized.split()) > self.max_term_words:
+            return
+        entry = (translation.strip(), explanation or f"'{term}' is {term_language} for '{translation.strip()}'.")
+        index[(canonical_language(term_language), canonical_language(translation_language), normalized)] = entry
+        index.setdefault((None, canonical_language(translation_language), normalized), entry)
+
+    def rebuild(self):
+        quiz_rows = fetch_quiz_glossary_sources()
+        glossary_rows = fetch_glossary_rows()
+        with self._lock:
+            if (quiz_rows is None or glossary_rows is None) and self._index:
+                return
+        index = {}
+        sources = {}
+        for row in default_quiz_glossary_sources() + (quiz_rows or []):
+            if row.get("language") and row.get("prompt"):
+                sources.setdefault(row["source_id"], []).append(row)
+        for rows in sources.values():
+            answer_language = guess_answer_language(row["answer"] for row in rows)
+            for row in rows:
+                if not row.get("vocabulary"):
+                    continue
+                term = extract_glossary_term(row["prompt"])
+                self._add(index, term, row["language"], row["answer"], answer_language, row.get("explanation"))
+                # Answers double as a reverse lookup (e.g. English "Thank you" -> Bikol "Dios mabalos").
+                index_key = (canonical_language(answer_language), canonical_language(row["language"]))
+                if index_key[0] != index_key[1]:
+                    self._add(index, row["answer"], answer_language, term, row["language"], row.get("explanation"))
+        for row in glossary_rows or []:
+            # Admin entries win over anything derived from quizzes.
+            index.pop((None, canonical_language(row["translation_language"]), normalize_memory_text(row["term"])), None)
+            self._add(
+                index,
+                row["term"],
+                row["term_language"],
+                row["translation"],
+                row["translation_language"],
+                row.get("explanation"),
+            )
+        with self._lock:
+            # ``lookup`` stamped ``_built_at`` when it claimed this rebuild; an ``invalidate`` meanwhile stays in effect.
+            self._index = index
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception as exc:  # pragma: no cover - defensive
+            print(f"[glossary] Rebuild failed: {exc}")
+
+    def lookup(self, text, source_language, target_language):
+        """Return (translation, explanation) for a known word or phrase, or None.
+
+        ``source_language`` of None matches a term in any language (auto-detect).
+        """
+        normalized = normalize_memory_text(text)
+        if not normalized or len(normalized.split()) > self.max_term_words:
+            return None
+        with self._lock:
+            stale = self._built_at is None or time.monotonic() - self._built_at > self.refresh_seconds
+            if stale:
+                # Claim the rebuild so concurrent lookups keep using the current index meanwhile.
+                self._built_at = time.monotonic()
+        if stale:
+            threading.Thread(target=self._rebuild_in_background, name="glossary-rebuild", daemon=True).start()
+        source = canonical_language(source_language) if source_language else None
+        target = canonical_language(target_language)
+        with self._lock:
+            self.lookups += 1
+            entry = self._index.get((source, target, normalized))
+            if entry is not None:
+                self.hits += 1
+                self.hits_by_language[target] = self.hits_by_language.get(target, 0) + 1
+            return entry
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "hits_by_target_language": dict(self.hits_by_language),
+            }
+
+
+DIALECT_GLOSSARY = DialectGlossary(GLOSSARY_MAX_TERM_WORDS, GLOSSARY_REFRESH_SECONDS)
+
+
+LANGID_WORD_PATTERN = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)*")
+
+
+def language_features(text):
+    """Character 1-3 grams of each padded word plus the words themselves."""
+    features = {}
+    for word in LANGID_WORD_PATTERN.findall(text.lower()):
+        padded = f" {word} "
+        for size in (1, 2, 3):
+            for start in range(len(padded) - size + 1):
+                gram = padded[start:start + size]
+                if gram != " ":
+                    features[gram] = features.get(gram, 0) + 1
+        features["w:" + word] = features.get("w:" + word, 0) + 1
+    return features
+
+
+def collect_language_samples():
+    """(text, language) pairs from quiz content, admin glossary entries and cached translations.
+
+    Returns (samples, complete); ``complete`` is False when a database source could not be read.
+    """
+    samples = []
+    sources = {}
+    quiz_rows = fetch_quiz_glossary_sources()
+    glossary_rows = fetch_glossary_rows()
+    if TRANSLATION_CACHE_DB:
+        translation_rows = fetch_recent_translations(LANGID_TRAINING_ROWS, TRANSLATION_CACHE_TTL_SECONDS)
+    else:
+        translation_rows = []
+    complete = None not in (quiz_rows, glossary_rows, translation_rows)
+    for row in default_quiz_glossary_sources() + (quiz_rows or []):
+        if row.get("language") and row.get("prompt"):
+            sources.setdefault(row["source_id"], []).append(row)
+    for rows in sources.values():
+        answer_language = guess_answer_language(row["answer"] for row in rows)
+        for row in rows:
+            samples.append((extract_glossary_term(row["prompt"]), row["language"]))
+            samples.append((row["answer"], answer_language))
+            if row.get("explanation"):
+                samples.append((row["explanation"], "English"))
+    for row in glossary_rows or []:
+        samples.append((row["term"], row["term_language"]))
+        samples.append((row["translation"], row["translation_language"]))
+    for row in translation_rows or []:
+        # Model output is reliably in the requested target; the input only when the user named its
+        # language, never when this identifier guessed it, or its mistakes would train the next model.
+        samples.append((row["translation"], row["target_language"]))
+        if canonical_language(row["source_language"]) != "auto" and not row.get("source_detected"):
+            samples.append((row["source_text"], row["source_language"]))
+    return [(text, language) for text, language in samples if text and language], complete
+
+
+class LanguageIdentifier:
+    """Naive Bayes over character n-grams, trained on the app's own dialect content.
+
+    ``identify`` answers only when the text is long enough and one language clearly wins; otherwise the
+    caller keeps asking the model to detect the language. The model is rebuilt on a background thread
+    every ``refresh_seconds``; requests keep using the previous one meanwhile, and when the database
+    can't be read it is kept until the next refresh.
+    """
+
+    def __init__(self, min_chars, min_confidence, refresh_seconds):
+        self._lock = threading.Lock()
+        self._model = None
+        self._built_at = None
+        self.min_chars = min_chars
+        self.min_confidence = min_confidence
+        self.refresh_seconds = refresh_seconds
+        self.requests = 0
+        self.identified = 0
+        self.identified_by_language = {}
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def rebuild(self):
+        samples, complete = collect_language_samples()
+        with self._lock:
+            if not complete and self._model is not None:
+                return
+        counts = {}
+        labels = {}
+        for text, language in samples:
+            key = canonical_language(language)
+            labels.setdefault(key, language.strip())
+            profile = counts.setdefault(key, {})
+            for feature, count in language_features(text).items():
+                profile[feature] = profile.get(feature, 0) + count
+        vocabulary = set()
+        for profile in counts.values():
+            vocabulary.update(profile)
+        model = {}
+        for key, profile in counts.items():
+            denominator = sum(profile.values()) + 0.5 * len(vocabulary)
+            model[key] = (
+                {feature: math.log((count + 0.5) / denominator) for feature, count in profile.items()},
+                math.log(0.5 / denominator),
+            )
+        with self._lock:
+            # ``identify`` already stamped ``_built_at`` when it claimed this rebuild; leaving it alone keeps
+            # an ``invalidate`` that arrived meanwhile in effect.
+            self._model = (model, labels)
+
+    def identify(self, text):
+        """Return (language, confidence) for a confident match, else None."""
+        with self._lock:
+            stale = self._built_at is None or time.monotonic() - self._built_at > self.refresh_seconds
+            if stale:
+                # Claim the rebuild so concurrent callers keep using the current model meanwhile.
+                self._built_at = time.monotonic()
+        if stale:
+            threading.Thread(target=self._rebuild_in_background, name="langid-rebuild", daemon=True).start()
+        with self._lock:
+            self.requests += 1
+            model, labels = self._model or ({}, {})
+        sample = (text or "")[:400]
+        if len(model) < 2 or sum(1 for char in sample if char.isalpha()) < self.min_chars:
+            return None
+        features = language_features(sample)
+        total = sum(features.values())
+        scores = {}
+        for key, (log_probs, unseen) in model.items():
+            scores[key] = sum(log_probs.get(feature, unseen) * count for feature, count in features.items())
+        # Temper the log-likelihoods by sqrt(feature count) so long texts do not become overconfident.
+        best = max(scores.values())
+        weights = {key: math.exp((score - best) / math.sqrt(total)) for key, score in scores.items()}
+        key = max(weights, key=weights.get)
+        confidence = weights[key] / sum(weights.values())
+        if confidence < self.min_confidence:
+            return None
+        with self._lock:
+            self.identified += 1
+            self.identified_by_language[labels[key]] = self.identified_by_language.get(labels[key], 0) + 1
+        return labels[key], round(confidence, 3)
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception as exc:  # pragma: no cover - defensive
+            print(f"[langid] Rebuild failed: {exc}")
+
+    def stats(self):
+        with self._lock:
+            model, labels = self._model or ({}, {})
+            return {
+                "languages": sorted(labels.values()),
+                "requests": self.requests,
+                "identified": self.identified,
+                "identified_rate": round(self.identified / self.requests, 4) if self.requests else 0.0,
+                "identified_by_language": dict(self.identified_by_language),
+            }
+
+
+LANGUAGE_IDENTIFIER = LanguageIdentifier(LANGID_MIN_CHARS, LANGID_MIN_CONFIDENCE, GLOSSARY_REFRESH_SECONDS)
+
+
+def run_cached_translation(mode, text, source, target, fetch, source_detected=False):
+    """Serve a translation from cache or a near-identical past one, coalescing concurrent misses.
+
+    ``fetch`` receives the closest translation-memory match (or None) to use as a reference.
+    ``source_detected`` is stored with the result when ``source`` was guessed by the language identifier.
+    """
+    cache_key = build_translation_key(mode, text, source, target)
+    cached = TRANSLATION_CACHE.get(cache_key)
+    if cached is not None:
+        note_ai_usage(cache_hits=1)
+        return cached
+    match = TRANSLATION_MEMORY.lookup(mode, text, source, target)
+    if TRANSLATION_MEMORY.exact(match):
+        note_ai_usage(cache_hits=1)
+        return match[2]
+    reference = match[1:] if match else None
+    fetched = []
+
+    def load():
+        if TRANSLATION_SINGLEFLIGHT_DB_LOCK:
+            # Another worker may have finished this translation while we waited on the lock.
+            cached_after_lock = TRANSLATION_CACHE.get(cache_key)
+            if cached_after_lock is not None:
+                return cached_after_lock
+        fetched.append(True)
+        value = fetch(reference)
+        TRANSLATION_CACHE.set(cache_key, value, mode, text, source, target, source_detected)
+        return value
+
+    value = TRANSLATION_FLIGHTS.do(cache_key, load)
+    if fetched:
+        note_ai_usage(cache_misses=1)
+    else:
+        note_ai_usage(cache_hits=1)
+    return value
+
+
+def normalize_simple_languages(source_language, target_language):
+    source = (source_language or "").strip() or "English"
+    target = (target_language or "").strip() or "Tagalog"
+    return source, target
+
+
+def normalize_explain_languages(source_language, target_language):
+    source_raw = (source_language or "").strip()
+    auto_detect = not source_raw or source_raw.lower() == "auto"
+    source = source_raw if source_raw else "Auto"
+    target = (target_language or "").strip() or "Tagalog"
+    return source, target, auto_detect
+
+
+def identify_source_language(text, source, target, auto_detect):
+    """Resolve an auto-detect source locally; returns (source, auto_detect, untranslated, source_detected).
+
+    A confident guess becomes the source of the cache key. The prompt names it too, unless it is the
+    target language: sibling Philippine languages share most of their n-grams (Cebuano is read as
+    Tagalog), and the model then has to detect the language itself instead of echoing the text.
+    ``untranslated`` allows returning the text as is, only when the user named the target as the source
+    or the text was identified as English with English as the target. ``source_detected`` marks a source
+    guessed here, which is stored with the cached translation so it never becomes training data.
+    """
+    if not auto_detect:
+        return source, False, canonical_language(source) == canonical_language(target), False
+    detected = LANGUAGE_IDENTIFIER.identify(text)
+    if detected is None:
+        return "auto", True, False, False
+    language = detected[0]
+    if canonical_language(language) != canonical_language(target):
+        return language, False, False, True
+    return language, True, canonical_language(language) == "english", True
+
+
+def untranslated_result(text, target):
+    """(translation, explanation) for text that is already in the target language."""
+    return text, f"The text is already in {target}."
+
+
+@app.route("/translate_explain", methods=["POST"])
+def translate_explain():
+    data = request.get_json() or {}
+    text = data.get("text", "")
+    source_language = data.get("source_language", "")
+    target_language = data.get("target_language", "")
+    if not text:
+        return jsonify({"error": "No text provided"}), 400
+
+    try:
+        translation, explanation = perform_explain_translation(text, source_language, target_language)
+        return jsonify({"translation": translation, "explanation": explanation})
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return ai_error_response(exc)
+
+
+def perform_simple_translation(text: str, source_language: str, target_language: str) -> str:
+    """Translate text with language context for the simple translator routes."""
+    source, target = normalize_simple_languages(source_language, target_language)
+    source, auto_detect, untranslated, source_detected = identify_source_language(
+        text, source, target, source.lower() == "auto"
+    )
+    note_ai_languages(source, target)
+    note_ai_usage(characters=len(text))
+    glossary_entry = DIALECT_GLOSSARY.lookup(text, None if auto_detect else source, target)
+    if glossary_entry is None and untranslated:
+        glossary_entry = untranslated_result(text, target)
+    if glossary_entry is not None:
+        note_ai_usage(cache_hits=1)
+        return glossary_entry[0]
+    if len(text) > TRANSLATION_SEGMENT_MIN_CHARS:
+        segments = split_translation_segments(text)
+        if len(segments) > 1:
+            return translate_segments(segments, source, target, auto_detect, source_detected)
+    return translate_simple_segment(text, source, target, auto_detect, source_detected)
+
+
+def translate_simple_segment(
+    text: str, source: str, target: str, auto_detect: bool = False, source_detected: bool = False
+) -> str:
+    prompt_source = "auto" if auto_detect else source
+    return run_cached_translation(
+        "simple",
+        text,
+        source,
+        target,
+        lambda reference: request_simple_translation(text, prompt_source, target, reference),
+        source_detected,
+    )
+
+
+def split_translation_segments(text):
+    """Split a passage into (sentence, separator) pairs; joining them gives back the original text."""
+    parts = TRANSLATION_SEGMENT_PATTERN.split(text)
+    segments = []
+    for index in range(0, len(parts), 2):
+        sentence = parts[index]
+        separator = parts[index + 1] if index + 1 < len(parts) else ""
+        if sentence:
+            segments.append((sentence, separator))
+        elif segments:
+            segments[-1] = (segments[-1][0], segments[-1][1] + separator)
+        elif separator:
+            segments.append(("", separator))
+    return segments
+
+
+def translate_segments(segments, source, target, auto_detect=False, source_detected=False):
+    """Translate sentences in parallel (each cached on its own) and rejoin them in order."""
+    route = current_ai_route()
+    usage = current_ai_usage()
+    unique = [sentence for sentence in dict.fromkeys(sentence for sentence, _ in segments) if sentence.strip()]
+
+    def translate_one(sentence):
+        with labelled_ai_route(route, usage):
+            return translate_simple_segment(sentence, source, target, auto_detect, source_detected)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(unique), TRANSLATION_SEGMENT_CONCURRENCY))) as pool:
+        translated = dict(zip(unique, pool.map(translate_one, unique)))
+    return "".join(translated.get(sentence, sentence) + separator for sentence, separator in segments)
+
+
+def build_reference_note(reference) -> str:
+    """Prompt lines offering a similar past translation for consistent wording."""
+    if not reference:
+        return ""
+    reference_text, reference_value = reference
+    reference_translation = reference_value[0] if isinstance(reference_value, tuple) else reference_value
+    return (
+        "\nA similar text was translated before; reuse its wording where it still applies:\n"
+        f"Previous text: {reference_text}\n"
+        f"Previous translation: {reference_translation}"
+    )
+
+
+def build_simple_messages(text: str, source: str, target: str, reference=None) -> list:
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are an accurate translation engine similar to Google Translate.\n"
+                f"Translate user text from {source} to {target}.\n"
+                "Return only the translated text with no additional commentary or formatting.\n"
+                "Avoid using the * character unless it appears in the translation naturally."
+                + build_reference_note(reference)
+            ),
+        },
+        {
+            "role": "user",
+            "content": (
+                f"Source language: {source}\n"
+                f"Target language: {target}\n"
+                f"Text: {text}"
+            ),
+        },
+    ]
+
+
+def request_simple_translation(text: str, source: str, target: str, reference=None) -> str:
+    response = ai_backend.chat(messages=build_simple_messages(text, source, target, reference))
+    return response.choices[0].message.content
+
+
+def parse_translation_response(raw_text: str) -> tuple[str, str]:
+    translation = ""
+    explanation = ""
+    for line in (raw_text or "").splitlines():
+        stripped = line.strip()
+        lowered = stripped.lower()
+        if lowered.startswith("translation:"):
+            translation = stripped.split(":", 1)[1].strip()
+        elif lowered.startswith("explanation:"):
+            explanation = stripped.split(":", 1)[1].strip()
+        elif not translation and stripped:
+            translation = stripped
+    translation = translation or (raw_text or "").strip()
+    return translation, explanation
+
+
+def perform_explain_translation(text: str, source_language: str, target_language: str) -> tuple[str, str]:
+    """Translate text with optional explanation while honoring selected languages."""
+    source, target, auto_detect = normalize_explain_languages(source_language, target_language)
+    glossary_source = None if auto_detect else source
+    source, auto_detect, untranslated, source_detected = identify_source_language(text, source, target, auto_detect)
+    note_ai_languages(source, target)
+    note_ai_usage(characters=len(text))
+    glossary_entry = DIALECT_GLOSSARY.lookup(text, glossary_source, target)
+    if glossary_entry is None and untranslated:
+        glossary_entry = untranslated_result(text, target)
+    if glossary_entry is not None:
+        note_ai_usage(cache_hits=1)
+        return glossary_entry
+    return run_cached_translation(
+        "explain",
+        text,
+        source,
+        target,
+        lambda reference: request_explain_translation(text, source, target, auto_detect, reference),
+        source_detected,
+    )
+
+
+def build_explain_messages(text: str, source: str, target: str, auto_detect: bool, reference=None) -> list:
+    system_instructions = (
+        "You are a helpful translation assistant similar to Google Translate but with brief tips.\n"
+        f"{'Detect the language of the user text before translating it.' if auto_detect else f'The user text is in {source}.'}\n"
+        f"Translate the text into {target}.\n"
+        "Respond using exactly two lines:\n"
+        "Translation: <translated text in the target language>\n"
+        "Explanation: <a short usage tip in English>\n"
+        "Do not add extra text, emojis, or markdown. Avoid the * character unless required by the translation."
+        + build_reference_note(reference)
+    )
+    user_prompt = (
+        f"Source language: {'Auto' if auto_detect else source}\n"
+        f"Target language: {target}\n"
+        f"Text: {text}"
+    )
+    return [
+        {"role": "system", "content": system_instructions},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def request_explain_translation(
+    text: str, source: str, target: str, auto_detect: bool, reference=None
+) -> tuple[str, str]:
+    response = ai_backend.chat(build_explain_messages(text, source, target, auto_detect, reference))
+    raw = response.choices[0].message.content or ""
+    return parse_translation_response(raw)
+
+
+def extract_partial_translation(raw_text: str) -> tuple[str, bool]:
+    """Return the translation text received so far and whether its line is finished."""
+    stripped = (raw_text or "").lstrip()
+    label = "translation:"
+    lowered = stripped[: len(label)].lower()
+    if len(stripped) < len(label) and label.startswith(lowered):
+        return "", False
+    if lowered == label:
+        stripped = stripped[len(label):].lstrip(" ")
+    line, newline, _ = stripped.partition("\n")
+    if line.lower().startswith("explanation:"):
+        return "", bool(newline)
+    return line, bool(newline)
+
+
+def format_sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def stream_explain_translation(text: str, source_language: str, target_language: str):
+    """Yield SSE events: translation deltas as tokens arrive, then the explanation, then done."""
+    for event, payload in explain_translation_events(text, source_language, target_language):
+        yield format_sse_event(event, payload)
+
+
+def explain_translation_events(text: str, source_language: str, target_language: str):
+    """(event, payload) pairs behind stream_explain_translation."""
+    source, target, auto_detect = normalize_explain_languages(source_language, target_language)
+    glossary_source = None if auto_detect else source
+    source, auto_detect, untranslated, source_detected = identify_source_language(text, source, target, auto_detect)
+    cache_source = source
+    cache_key = build_translation_key("explain", text, cache_source, target)
+    note_ai_languages(cache_source, target)
+    note_ai_usage(characters=len(text))
+
+    cached = DIALECT_GLOSSARY.lookup(text, glossary_source, target)
+    if cached is None and untranslated:
+        cached = untranslated_result(text, target)
+    if cached is None:
+        cached = TRANSLATION_CACHE.get(cache_key)
+    match = None
+    if cached is None:
+        match = TRANSLATION_MEMORY.lookup("explain", text, cache_source, target)
+        if TRANSLATION_MEMORY.exact(match):
+            cached = match[2]
+    if cached is not None:
+        note_ai_usage(cache_hits=1)
+        translation, explanation = cached
+        yield ("translation", {"delta": translation})
+        yield ("explanation", {"explanation": explanation})
+        yield ("done", {"translation": translation, "explanation": explanation, "cached": True})
+        return
+
+    reference = match[1:] if match else None
+    note_ai_usage(cache_misses=1)
+    stream = ai_backend.chat(
+        build_explain_messages(text, source, target, auto_detect, reference),
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    raw = ""
+    sent = ""
+    translation_finished = False
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content or ""
+        if not delta:
+            continue
+        raw += delta
+        if translation_finished:
+            continue
+        partial, translation_finished = extract_partial_translation(raw)
+        if translation_finished:
+            partial = partial.rstrip()
+        if len(partial) > len(sent) and partial.startswith(sent):
+            yield ("translation", {"delta": partial[len(sent):]})
+            sent = partial
+
+    translation, explanation = parse_translation_response(raw)
+    if translation.startswith(sent) and len(translation) > len(sent):
+        yield ("translation", {"delta": translation[len(sent):]})
+    yield ("explanation", {"explanation": explanation})
+    yield ("done", {"translation": translation, "explanation": explanation, "cached": False})
+    TRANSLATION_CACHE.set(
+        cache_key, (translation, explanation), "explain", text, cache_source, target, source_detected
+    )
+
+
+@app.route("/translate_explain_stream", methods=["POST"])
+def translate_explain_stream():
+    data = request.get_json() or {}
+    text = data.get("text", "")
+    source_language = data.get("source_language", "")
+    target_language = data.get("target_language", "")
+    if not text:
+        return jsonify({"error": "No text provided"}), 400
+
+    events = stream_explain_translation(text, source_language, target_language)
+    try:
+        first_event = next(events)
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return ai_error_response(exc)
+
+    def generate():
+        yield first_event
+        try:
+            yield from events
+        except Exception as exc:  # pragma: no cover - OpenAI dependency
+            yield format_sse_event("error", {"error": str(exc)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/translate_simple", methods=["POST"])
+def translate_simple():
+    data = request.get_json() or {}
+    text = data.get("text", "")
+    source_language = data.get("source_language", "")
+    target_language = data.get("target_language", "")
+    if not text:
+        return jsonify({"error": "No text provided"}), 400
+
+    try:
+        translation = perform_simple_translation(text, source_language, target_language)
+        return jsonify({"translation": translation})
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return ai_error_response(exc)
+
+
+def chunk_batch_texts(texts):
+    chunks = []
+    current = []
+    current_chars = 0
+    for text in texts:
+        if current and (
+            len(current) >= TRANSLATION_BATCH_CHUNK_ITEMS
+            or current_chars + len(text) > TRANSLATION_BATCH_CHUNK_CHARS
+        ):
+            chunks.append(current)
+            current = []
+            current_chars = 0
+        current.append(text)
+        current_chars += len(text)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def parse_batch_translation_response(raw_text, count, mode):
+    try:
+        payload = json.loads(raw_text or "")
+    except ValueError:
+        return {}
+    entries = payload.get("translations") if isinstance(payload, dict) else None
+    if not isinstance(entries, list):
+        return {}
+
+    results = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            index = int(entry.get("id"))
+        except (TypeError, ValueError):
+            continue
+        translation = entry.get("translation")
+        if not 1 <= index <= count or not isinstance(translation, str) or not translation.strip():
+            continue
+        if mode == "explain":
+            results[index] = (translation.strip(), str(entry.get("explanation") or "").strip())
+        else:
+            results[index] = translation.strip()
+    return results
+
+
+def request_batch_translation(texts, mode, source, target, auto_detect):
+    """Translate several texts in one completion; returns {item number: value} for the items the model answered."""
+    if auto_detect:
+        language_line = "Detect the language of each item before translating it."
+    else:
+        language_line = f"Every item is written in {source}."
+    if mode == "explain":
+        fields = '"id", "translation" (the translated text) and "explanation" (a short usage tip in English)'
+    else:
+        fields = '"id" and "translation" (only the translated text, no commentary)'
+    system_instructions = (
+        "You are an accurate translation engine similar to Google Translate.\n"
+        f"{language_line}\n"
+        f"Translate every numbered item into {target}.\n"
+        'Respond with a JSON object of the form {"translations": [...]} containing one entry per item, '
+        f"in the same order, each with the keys {fields}.\n"
+        "Keep each item separate, never merge or skip items, and avoid the * character unless required by the translation."
+    )
+    items = [{"id": index, "text": text} for index, text in enumerate(texts, start=1)]
+    response = ai_backend.chat(
+        [
+            {"role": "system", "content": system_instructions},
+            {"role": "user", "content": json.dumps({"items": items}, ensure_ascii=False)},
+        ],
+        response_format={"type": "json_object"},
+    )
+    raw = response.choices[0].message.content or ""
+    return parse_batch_translation_response(raw, len(texts), mode)
+
+
+def perform_batch_translation(texts, source_language, target_language, mode="simple"):
+    """Translate many texts with shared languages; only uncached texts reach the model."""
+    if mode == "explain":
+        source, target, auto_detect = normalize_explain_languages(source_language, target_language)
+        cache_source = "auto" if auto_detect else source
+        translate_one = perform_explain_translation
+    else:
+        source, target = normalize_simple_languages(source_language, target_language)
+        auto_detect = False
+        cache_source = source
+        translate_one = perform_simple_translation
+    note_ai_languages(cache_source, target)
+
+    results = {}
+    pending = []
+    for text in dict.fromkeys(texts):
+        cached = TRANSLATION_CACHE.get(build_translation_key(mode, text, cache_source, target))
+        if cached is not None:
+            results[text] = {"value": cached, "cached": True}
+            note_ai_usage(cache_hits=1, characters=len(text))
+        else:
+            pending.append(text)
+
+    route = current_ai_route()
+    usage = current_ai_usage()
+
+    def translate_chunk(chunk):
+        with labelled_ai_route(route, usage):
+            chunk_results = {}
+            try:
+                answered = request_batch_translation(chunk, mode, source, target, auto_detect)
+            except UpstreamBusyError:
+                raise
+            except Exception as exc:  # pragma: no cover - OpenAI dependency
+                return {text: {"error": str(exc)} for text in chunk}
+
+            for index, text in enumerate(chunk, start=1):
+                value = answered.get(index)
+                if value is None:
+                    # The structured reply was unusable for this item; fall back to a dedicated call.
+                    try:
+                        value = translate_one(text, source_language, target_language)
+                    except UpstreamBusyError:
+                        raise
+                    except Exception as exc:  # pragma: no cover - OpenAI dependency
+                        chunk_results[text] = {"error": str(exc)}
+                        continue
+                else:
+                    cache_key = build_translation_key(mode, text, cache_source, target)
+                    TRANSLATION_CACHE.set(cache_key, value, mode, text, cache_source, target)
+                    note_ai_usage(cache_misses=1, characters=len(text))
+                chunk_results[text] = {"value": value, "cached": False}
+            return chunk_results
+
+    chunks = chunk_batch_texts(pending)
+    if len(chunks) == 1:
+        results.update(translate_chunk(chunks[0]))
+    elif chunks:
+        with ThreadPoolExecutor(max_workers=min(len(chunks), TRANSLATION_BATCH_CONCURRENCY)) as pool:
+            for chunk_results in pool.map(translate_chunk, chunks):
+                results.update(chunk_results)
+
+    items = []
+    for text in texts:
+        outcome = results[text]
+        item = {"text": text}
+        if "error" in outcome:
+            item["error"] = outcome["error"]
+        elif mode == "explain":
+            item["translation"], item["explanation"] = outcome["value"]
+            item["cached"] = outcome["cached"]
+        else:
+            item["translation"] = outcome["value"]
+            item["cached"] = outcome["cached"]
+        items.append(item)
+    return items
+
+
+def collect_pretranslation_items(cursor, include_explanations=True):
+    """(text, source_language) pairs for every quiz and module course prompt, option and explanation."""
+    question_sets = []
+    cursor.execute(
+        """
+        SELECT q.language, qq.id, qq.prompt, qq.explanation, qo.text AS option_text
+        FROM quizzes q
+        JOIN quiz_questions qq ON qq.quiz_id = q.id
+        LEFT JOIN quiz_options qo ON qo.question_id = qq.id
+        WHERE q.is_active = 1
+        ORDER BY qq.id ASC, qo.id ASC
+        """
+    )
+    question_sets.append(cursor.fetchall() or [])
+    cursor.execute(
+        """
+        SELECT d.dialect AS language, qq.id, qq.prompt, qq.explanation, qo.text AS option_text
+        FROM module_course_quiz_questions qq
+        JOIN module_course_quizzes q ON q.id = qq.quiz_id
+        JOIN module_courses c ON c.id = q.course_id
+        JOIN module_definitions d ON d.id = c.module_id
+        LEFT JOIN module_course_quiz_options qo ON qo.question_id = qq.id
+        ORDER BY qq.id ASC, qo.id ASC
+        """
+    )
+    question_sets.append(cursor.fetchall() or [])
+
+    items = {}
+    for rows in question_sets:
+        questions = {}
+        for row in rows:
+            questions.setdefault(row["id"], []).append(row)
+        for question_rows in questions.values():
+            first = question_rows[0]
+            language = first.get("language") or "English"
+            items[(first["prompt"].strip(), language)] = True
+            if include_explanations and (first.get("explanation") or "").strip():
+                items[(first["explanation"].strip(), "English")] = True
+            options = [row["option_text"].strip() for row in question_rows if (row.get("option_text") or "").strip()]
+            option_language = guess_answer_language(options)
+            for option in options:
+                items[(option, option_language)] = True
+    return list(items)
+
+
+def fetch_existing_pretranslation_keys(cursor, keys, max_age_seconds):
+    existing = set()
+    for offset in range(0, len(keys), 500):
+        chunk = keys[offset:offset + 500]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        cursor.execute(
+            f"""
+            SELECT cache_key FROM translation_cache
+            WHERE cache_key IN ({placeholders}) AND updated_at >= NOW() - INTERVAL %s SECOND
+            """,
+            (*chunk, max_age_seconds),
+        )
+        existing.update(row["cache_key"] for row in cursor.fetchall() or [])
+        cursor.execute(f"SELECT cache_key FROM pretranslation_queue WHERE cache_key IN ({placeholders})", tuple(chunk))
+        existing.update(row["cache_key"] for row in cursor.fetchall() or [])
+    return existing
+
+
+def interactive_busy_rate(window_seconds):
+    """Share of AI route requests on every worker answered 503/504 in the last ``window_seconds``.
+
+    Read from ai_usage_events, so it lags by up to USAGE_FLUSH_SECONDS; 0.0 when the log is off or unreadable.
+    """
+    if not USAGE_LOG_ENABLED:
+        return 0.0
+    routes = sorted(AI_USAGE_ROUTES)
+    try:
+        conn = get_db_connection()
+    except mysql.connector.Error:
+        return 0.0
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"""
+            SELECT COUNT(*), SUM(status IN (503, 504))
+            FROM ai_usage_events
+            WHERE created_at >= %s AND route IN ({", ".join(["%s"] * len(routes))})
+            """,
+            (datetime.utcnow() - timedelta(seconds=window_seconds), *routes),
+        )
+        requests, busy = cursor.fetchone() or (0, 0)
+    except mysql.connector.Error:
+        return 0.0
+    finally:
+        cursor.close()
+        conn.close()
+    return int(busy or 0) / requests if requests else 0.0
+
+
+class BackgroundQueueWorker(ABC):
+    """Background thread that works through a resumable queue table at a throttled rate.
+
+    Subclasses fill the queue in enqueue_missing() and handle one row in process(); rows are deleted
+    when done and retried up to max_attempts before being marked failed. Web processes only scan
+    (request_scan); the drain loop (schedule) runs in the queue-workers process, which polls the table
+    every BACKGROUND_QUEUE_POLL_SECONDS. Only the process holding the queue's MySQL named lock drains it,
+    so the rate limit holds across workers, and rows are claimed before they are processed (claims
+    older than BACKGROUND_QUEUE_CLAIM_SECONDS, left by a process that died, go back to pending).
+    """
+
+    queue_table = None
+    name = None
+
+    def __init__(self, rate_per_minute, max_attempts, rescan_seconds):
+        self.rate_per_minute = rate_per_minute
+        self.min_interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self.max_attempts = max_attempts
+        self.rescan_seconds = rescan_seconds
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._scan_thread = None
+        self._scan_again = False
+        self._rescan = True
+        self._scanned_at = 0.0
+        self._next_call_at = 0.0
+        self._busy = False
+        self._busy_checked_at = 0.0
+        self.completed = 0
+        self.failed = 0
+        self.last_scan_at = None
+        self.last_scan_enqueued = 0
+
+    def request_scan(self):
+        """Queue new content without draining: one scan on a short-lived thread.
+
+        Called by web processes after content edits. When this process also runs the drain loop
+        (``python app.py``), that loop is woken instead.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                draining = True
+            elif self._scan_thread is not None:
+                self._scan_again = True
+                return
+            else:
+                draining = False
+                self._scan_thread = threading.Thread(target=self._scan_once, name=f"{self.name}-scan", daemon=True)
+                self._scan_thread.start()
+        if draining:
+            self.schedule()
+
+    def _scan_once(self):
+        while True:
+            try:
+                self._scan()
+            except mysql.connector.Error as exc:
+                print(f"[{self.name}] Database error: {exc}")
+            with self._lock:
+                if not self._scan_again:
+                    self._scan_thread = None
+                    return
+                self._scan_again = False
+
+    def _scan(self):
+        enqueued = self.enqueue_missing()
+        with self._lock:
+            self._scanned_at = time.monotonic()
+            self.last_scan_at = datetime.utcnow()
+            self.last_scan_enqueued = enqueued
+
+    def schedule(self, rescan=True):
+        """Start (or wake) the drain loop in this process; meant for the queue-workers process."""
+        with self._lock:
+            self._rescan = self._rescan or rescan
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                rescan, self._rescan = self._rescan, False
+            paused = False
+            try:
+                if rescan:
+                    self._scan()
+                with mysql_named_lock(f"{self.queue_table}:drain", timeout=0) as draining:
+                    if draining:
+                        paused = self._drain()
+            except mysql.connector.Error as exc:
+                print(f"[{self.name}] Database error: {exc}")
+            # Web processes only enqueue, so poll the table for their rows between full rescans.
+            self._wake.wait(timeout=30 if paused else BACKGROUND_QUEUE_POLL_SECONDS)
+            self._wake.clear()
+            with self._lock:
+                if time.monotonic() - self._scanned_at >= self.rescan_seconds:
+                    self._rescan = True
+
+    @abstractmethod
+    def enqueue_missing(self):
+        """Queue work for content that is not done yet; returns the number of rows added."""
+
+    @abstractmethod
+    def process(self, item):
+        """Handle one claimed queue row; raising leaves it for a retry."""
+
+    def _drain(self):
+        """Work through pending items; returns True if it stopped early because the upstream was busy."""
+        while True:
+            batch = self._claim_batch()
+            if not batch:
+                return False
+            for index, item in enumerate(batch):
+                if not self._process(item):
+                    self._release(batch[index:])
+                    return True
+
+    def _claim_batch(self, size=20):
+        claim = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:12]}"[:64]
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                f"""
+                UPDATE {self.queue_table} SET status = 'pending', claimed_by = NULL
+                WHERE status = 'running' AND claimed_at < NOW() - INTERVAL %s SECOND
+                """,
+                (BACKGROUND_QUEUE_CLAIM_SECONDS,),
+            )
+            cursor.execute(
+                f"""
+                UPDATE {self.queue_table} SET status = 'running', claimed_by = %s, claimed_at = NOW()
+                WHERE status = 'pending'
+                ORDER BY created_at ASC
+                LIMIT {int(size)}
+                """,
+                (claim,),
+            )
+            conn.commit()
+            cursor.execute(
+                f"SELECT * FROM {self.queue_table} WHERE claimed_by = %s AND status = 'running' ORDER BY created_at ASC",
+                (claim,),
+            )
+            return cursor.fetchall() or []
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _release(self, items):
+        for item in items:
+            self._update_item(
+                f"UPDATE {self.queue_table} SET status = 'pending', claimed_by = NULL WHERE cache_key = %s AND claimed_by = %s",
+                (item["cache_key"], item["claimed_by"]),
+            )
+
+    def _interactive_busy(self):
+        now = time.monotonic()
+        if now - self._busy_checked_at >= 10:
+            self._busy_checked_at = now
+            self._busy = interactive_busy_rate(BACKGROUND_QUEUE_BUSY_WINDOW_SECONDS) >= BACKGROUND_QUEUE_BUSY_RATE
+        return self._busy
+
+    def _throttle(self):
+        # Interactive requests have priority: wait while this process's bulkhead is more than half busy
+        # (queues running inside a web process), or while interactive requests on any worker were
+        # recently turned away as busy, which the queue-workers process can only see in the usage log.
+        while AI_BULKHEAD.in_flight * 2 > AI_BULKHEAD.max_concurrent or self._interactive_busy():
+            time.sleep(1.0)
+        delay = self._next_call_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_call_at = time.monotonic() + self.min_interval
+
+    def _process(self, item):
+        """Handle one queued item; returns False when the upstream is busy and draining should pause."""
+        self._throttle()
+        try:
+            self.process(item)
+        except UpstreamBusyError as exc:
+            time.sleep(exc.retry_after)
+            return False
+        except Exception as exc:  # pragma: no cover - OpenAI dependency
+            attempts = item["attempts"] + 1
+            status = "failed" if attempts >= self.max_attempts else "pending"
+            self._update_item(
+                f"""
+                UPDATE {self.queue_table} SET status = %s, attempts = %s, last_error = %s, claimed_by = NULL
+                WHERE cache_key = %s
+                """,
+                (status, attempts, str(exc)[:255], item["cache_key"]),
+            )
+            with self._lock:
+                self.failed += 1
+            return True
+        self._update_item(f"DELETE FROM {self.queue_table} WHERE cache_key = %s", (item["cache_key"],))
+        with self._lock:
+            self.completed += 1
+        return True
+
+    def _update_item(self, statement, params):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(statement, params)
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def retry_failed(self):
+        self._update_item(f"UPDATE {self.queue_table} SET status = 'pending', attempts = 0 WHERE status = 'failed'", ())
+
+    def stats(self):
+        queue = {}
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"SELECT status, COUNT(*) FROM {self.queue_table} GROUP BY status")
+                queue = {status: count for status, count in cursor.fetchall()}
+            finally:
+                cursor.close()
+                conn.close()
+        except mysql.connector.Error:
+            pass
+        with self._lock:
+            return {
+                "running": bool(self._thread and self._thread.is_alive()),
+                "scanning": self._scan_thread is not None,
+                "rate_per_minute": self.rate_per_minute,
+                "queue": queue,
+                "completed": self.completed,
+                "failed": self.failed,
+                "last_scan_at": isoformat_utc(self.last_scan_at),
+                "last_scan_enqueued": self.last_scan_enqueued,
+            }
+
+
+class PretranslationWorker(BackgroundQueueWorker):
+    """Fills the translation cache for quiz and module content.
+
+    Work items live in pretranslation_queue, so a restart resumes where it stopped; content whose
+    translation is already cached is never queued again.
+    """
+
+    queue_table = "pretranslation_queue"
+    name = "pretranslate"
+
+    def __init__(self, target_languages, rate_per_minute, max_attempts, rescan_seconds):
+        super().__init__(rate_per_minute, max_attempts, rescan_seconds)
+        self.target_languages = target_languages
+
+    def enqueue_missing(self):
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            pending = {}
+            for text, source in collect_pretranslation_items(cursor):
+                for target in self.target_languages:
+                    if canonical_language(target) != canonical_language(source):
+                        pending[build_translation_key("simple", text, source, target)] = (source, target, text)
+            existing = fetch_existing_pretranslation_keys(cursor, list(pending), TRANSLATION_CACHE_TTL_SECONDS)
+            rows = [
+                (cache_key, source[:50], target[:50], text)
+                for cache_key, (source, target, text) in pending.items()
+                if cache_key not in existing
+            ]
+            if rows:
+                cursor.executemany(
+                    """
+                    INSERT IGNORE INTO pretranslation_queue (cache_key, source_language, target_language, source_text)
+                    VALUES (%s, %s, %s, %s)
+                    """,
+                    rows,
+                )
+                conn.commit()
+            return len(rows)
+        finally:
+            cursor.close()
+            conn.close()
+
+    def process(self, item):
+        source, target, text = item["source_language"], item["target_language"], item["source_text"]
+        with tracked_ai_usage("pretranslate"):
+            note_ai_languages(source, target)
+            note_ai_usage(characters=len(text))
+            run_cached_translation(
+                "simple",
+                text,
+                source,
+                target,
+                lambda reference: request_simple_translation(text, source, target, reference),
+            )
+
+    def stats(self):
+        stats = super().stats()
+        stats["translated"] = stats.pop("completed")
+        return {
+            "enabled": PRETRANSLATE_ENABLED and TRANSLATION_CACHE_DB,
+            "target_languages": list(self.target_languages),
+            **stats,
+        }
+
+
+PRETRANSLATION_WORKER = PretranslationWorker(
+    [language.strip() for language in PRETRANSLATE_TARGET_LANGUAGES.split(",") if language.strip()],
+    PRETRANSLATE_RATE_PER_MINUTE,
+    PRETRANSLATE_MAX_ATTEMPTS,
+    PRETRANSLATE_RESCAN_SECONDS,
+)
+
+
+def on_learning_content_changed():
+    """Quiz or module content was written: refresh the glossary and language model, and queue new text for pre-translation and speech."""
+    DIALECT_GLOSSARY.invalidate()
+    LANGUAGE_IDENTIFIER.invalidate()
+    if PRETRANSLATE_ENABLED and TRANSLATION_CACHE_DB:
+        PRETRANSLATION_WORKER.request_scan()
+    if SPEECH_PRERENDER_ENABLED:
+        SPEECH_PRERENDER_WORKER.request_scan()
+
+
+@app.route("/translate_batch", methods=["POST"])
+def translate_batch():
+    data = request.get_json() or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Body must be a JSON object"}), 400
+    texts = data.get("texts")
+    source_language = data.get("source_language", "")
+    target_language = data.get("target_language", "")
+    mode = data.get("mode") or "simple"
+    if not isinstance(mode, str):
+        return jsonify({"error": "mode must be 'simple' or 'explain'"}), 400
+    mode = mode.strip().lower()
+    if not isinstance(texts, list) or not texts:
+        return jsonify({"error": "No texts provided"}), 400
+    if len(texts) > TRANSLATION_BATCH_MAX_ITEMS:
+        return jsonify({"error": f"A batch can contain at most {TRANSLATION_BATCH_MAX_ITEMS} texts"}), 400
+    if any(not isinstance(text, str) or not text.strip() for text in texts):
+        return jsonify({"error": "Every text must be a non-empty string"}), 400
+    if mode not in ("simple", "explain"):
+        return jsonify({"error": "mode must be 'simple' or 'explain'"}), 400
+
+    try:
+        items = perform_batch_translation(texts, source_language, target_language, mode)
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return ai_error_response(exc)
+    if all("error" in item for item in items):
+        return jsonify({"error": items[0]["error"], "results": items}), 500
+    return jsonify({"results": items})
+
+
+class AudioCache:
+    """Content-addressed MP3 files on disk (``<dir>/<key[:2]>/<key>.mp3``) under a size-bounded LRU.
+
+    The index is read from the directory on first use, ordered by modification time, and hits touch
+    the file so the order survives restarts. Files added or evicted by other workers are picked up
+    lazily: a missing file is simply a miss. Every worker writes into the same directory, so before
+    evicting, a write re-reads the directory when the index is older than ``scan_seconds`` or over the
+    limit; the bound then holds for the directory as a whole rather than for each worker's share.
+    """
+
+    def __init__(self, directory, max_bytes, scan_seconds):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.scan_seconds = scan_seconds
+        self._lock = threading.Lock()
+        self._entries = None
+        self._scanned_at = 0.0
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    def _index(self, refresh=False):
+        if self._entries is None or refresh:
+            files = []
+            for root, _, names in os.walk(self.directory):
+                for name in names:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                        if name.endswith(".part") and time.time() - stat.st_mtime > 3600:
+                            os.remove(path)  # Left behind by a worker that died mid-write.
+                    except OSError:
+                        continue
+                    if name.endswith(".mp3"):
+                        files.append((stat.st_mtime, name[:-4], stat.st_size))
+            files.sort()
+            self._entries = OrderedDict((key, size) for _, key, size in files)
+            self._bytes = sum(size for _, _, size in files)
+            self._scanned_at = time.monotonic()
+        return self._entries
+
+    def contains(self, key):
+        return os.path.isfile(self.path_for(key))
+
+    def get(self, key, count=True):
+        """Path of the cached audio for ``key``, or None."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+            size = os.path.getsize(path)
+        except OSError:
+            with self._lock:
+                entries = self._index()
+                if key in entries:
+                    self._bytes -= entries.pop(key)
+                if count:
+                    self.misses += 1
+            return None
+        with self._lock:
+            entries = self._index()
+            if key not in entries:
+                entries[key] = size
+                self._bytes += size
+            entries.move_to_end(key)
+            if count:
+                self.hits += 1
+        return path
+
+    def put(self, key, data):
+        """Store ``data`` atomically and evict least recently used files past the size limit."""
+        handle, temp_path = self.begin(key)
+        try:
+            handle.write(data)
+        except OSError:
+            self.abort(handle, temp_path)
+            raise
+        return self.commit(key, handle, temp_path)
+
+    def begin(self, key):
+        """Open a temporary file next to key's path; publish it with commit() or drop it with abort()."""
+        directory = os.path.dirname(self.path_for(key))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        return os.fdopen(fd, "wb"), temp_path
+
+    def commit(self, key, handle, temp_path):
+        path = self.path_for(key)
+        try:
+            handle.close()
+            size = os.path.getsize(temp_path)
+            os.replace(temp_path, path)
+        except OSError:
+            self.abort(handle, temp_path)
+            raise
+        self._added(key, size)
+        return path
+
+    def abort(self, handle, temp_path):
+        try:
+            handle.close()
+        except OSError:
+            pass
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+    def _added(self, key, size):
+        evicted = []
+        with self._lock:
+            entries = self._index()
+            self._bytes += size - entries.pop(key, 0)
+            entries[key] = size
+            self.writes += 1
+            if self._bytes > self.max_bytes or time.monotonic() - self._scanned_at >= self.scan_seconds:
+                # Count the files other workers wrote (or evicted) since the last scan.
+                entries = self._index(refresh=True)
+            while self._bytes > self.max_bytes and len(entries) > 1:
+                old_key, old_size = entries.popitem(last=False)
+                self._bytes -= old_size
+                self.evictions += 1
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self.path_for(old_key))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "directory": self.directory,
+                "entries": len(self._entries or {}),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "writes": self.writes,
+                "evictions": self.evictions,
+            }
+
+
+TTS_CACHE = AudioCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES, TTS_CACHE_SCAN_SECONDS)
+TTS_FLIGHTS = SingleFlight()
+SPEECH_KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+def speech_cache_key(text):
+    # The fake backend's audio must never be served once the real one is configured.
+    digest = hashlib.sha256("\x1f".join([AI_BACKEND, AI_TTS_MODEL, AI_TTS_VOICE, text]).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def cached_speech(text):
+    """Return (key, path, data) for text's MP3; only a failed cache write leaves path None and returns data."""
+    note_ai_usage(characters=len(text))
+    return load_speech(speech_cache_key(text), text)
+
+
+def load_speech(key, text):
+    path = TTS_CACHE.get(key)
+    if path is not None:
+        note_ai_usage(cache_hits=1)
+        return key, path, None
+
+    def load():
+        # Another worker may have stored it while this one waited.
+        stored = TTS_CACHE.get(key, count=False)
+        if stored is not None:
+            return stored, None
+        response = ai_backend.speech(text)
+        audio = b"".join(response.iter_bytes())
+        try:
+            return TTS_CACHE.put(key, audio), None
+        except OSError as exc:
+            print(f"[tts-cache] Could not store audio: {exc}")
+            return None, audio
+
+    note_ai_usage(cache_misses=1)
+    path, audio = TTS_FLIGHTS.do(key, load)
+    return key, path, audio
+
+
+def stream_speech(key, text):
+    """Yield text's MP3 chunks as the upstream sends them, writing a copy into the audio cache."""
+    return tee_into_cache(key, ai_backend.speech(text, stream=True))
+
+
+def tee_into_cache(key, chunks):
+    """Pass chunks through while writing them to the audio cache under ``key``.
+
+    The cached file is only published once every chunk has arrived; a failed cache write never
+    interrupts the stream.
+    """
+    try:
+        handle, temp_path = TTS_CACHE.begin(key)
+    except OSError as exc:
+        print(f"[tts-cache] Could not store audio: {exc}")
+        handle = None
+    completed = False
+    try:
+        for chunk in chunks:
+            if handle is not None:
+                try:
+                    handle.write(chunk)
+                except OSError as exc:
+                    print(f"[tts-cache] Could not store audio: {exc}")
+                    TTS_CACHE.abort(handle, temp_path)
+                    handle = None
+            yield chunk
+        completed = True
+    finally:
+        chunks.close()
+        if handle is not None and completed:
+            try:
+                TTS_CACHE.commit(key, handle, temp_path)
+            except OSError as exc:
+                print(f"[tts-cache] Could not store audio: {exc}")
+        elif handle is not None:
+            TTS_CACHE.abort(handle, temp_path)
+
+
+def split_speech_segments(text):
+    """Sentences of a long text to synthesize separately, or None when it should go in one call."""
+    if len(text) < TTS_SEGMENT_MIN_CHARS:
+        return None
+    sentences = [sentence.strip() for sentence, _ in split_translation_segments(text) if sentence.strip()]
+    return sentences if len(sentences) > 1 else None
+
+
+def strip_id3_header(audio):
+    """Drop a leading ID3v2 tag so a clip can be appended to another MP3 stream."""
+    if len(audio) < 10 or not audio.startswith(b"ID3"):
+        return audio
+    size = 10 + ((audio[6] & 0x7F) << 21 | (audio[7] & 0x7F) << 14 | (audio[8] & 0x7F) << 7 | (audio[9] & 0x7F))
+    if audio[5] & 0x10:
+        size += 10  # Footer present.
+    return audio[size:]
+
+
+def read_speech_file(path):
+    with open(path, "rb") as handle:
+        return handle.read()
+
+
+def stream_segmented_speech(sentences):
+    """Yield one MP3 stream for several sentences: the first streams while the rest render in parallel.
+
+    Each sentence is cached on its own, so later texts sharing a sentence reuse its audio.
+    """
+    route = current_ai_route()
+    usage = current_ai_usage()
+
+    def render(sentence):
+        with labelled_ai_route(route, usage):
+            _, path, audio = load_speech(speech_cache_key(sentence), sentence)
+            return audio if path is None else read_speech_file(path)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(len(sentences) - 1, TTS_SEGMENT_CONCURRENCY)))
+    try:
+        rest = [pool.submit(render, sentence) for sentence in sentences[1:]]
+        first_key = speech_cache_key(sentences[0])
+        first_path = TTS_CACHE.get(first_key)
+        if first_path is not None:
+            note_ai_usage(cache_hits=1)
+            yield read_speech_file(first_path)
+        else:
+            note_ai_usage(cache_misses=1)
+            yield from stream_speech(first_key, sentences[0])
+        for future in rest:
+            yield strip_id3_header(future.result())
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def speech_file_response(key, path):
+    """Serve cached audio straight from disk with validators, Range support and long-lived caching."""
+    response = send_file(path, mimetype="audio/mpeg", conditional=True, etag=key, max_age=TTS_CACHE_MAX_AGE_SECONDS)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.headers["Content-Location"] = url_for("tts_audio", key=key)
+    return response
+
+
+@app.route("/tts", methods=["POST"])
+def tts():
+    data = request.get_json() or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Body must be a JSON object"}), 400
+    text = data.get("text", "")
+    if not isinstance(text, str):
+        return jsonify({"error": "text must be a string"}), 400
+    if not text:
+        return jsonify({"error": "No text provided"}), 400
+    note_ai_usage(characters=len(text))
+    key = speech_cache_key(text)
+    path = TTS_CACHE.get(key)
+    if path is not None:
+        note_ai_usage(cache_hits=1)
+        return speech_file_response(key, path)
+
+    note_ai_usage(cache_misses=1)
+    sentences = split_speech_segments(text)
+    if sentences:
+        chunks = tee_into_cache(key, stream_segmented_speech(sentences))
+    else:
+        chunks = stream_speech(key, text)
+    try:
+        first_chunk = next(chunks, b"")
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return ai_error_response(exc)
+
+    def generate():
+        yield first_chunk
+        yield from chunks
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="audio/mpeg",
+        headers={
+            "Cache-Control": "no-cache",
+            "Content-Location": url_for("tts_audio", key=key),
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@app.route("/tts/audio/<key>.mp3", methods=["GET"])
+def tts_audio(key):
+    """Cached speech by content key (see the Content-Location header of /tts)."""
+    path = TTS_CACHE.get(key) if SPEECH_KEY_PATTERN.fullmatch(key) else None
+    if path is None:
+        return jsonify({"error": "Audio not found"}), 404
+    return speech_file_response(key, path)
+
+
+def synthesize_speech(text):
+    _, path, audio = cached_speech(text)
+    return audio if path is None else read_speech_file(path)
+
+
+def build_speech_payload(text):
+    """Inline audio for JSON responses; a failed synthesis still returns the text."""
+    try:
+        audio_bytes = synthesize_speech(text)
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return {"audio": None, "audio_error": str(exc)}
+    return {"audio": base64.b64encode(audio_bytes).decode("ascii"), "audio_mime_type": "audio/mpeg"}
+
+
+def speech_audio_url(text):
+    """URL of the cached audio for text, or None until it has been rendered."""
+    text = (text or "").strip()
+    if not text:
+        return None
+    key = speech_cache_key(text)
+    return url_for("tts_audio", key=key) if TTS_CACHE.contains(key) else None
+
+
+def collect_speech_items(cursor):
+    """(text, language) pairs to pre-render: quiz and module course prompts and options, and glossary entries."""
+    items = dict.fromkeys(collect_pretranslation_items(cursor, include_explanations=False))
+    cursor.execute("SELECT term, term_language, translation, translation_language FROM dialect_glossary")
+    for row in cursor.fetchall() or []:
+        items[(row["term"].strip(), row["term_language"])] = None
+        if canonical_language(row["translation_language"]) != "english":
+            items[(row["translation"].strip(), row["translation_language"])] = None
+    return [(text, language) for text, language in items if text]
+
+
+class SpeechPrerenderWorker(BackgroundQueueWorker):
+    """Renders course content into the audio cache so pronunciations play without waiting on the model.
+
+    Texts whose audio is already cached are skipped; work items live in speech_prerender_queue so a
+    restart resumes where it stopped.
+    """
+
+    queue_table = "speech_prerender_queue"
+    name = "speech-prerender"
+
+    def enqueue_missing(self):
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            rows = {}
+            for text, language in collect_speech_items(cursor):
+                key = speech_cache_key(text)
+                if key not in rows and not TTS_CACHE.contains(key):
+                    rows[key] = (key, (language or "")[:50], text)
+            enqueued = 0
+            if rows:
+                cursor.executemany(
+                    """
+                    INSERT IGNORE INTO speech_prerender_queue (cache_key, language, source_text)
+                    VALUES (%s, %s, %s)
+                    """,
+                    list(rows.values()),
+                )
+                enqueued = max(cursor.rowcount, 0)
+                conn.commit()
+            return enqueued
+        finally:
+            cursor.close()
+            conn.close()
+
+    def process(self, item):
+        with tracked_ai_usage("prerender_speech"):
+            cached_speech(item["source_text"])
+
+    def stats(self):
+        stats = super().stats()
+        stats["rendered"] = stats.pop("completed")
+        return {"enabled": SPEECH_PRERENDER_ENABLED, "cache_shared": TTS_CACHE_SHARED, **stats}
+
+
+SPEECH_PRERENDER_WORKER = SpeechPrerenderWorker(
+    SPEECH_PRERENDER_RATE_PER_MINUTE,
+    SPEECH_PRERENDER_MAX_ATTEMPTS,
+    SPEECH_PRERENDER_RESCAN_SECONDS,
+)
+
+
+@app.route("/translate_speak", methods=["POST"])
+def translate_speak():
+    data = request.get_json() or {}
+    text = data.get("text", "")
+    source_language = data.get("source_language", "")
+    target_language = data.get("target_language", "")
+    if not text:
+        return jsonify({"error": "No text provided"}), 400
+
+    try:
+        translation = perform_simple_translation(text, source_language, target_language)
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return ai_error_response(exc)
+    return jsonify({"translation": translation, **build_speech_payload(translation)})
+
+
+def hash_stream(stream, chunk_size=64 * 1024):
+    """(sha256 hex digest, size) of a seekable stream, read in chunks and rewound afterwards."""
+    digest = hashlib.sha256()
+    size = 0
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    stream.seek(0)
+    return digest.hexdigest(), size
+
+
+class PcmAudio:
+    """Uncompressed audio that can be cut into WAV clips: a WAV upload, or raw PCM decoded by ffmpeg."""
+
+    def __init__(self, handle, frames, rate, channels, sample_width, data_offset=0, reader=None, lock=None):
+        self.handle = handle
+        self.frames = frames
+        self.rate = rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.data_offset = data_offset
+        self.reader = reader
+        # Callers still writing to the handle pass the lock guarding it.
+        self._lock = lock or threading.Lock()
+
+    @property
+    def duration(self):
+        return self.frames / self.rate if self.rate else 0.0
+
+    def clip(self, start_seconds, seconds):
+        """WAV bytes for one window of the recording."""
+        start = int(start_seconds * self.rate)
+        count = min(int(seconds * self.rate), self.frames - start)
+        with self._lock:
+            if self.reader is not None:
+                self.reader.setpos(start)
+                data = self.reader.readframes(count)
+            else:
+                frame_size = self.channels * self.sample_width
+                self.handle.seek(self.data_offset + start * frame_size)
+                data = self.handle.read(count * frame_size)
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as writer:
+            writer.setnchannels(self.channels)
+            writer.setsampwidth(self.sample_width)
+            writer.setframerate(self.rate)
+            writer.writeframes(data)
+        return buffer.getvalue()
+
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+        elif self.handle is not None:
+            self.handle.close()
+
+
+def remaining_route_budget(route, usage=None):
+    """Seconds left of the route's deadline, counted from the start of the request when its usage record is known."""
+    budget = AI_CALL_POLICY.deadlines.get(route, AI_CALL_POLICY.default_deadline)
+    if usage is not None:
+        budget -= time.monotonic() - usage.started
+    return max(budget, 1.0)
+
+
+def probe_audio_seconds(path, timeout):
+    """Length of an audio file without decoding it, or None when ffprobe is missing or can't tell.
+
+    The container header is read first; MediaRecorder WebM has no duration there, so the packet
+    timestamps are listed instead.
+    """
+    binary = shutil.which(FFPROBE_BINARY)
+    if binary is None:
+        return None
+    for entries in ("format=duration", "packet=pts_time,duration_time"):
+        result = subprocess.run(
+            [binary, "-v", "error", "-select_streams", "a:0", "-show_entries", entries, "-of", "csv=p=0", path],
+            capture_output=True,
+            timeout=timeout,
+            check=False,
+        )
+        lines = result.stdout.decode(errors="replace").split()
+        if result.returncode != 0 or not lines:
+            continue
+        try:
+            # The duration alone, or the last packet's start plus its length.
+            return sum(float(value) for value in lines[-1].split(",") if value and value != "N/A")
+        except ValueError:
+            continue
+    return None
+
+
+def open_pcm_audio(stream, min_seconds=0.0, timeout=AI_DEADLINE_SECONDS):
+    """PcmAudio for an upload, or None when it can't be decoded here (not WAV and no ffmpeg on PATH).
+
+    Other formats are probed before decoding and left alone (None) when shorter than ``min_seconds``;
+    ffprobe and ffmpeg together get ``timeout`` seconds.
+    """
+    stream.seek(0)
+    try:
+        reader = wave.open(stream, "rb")
+    except (wave.Error, EOFError):
+        reader = None
+        stream.seek(0)
+    if reader is not None:
+        return PcmAudio(
+            stream, reader.getnframes(), reader.getframerate(), reader.getnchannels(), reader.getsampwidth(),
+            reader=reader,
+        )
+    binary = shutil.which(FFMPEG_BINARY)
+    if binary is None:
+        return None
+    deadline = time.monotonic() + timeout
+    decoded = tempfile.TemporaryFile()
+    try:
+        with tempfile.NamedTemporaryFile() as source:
+            shutil.copyfileobj(stream, source)
+            source.flush()
+            stream.seek(0)
+            if min_seconds:
+                duration = probe_audio_seconds(source.name, timeout)
+                if duration is not None and duration < min_seconds:
+                    decoded.close()
+                    return None
+            # 16 kHz mono 16-bit PCM is what the transcription model works at anyway.
+            result = subprocess.run(
+                [binary, "-nostdin", "-v", "error", "-i", source.name, "-ac", "1", "-ar", "16000", "-f", "s16le", "-"],
+                stdout=decoded,
+                stderr=subprocess.PIPE,
+                timeout=max(deadline - time.monotonic(), 0.1),
+                check=False,
+            )
+    except subprocess.TimeoutExpired:
+        print(f"[stt] ffmpeg did not finish decoding the upload within {timeout:.0f}s")
+        decoded.close()
+        stream.seek(0)
+        return None
+    stream.seek(0)
+    if result.returncode != 0:
+        print(f"[stt] ffmpeg could not decode the upload: {result.stderr.decode(errors='replace').strip()}")
+        decoded.close()
+        return None
+    size = decoded.seek(0, os.SEEK_END)
+    return PcmAudio(decoded, size // 2, 16000, 1, 2)
+
+
+def audio_chunk_windows(duration, chunk_seconds=STT_CHUNK_SECONDS, overlap_seconds=STT_CHUNK_OVERLAP_SECONDS):
+    """(start, length) windows in seconds covering a recording, each overlapping the one before it."""
+    step = max(chunk_seconds - overlap_seconds, 1.0)
+    windows = []
+    start = 0.0
+    while True:
+        windows.append((start, min(chunk_seconds, duration - start)))
+        if start + chunk_seconds >= duration:
+            return windows
+        start += step
+
+
+def normalize_transcript_word(word):
+    return "".join(ch for ch in unicodedata.normalize("NFKC", word).casefold() if ch.isalnum())
+
+
+def stitch_transcripts(parts, window_words=16):
+    """Join chunk transcripts, dropping the words repeated where neighbouring chunks overlap.
+
+    The end of the text so far and the start of the next chunk are aligned on their longest common run
+    of words; the run is kept once. A single shared word only counts right at the seam, where a word
+    cut in half by the window edge often leaves nothing longer to match. Otherwise the chunk is
+    simply appended.
+    """
+    words = []
+    for part in parts:
+        incoming = part.split()
+        if not words:
+            words = incoming
+            continue
+        tail = words[-window_words:]
+        head = incoming[:window_words]
+        matcher = SequenceMatcher(
+            None,
+            [normalize_transcript_word(word) for word in tail],
+            [normalize_transcript_word(word) for word in head],
+            autojunk=False,
+        )
+        match = matcher.find_longest_match(0, len(tail), 0, len(head))
+        at_seam = match.size == 1 and match.a >= len(tail) - 2 and match.b <= 1
+        if match.size >= 2 or at_seam:
+            words = words[: len(words) - len(tail) + match.a] + incoming[match.b:]
+        else:
+            words += incoming
+    return " ".join(words)
+
+
+def transcribe_in_chunks(audio_file):
+    """Transcript of a long recording from overlapping windows transcribed in parallel.
+
+    Returns None when the upload can't be cut here or is shorter than STT_CHUNK_MIN_SECONDS, so the
+    caller sends it in one piece.
+    """
+    route = current_ai_route()
+    usage = current_ai_usage()
+    audio = open_pcm_audio(audio_file.stream, STT_CHUNK_MIN_SECONDS, remaining_route_budget(route, usage))
+    if audio is None:
+        return None
+    try:
+        if audio.duration < STT_CHUNK_MIN_SECONDS:
+            return None
+        windows = audio_chunk_windows(audio.duration)
+
+        def transcribe_window(index, window):
+            with labelled_ai_route(route, usage):
+                clip = audio.clip(*window)
+                return ai_backend.transcribe((f"chunk-{index}.wav", io.BytesIO(clip), "audio/wav")).text
+
+        with ThreadPoolExecutor(max_workers=max(1, min(len(windows), STT_CHUNK_CONCURRENCY))) as pool:
+            parts = list(pool.map(transcribe_window, range(len(windows)), windows))
+        return stitch_transcripts(parts)
+    finally:
+        audio.close()
+        audio_file.stream.seek(0)
+
+
+def transcribe_upload(audio_file, source_language, chunked=False):
+    """Transcript of an uploaded recording; identical recordings are answered from the transcription cache.
+
+    The spooled upload is hashed and forwarded in chunks, so it is never held in memory whole. With
+    ``chunked`` a long recording is split into overlapping windows that are transcribed in parallel.
+    """
+    audio_digest, audio_bytes = hash_stream(audio_file.stream)
+    cache_key = build_transcription_key(audio_digest, source_language, chunked)
+    transcript = TRANSCRIPTION_CACHE.get(cache_key)
+    if transcript is not None:
+        note_ai_usage(cache_hits=1)
+        return transcript
+
+    def load():
+        text = transcribe_in_chunks(audio_file) if chunked else None
+        if text is None:
+            text = ai_backend.transcribe((audio_file.filename, audio_file.stream, audio_file.content_type)).text
+        TRANSCRIPTION_CACHE.set(cache_key, text, source_language, audio_bytes)
+        return text
+
+    note_ai_usage(cache_misses=1)
+    return TRANSCRIPTION_FLIGHTS.do(cache_key, load)
+
+
+@app.route("/stt_explain", methods=["POST"])
+def stt_explain():
+    if "file" not in request.files:
+        return jsonify({"error": "No file uploaded"}), 400
+    audio_file = request.files["file"]
+    source_language = request.form.get("source_language", "")
+    target_language = request.form.get("target_language", "")
+    chunked = request.form.get("chunked", "").lower() in ("1", "true", "yes")
+    try:
+        text = transcribe_upload(audio_file, source_language, chunked)
+        translation, explanation = perform_explain_translation(text, source_language, target_language)
+        return jsonify({"original": text, "translation": translation, "explanation": explanation})
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return ai_error_response(exc)
+
+
+@app.route("/stt_simple", methods=["POST"])
+def stt_simple():
+    if "file" not in request.files:
+        return jsonify({"error": "No file uploaded"}), 400
+    audio_file = request.files["file"]
+    source_language = request.form.get("source_language", "")
+    target_language = request.form.get("target_language", "")
+    chunked = request.form.get("chunked", "").lower() in ("1", "true", "yes")
+    try:
+        text = transcribe_upload(audio_file, source_language, chunked)
+        translation = perform_simple_translation(text, source_language, target_language)
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return ai_error_response(exc)
+    payload = {"original": text, "translation": translation}
+    if request.form.get("speak", "").lower() in ("1", "true", "yes") and translation:
+        payload.update(build_speech_payload(translation))
+    return jsonify(payload)
+
+
+def simple_translation_events(text, source_language, target_language):
+    translation = perform_simple_translation(text, source_language, target_language)
+    yield "translation", {"delta": translation}
+    yield "done", {"translation": translation}
+
+
+def pending_speech_sentences(translation, spoken, final):
+    """Sentences of a growing translation completed after offset ``spoken``, and the new offset."""
+    segments = split_translation_segments(translation[spoken:])
+    if not final:
+        # The last sentence may still be growing.
+        segments = segments[:-1]
+    sentences = []
+    for sentence, separator in segments:
+        spoken += len(sentence) + len(separator)
+        if sentence.strip():
+            sentences.append(sentence.strip())
+    return sentences, spoken
+
+
+def speech_clip_event(index, clip):
+    try:
+        audio_bytes = clip.result()
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return "audio_error", {"index": index, "audio_error": str(exc)}
+    audio = base64.b64encode(audio_bytes).decode("ascii")
+    return "audio", {"index": index, "audio": audio, "audio_mime_type": "audio/mpeg"}
+
+
+def speech_translation_events(audio_file, source_language, target_language, explain=False, chunked=False, text=None):
+    """(event, payload) pairs for /stt_speak: the transcript, the translation, then its audio clips.
+
+    In explain mode each finished sentence is synthesized while the model is still translating the
+    rest; clips are sent in order as soon as each one is ready. ``text`` skips transcription.
+    """
+    if text is None:
+        text = transcribe_upload(audio_file, source_language, chunked)
+    yield "transcript", {"text": text}
+    if not text.strip():
+        yield "done", {"original": text, "translation": "", "explanation": "", "clips": 0}
+        return
+
+    route = current_ai_route()
+    usage = current_ai_usage()
+
+    def render(sentence):
+        with labelled_ai_route(route, usage):
+            return synthesize_speech(sentence)
+
+    if explain:
+        events = explain_translation_events(text, source_language, target_language)
+    else:
+        events = simple_translation_events(text, source_language, target_language)
+    pool = ThreadPoolExecutor(max_workers=max(1, TTS_SEGMENT_CONCURRENCY))
+    clips = []
+    sent = 0
+    streamed = ""
+    spoken = 0
+    result = {}
+    try:
+        for event, payload in events:
+            if event == "done":
+                result = payload
+                continue
+            yield event, payload
+            if event == "translation" and explain:
+                streamed += payload["delta"]
+                sentences, spoken = pending_speech_sentences(streamed, spoken, final=False)
+                clips.extend(pool.submit(render, sentence) for sentence in sentences)
+            while sent < len(clips) and clips[sent].done():
+                yield speech_clip_event(sent, clips[sent])
+                sent += 1
+
+        translation = result.get("translation", "")
+        if explain:
+            sentences, spoken = pending_speech_sentences(streamed, spoken, final=True)
+        elif translation.strip():
+            sentences = split_speech_segments(translation) or [translation.strip()]
+        else:
+            sentences = []
+        clips.extend(pool.submit(render, sentence) for sentence in sentences)
+        while sent < len(clips):
+            yield speech_clip_event(sent, clips[sent])
+            sent += 1
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    yield "done", {
+        "original": text,
+        "translation": translation,
+        "explanation": result.get("explanation", ""),
+        "clips": len(clips),
+    }
+
+
+@app.route("/stt_speak", methods=["POST"])
+def stt_speak():
+    """Recording in, spoken translation out, as one Server-Sent Events stream.
+
+    ``stream_session`` (a finished /stt_stream session) can stand in for the ``file`` upload.
+    """
+    source_language = request.form.get("source_language", "")
+    target_language = request.form.get("target_language", "")
+    explain = request.form.get("mode", "").lower() == "explain"
+    chunked = request.form.get("chunked", "").lower() in ("1", "true", "yes")
+    audio_file = request.files.get("file")
+    text = None
+    if audio_file is None:
+        session_id = request.form.get("stream_session", "")
+        if not session_id:
+            return jsonify({"error": "No file uploaded"}), 400
+        try:
+            text = STREAMING_TRANSCRIPTIONS.finished_transcript(session_id)
+        except mysql.connector.Error as exc:
+            print(f"[stt-stream] Could not read session {session_id}: {exc}")
+            text = None
+        if text is None:
+            return jsonify({"error": "Unknown or unfinished transcription session"}), 404
+        note_ai_usage(cache_hits=1)
+
+    events = speech_translation_events(audio_file, source_language, target_language, explain, chunked, text)
+    try:
+        first_event = next(events)
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return ai_error_response(exc)
+
+    def generate():
+        yield format_sse_event(*first_event)
+        try:
+            for event, payload in events:
+                yield format_sse_event(event, payload)
+        except Exception as exc:  # pragma: no cover - OpenAI dependency
+            yield format_sse_event("error", {"error": str(exc)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class StreamingTranscription:
+    """One live recording, transcribed while its chunks are still arriving.
+
+    Raw 16-bit PCM is transcribed in the overlapping windows of chunked transcription: each window is
+    sent once, as soon as its audio is complete, and only the unfinished last window is redone for a
+    newer partial, so the final transcript waits on one short call. Other formats can't be cut without
+    decoding the whole recording again, so they get no partials and are transcribed once at the end.
+    Every upstream transcription is charged to the caller's quota bucket for the audio it sends.
+
+    Any worker can take the next chunk: the audio is appended to the session's spool file and the
+    transcript so far, with its finished windows, lives in the stt_stream_sessions row. A refresh
+    claims the row first, so two workers never transcribe the same session at once.
+    """
+
+    def __init__(self, store, row):
+        self.store = store
+        self.id = row["id"]
+        self.language = row["source_language"]
+        self.audio_format = row["audio_format"]
+        self.sample_rate = row["sample_rate"]
+        self.quota = (row["quota_kind"], row["quota_identity"]) if row["quota_kind"] else None
+        self.text = row["transcript"]
+        self.text_size = row["transcript_bytes"]
+        self.path = store.spool_path(self.id)
+
+    @property
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def append(self, stream, chunk_size=64 * 1024):
+        with open(self.path, "ab") as spool:
+            for chunk in iter(lambda: stream.read(chunk_size), b""):
+                spool.write(chunk)
+        self.store.touch(self.id)
+
+    def request_partial(self):
+        """Refresh the transcript in the background unless a refresh is running or ran moments ago."""
+        if self.audio_format != "pcm16" or self.size == self.text_size:
+            return
+        row = self.store.claim_refresh(
+            self.id, remaining_route_budget("stt_stream_partial"), min_gap=STT_STREAM_PARTIAL_SECONDS
+        )
+        if row is not None:
+            STT_STREAM_POOL.submit(self._refresh_in_background, row)
+
+    def _refresh_in_background(self, row):
+        try:
+            with tracked_ai_usage("stt_stream_partial"):
+                self.refresh(row)
+        except QuotaExceededError:
+            # Captions pause until the caller's bucket refills; the final transcript still comes.
+            pass
+        except Exception as exc:  # pragma: no cover - OpenAI dependency
+            print(f"[stt-stream] Partial transcription failed: {exc}")
+
+    def refresh(self, row):
+        """Transcribe everything received so far under the claim on ``row``; stores and returns the transcript."""
+        windows = {float(start): text for start, text in json.loads(row["windows"] or "{}").items()}
+        try:
+            size = self.size
+            if size == row["transcript_bytes"]:
+                text = row["transcript"]
+            elif self.audio_format == "pcm16":
+                with open(self.path, "rb") as spool:
+                    text = self._transcribe_windows(PcmAudio(spool, size // 2, self.sample_rate, 1, 2), windows)
+            else:
+                text = self._transcribe_whole(size)
+        except BaseException:
+            self.store.release(self.id)
+            raise
+        self.store.save_transcript(self.id, text, size, windows)
+        self.text, self.text_size = text, size
+        return text
+
+    def _transcribe_whole(self, size):
+        with open(self.path, "rb") as spool:
+            audio = open_pcm_audio(spool, STT_CHUNK_MIN_SECONDS)
+            if audio is None:
+                self._charge(audio_bytes=size)
+                upload = (f"stream.{self.audio_format}", spool, f"audio/{self.audio_format}")
+                return ai_backend.transcribe(upload).text
+            try:
+                return self._transcribe_windows(audio, {})
+            finally:
+                audio.close()
+
+    def _transcribe_windows(self, audio, finished):
+        # ``finished`` maps window starts to transcripts already sent; complete new windows are added to it.
+        if audio.duration < 0.1:
+            return ""
+        windows = audio_chunk_windows(audio.duration)
+        pending = [window for window in windows if window[0] not in finished]
+        self._charge(audio_seconds=sum(length for _, length in pending))
+        route = current_ai_route()
+        usage = current_ai_usage()
+
+        def transcribe_window(window):
+            start, length = window
+            with labelled_ai_route(route, usage):
+                clip = io.BytesIO(audio.clip(start, length))
+                text = ai_backend.transcribe((f"window-{int(start)}.wav", clip, "audio/wav")).text
+            if length >= STT_CHUNK_SECONDS:
+                finished[start] = text
+            return text
+
+        with ThreadPoolExecutor(max_workers=max(1, min(len(pending), STT_CHUNK_CONCURRENCY))) as pool:
+            fresh = dict(zip(pending, pool.map(transcribe_window, pending)))
+        return stitch_transcripts([finished.get(window[0]) or fresh[window] for window in windows])
+
+    def _charge(self, audio_bytes=0, audio_seconds=0.0):
+        # The session's base unit was paid when it started; each transcription pays for its audio.
+        if AI_QUOTA_ENABLED and self.quota is not None:
+            kind, identity = self.quota
+            cost = estimate_ai_cost(audio_bytes=audio_bytes, audio_seconds=audio_seconds) - 1.0
+            AI_QUOTA.take(kind, identity, current_ai_route(), cost)
+
+    def finish(self):
+        """Final transcript, also stored in the transcription cache for the same recording uploaded whole.
+
+        A partial still running in any worker is waited for, so only the audio it did not cover is sent.
+        """
+        deadline = time.monotonic() + remaining_route_budget(current_ai_route(), current_ai_usage())
+        while True:
+            row = self.store.claim_refresh(self.id, max(deadline - time.monotonic(), 1.0))
+            if row is not None:
+                break
+            if time.monotonic() >= deadline:
+                raise UpstreamTimeoutError(deadline)
+            time.sleep(0.05)
+        text = self.refresh(row)
+        digest = hashlib.sha256()
+        with open(self.path, "rb") as spool:
+            for chunk in iter(lambda: spool.read(64 * 1024), b""):
+                digest.update(chunk)
+        # Sessions transcribe decodable audio in windows, the same as a chunked upload.
+        cache_key = build_transcription_key(digest.hexdigest(), self.language, chunked=True)
+        TRANSCRIPTION_CACHE.set(cache_key, text, self.language, self.text_size)
+        return text
+
+
+class StreamingTranscriptions:
+    """Live transcription sessions shared by every worker: rows in stt_stream_sessions, audio in ``spool_dir``.
+
+    Multi-server deployments put ``spool_dir`` on a shared volume. Idle sessions, and finished ones whose
+    transcript nobody picked up, are dropped after ``idle_seconds``.
+    """
+
+    def __init__(self, spool_dir, max_sessions, idle_seconds):
+        self.spool_dir = spool_dir
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        # Counters of this process; the open sessions are counted across all of them.
+        self.started = 0
+        self.finished = 0
+        self.expired = 0
+
+    def spool_path(self, session_id):
+        return os.path.join(self.spool_dir, f"{session_id}.audio")
+
+    def _execute(self, query, params=(), fetch=False):
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(query, params)
+            result = cursor.fetchall() if fetch else cursor.rowcount
+            conn.commit()
+            return result
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _open_sessions(self):
+        rows = self._execute("SELECT COUNT(*) AS sessions FROM stt_stream_sessions WHERE finished = 0", fetch=True)
+        return rows[0]["sessions"]
+
+    def start(self, language, audio_format, sample_rate, quota=None):
+        """New session, or None when max_sessions are already open across all workers."""
+        self._prune()
+        if self._open_sessions() >= self.max_sessions:
+            return None
+        session_id = uuid.uuid4().hex
+        kind, identity = quota or (None, None)
+        os.makedirs(self.spool_dir, exist_ok=True)
+        open(self.spool_path(session_id), "wb").close()
+        self._execute(
+            """
+            INSERT INTO stt_stream_sessions
+                (id, source_language, audio_format, sample_rate, quota_kind, quota_identity, transcript, touched_at)
+            VALUES (%s, %s, %s, %s, %s, %s, '', %s)
+            """,
+            (session_id, (language or "")[:50], audio_format, sample_rate, kind,
+             None if identity is None else str(identity)[:128], time.time()),
+        )
+        with self._lock:
+            self.started += 1
+        return self.get(session_id)
+
+    def get(self, session_id):
+        rows = self._execute(
+            "SELECT * FROM stt_stream_sessions WHERE id = %s AND finished = 0 AND touched_at >= %s",
+            (session_id, time.time() - self.idle_seconds),
+            fetch=True,
+        )
+        return StreamingTranscription(self, rows[0]) if rows else None
+
+    def touch(self, session_id):
+        self._execute("UPDATE stt_stream_sessions SET touched_at = %s WHERE id = %s", (time.time(), session_id))
+
+    def claim_refresh(self, session_id, lease_seconds, min_gap=0.0):
+        """The session's row, claimed for one refresh, or None while another refresh holds it (or ran within ``min_gap``)."""
+        now = time.time()
+        claimed = self._execute(
+            """
+            UPDATE stt_stream_sessions SET refreshing_until = %s, refreshed_at = %s
+            WHERE id = %s AND finished = 0 AND refreshing_until < %s AND refreshed_at <= %s
+            """,
+            (now + lease_seconds, now, session_id, now, now - min_gap),
+        )
+        if claimed != 1:
+            return None
+        rows = self._execute("SELECT * FROM stt_stream_sessions WHERE id = %s", (session_id,), fetch=True)
+        return rows[0] if rows else None
+
+    def save_transcript(self, session_id, text, size, windows):
+        self._execute(
+            """
+            UPDATE stt_stream_sessions
+            SET transcript = %s, transcript_bytes = %s, windows = %s, refreshing_until = 0
+            WHERE id = %s
+            """,
+            (text, size, json.dumps(windows), session_id),
+        )
+
+    def release(self, session_id):
+        self._execute("UPDATE stt_stream_sessions SET refreshing_until = 0 WHERE id = %s", (session_id,))
+
+    def finish(self, session_id):
+        """Mark the session done; its transcript stays readable by finished_transcript until it expires."""
+        self._execute(
+            "UPDATE stt_stream_sessions SET finished = 1, touched_at = %s WHERE id = %s", (time.time(), session_id)
+        )
+        self._remove_spool(session_id)
+        with self._lock:
+            self.finished += 1
+
+    def finished_transcript(self, session_id):
+        rows = self._execute(
+            "SELECT transcript FROM stt_stream_sessions WHERE id = %s AND finished = 1", (session_id,), fetch=True
+        )
+        return rows[0]["transcript"] if rows else None
+
+    def remove(self, session_id):
+        self._execute("DELETE FROM stt_stream_sessions WHERE id = %s", (session_id,))
+        self._remove_spool(session_id)
+
+    def _remove_spool(self, session_id):
+        try:
+            os.remove(self.spool_path(session_id))
+        except FileNotFoundError:
+            pass
+
+    def _prune(self):
+        cutoff = time.time() - self.idle_seconds
+        idle = self._execute(
+            "SELECT id, finished FROM stt_stream_sessions WHERE touched_at < %s", (cutoff,), fetch=True
+        )
+        expired = 0
+        for row in idle:
+            # Re-checked per row, so a chunk that just arrived keeps its session.
+            if self._execute(
+                "DELETE FROM stt_stream_sessions WHERE id = %s AND touched_at < %s", (row["id"], cutoff)
+            ):
+                self._remove_spool(row["id"])
+                expired += not row["finished"]
+        # Spool files left behind by a worker that died between creating the file and its row.
+        try:
+            with os.scandir(self.spool_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".audio") and entry.stat().st_mtime < cutoff:
+                        self._remove_spool(entry.name[: -len(".audio")])
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self.expired += expired
+
+    def stats(self):
+        try:
+            active = self._open_sessions()
+        except mysql.connector.Error:
+            active = None
+        with self._lock:
+            return {
+                "active": active,
+                "started": self.started,
+                "finished": self.finished,
+                "expired": self.expired,
+            }
+
+
+STT_STREAM_POOL = ThreadPoolExecutor(max_workers=max(1, STT_STREAM_WORKERS), thread_name_prefix="stt-stream")
+STREAMING_TRANSCRIPTIONS = StreamingTranscriptions(STT_STREAM_SPOOL_DIR, STT_STREAM_MAX_SESSIONS, STT_STREAM_IDLE_SECONDS)
+STT_STREAM_FORMAT_PATTERN = re.compile(r"[a-z0-9]{1,16}")
+
+
+def stream_unavailable_response(message):
+    response = jsonify({"error": message})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(AI_RETRY_AFTER_SECONDS)
+    return response
+
+
+@app.route("/stt_stream", methods=["POST"])
+def stt_stream():
+    """Start a live transcription; the recording is then POSTed chunk by chunk to ``chunk_url``."""
+    data = request.get_json(silent=True) or {}
+    audio_format = str(data.get("format") or "webm").lower()
+    if not STT_STREAM_FORMAT_PATTERN.fullmatch(audio_format):
+        return jsonify({"error": "Unsupported audio format"}), 400
+    try:
+        sample_rate = int(data.get("sample_rate") or 16000)
+    except (TypeError, ValueError):
+        sample_rate = 0
+    if not 8000 <= sample_rate <= 48000:
+        return jsonify({"error": "sample_rate must be between 8000 and 48000"}), 400
+
+    try:
+        session = STREAMING_TRANSCRIPTIONS.start(
+            data.get("source_language", ""), audio_format, sample_rate, quota_identity()
+        )
+    except (mysql.connector.Error, OSError) as exc:
+        print(f"[stt-stream] Could not start a session: {exc}")
+        return stream_unavailable_response("Live transcription is unavailable right now. Please try again shortly.")
+    if session is None:
+        return stream_unavailable_response("Too many live transcriptions. Please try again shortly.")
+    chunk_url = url_for("stt_stream_chunk", session_id=session.id)
+    return jsonify({"session_id": session.id, "chunk_url": chunk_url}), 201
+
+
+@app.route("/stt_stream/<session_id>", methods=["POST", "DELETE"])
+def stt_stream_chunk(session_id):
+    """Append the request body to the recording and return the transcript so far.
+
+    ``?final=1`` marks the last chunk (its body may be empty): the response then carries the complete
+    transcript and the session ends. DELETE abandons the session.
+    """
+    try:
+        return stream_chunk_response(session_id)
+    except (mysql.connector.Error, OSError) as exc:
+        print(f"[stt-stream] Session {session_id} failed: {exc}")
+        return stream_unavailable_response("Live transcription is unavailable right now. Please try again shortly.")
+
+
+def stream_chunk_response(session_id):
+    session = STREAMING_TRANSCRIPTIONS.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown or expired transcription session"}), 404
+    if request.method == "DELETE":
+        STREAMING_TRANSCRIPTIONS.remove(session_id)
+        return jsonify({"closed": True})
+
+    # Checked before reading when the chunk's length is known, and again after for chunked bodies.
+    too_large = session.size + (request.content_length or 0) > AUDIO_UPLOAD_MAX_BYTES
+    if not too_large:
+        session.append(request.stream)
+        too_large = session.size > AUDIO_UPLOAD_MAX_BYTES
+    if too_large:
+        STREAMING_TRANSCRIPTIONS.remove(session_id)
+        return request_too_large_response(AUDIO_UPLOAD_MAX_BYTES)
+
+    if request.args.get("final", "").lower() not in ("1", "true", "yes"):
+        session.request_partial()
+        return jsonify({"text": session.text, "final": False, "received_bytes": session.size})
+
+    try:
+        text = session.finish()
+    except QuotaExceededError as exc:
+        # The session stays open, so the final chunk can be retried once the bucket refills.
+        return quota_error_response(exc)
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        STREAMING_TRANSCRIPTIONS.remove(session_id)
+        return ai_error_response(exc)
+    received_bytes = session.size
+    STREAMING_TRANSCRIPTIONS.finish(session_id)
+    return jsonify({"text": text, "final": True, "received_bytes": received_bytes})
+
+
+# Spellings that sound alike in the Philippine languages and English map to one symbol, so the edit
+# distance counts sounds rather than letters (e/i and o/u are allophones in most of them).
+PHONETIC_REWRITES = (
+    (re.compile(r"ñ"), "ny"),
+    (re.compile(r"ng"), "ŋ"),
+    (re.compile(r"ch"), "ts"),
+    (re.compile(r"sh"), "s"),
+    (re.compile(r"(?<=[ptkg])h"), ""),
+    (re.compile(r"c(?=[eiy])"), "s"),
+    (re.compile(r"qu"), "kw"),
+    (re.compile(r"x"), "ks"),
+)
+PHONETIC_EQUIVALENTS = str.maketrans({"c": "k", "q": "k", "f": "p", "v": "b", "z": "s", "e": "i", "o": "u"})
+
+
+def phonetic_key(word):
+    """Sound-alike spelling of a word: diacritics, silent letters, doubled consonants and look-alike sounds folded.
+
+    Doubled vowels are kept: they mark a glottal stop or a separate syllable ("saan" is not "san").
+    """
+    word = unicodedata.normalize("NFC", word).casefold()
+    for pattern, replacement in PHONETIC_REWRITES:
+        word = pattern.sub(replacement, word)
+    word = "".join(ch for ch in unicodedata.normalize("NFKD", word) if ch.isalnum() or ch == "ŋ")
+    word = word.translate(PHONETIC_EQUIVALENTS)
+    return re.sub(r"([^\Waiu\d_])\1+", r"\1", word)
+
+
+def levenshtein(a, b):
+    """Edit distance between two strings with the bit-parallel algorithm (Myers 1999, Hyyrö 2001).
+
+    Each column of the DP table is held in two integer bit vectors, so every character of ``b``
+    updates all of ``a`` with a handful of big-integer operations instead of a Python loop over it.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+    masks = {}
+    for index, ch in enumerate(a):
+        masks[ch] = masks.get(ch, 0) | (1 << index)
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    positive, negative, distance = full, 0, len(a)
+    for ch in b:
+        match = masks.get(ch, 0)
+        vertical = match | negative
+        horizontal = (((match & positive) + positive) ^ positive) | match
+        horizontal_positive = negative | (~(horizontal | positive) & full)
+        horizontal_negative = positive & horizontal
+        if horizontal_positive & last:
+            distance += 1
+        elif horizontal_negative & last:
+            distance -= 1
+        horizontal_positive = ((horizontal_positive << 1) | 1) & full
+        horizontal_negative = (horizontal_negative << 1) & full
+        positive = horizontal_negative | (~(vertical | horizontal_positive) & full)
+        negative = horizontal_positive & vertical
+    return distance
+
+
+def phonetic_distance(a, b):
+    """Edit distance between phonetic keys, normalized to 0 (same sounds) .. 1 (nothing in common)."""
+    longest = max(len(a), len(b))
+    return levenshtein(a, b) / longest if longest else 0.0
+
+
+PRONUNCIATION_WORD_PATTERN = re.compile(r"[\w'’-]+")
+
+
+def pronunciation_words(text):
+    return [word for word in PRONUNCIATION_WORD_PATTERN.findall(text or "") if phonetic_key(word)]
+
+
+def pronunciation_request_words():
+    """Words the current JSON /pronunciation_score request asks to align, each side capped like the scorer caps it."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return 0
+    attempts = data.get("attempts")
+    attempts = attempts[: PRONUNCIATION_BATCH_MAX_ITEMS] if isinstance(attempts, list) else [data]
+    words = 0
+    for item in attempts:
+        if isinstance(item, dict):
+            for field in ("expected", "transcript"):
+                text = item.get(field)
+                if isinstance(text, str):
+                    words += min(len(PRONUNCIATION_WORD_PATTERN.findall(text)), PRONUNCIATION_MAX_WORDS)
+    return words
+
+
+def align_pronunciation(expected_words, heard_words, band=PRONUNCIATION_ALIGN_BAND):
+    """Word alignment minimizing total cost: twice the phonetic distance per paired word, 1 per missing or extra word.
+
+    Pairing two unrelated words costs as much as skipping both, so a dropped word does not shift every later
+    word onto the wrong partner. Returns [(expected index or None, heard index or None, distance)] in reading order.
+
+    Only cells within ``band`` words of the diagonal are filled, so the work grows with words × band rather
+    than words², and each distinct pair of phonetic keys is measured once. Alignments that drift further
+    than ``band`` skipped words from the diagonal are not considered.
+    """
+    expected_keys = [phonetic_key(word) for word in expected_words]
+    heard_keys = [phonetic_key(word) for word in heard_words]
+    rows, cols = len(expected_keys), len(heard_keys)
+    measured = {}
+
+    def distance(i, j):
+        pair = (expected_keys[i], heard_keys[j])
+        value = measured.get(pair)
+        if value is None:
+            value = measured[pair] = phonetic_distance(*pair)
+        return value
+
+    # Wide enough for consecutive rows' bands to touch even when one side is much longer than the other.
+    band = max(band, -(-cols // max(rows, 1)) + 1)
+    cost = [[math.inf] * (cols + 1) for _ in range(rows + 1)]
+    cost[0] = [float(j) for j in range(cols + 1)]
+    for i in range(1, rows + 1):
+        previous, current = cost[i - 1], cost[i]
+        current[0] = float(i)
+        center = i * cols // rows
+        for j in range(max(1, center - band), min(cols, center + band) + 1):
+            current[j] = min(previous[j - 1] + 2 * distance(i - 1, j - 1), previous[j] + 1.0, current[j - 1] + 1.0)
+
+    pairs = []
+    i, j = rows, cols
+    while i or j:
+        if i and j and cost[i][j] == cost[i - 1][j - 1] + 2 * distance(i - 1, j - 1):
+            pairs.append((i - 1, j - 1, distance(i - 1, j - 1)))
+            i, j = i - 1, j - 1
+        elif i and cost[i][j] == cost[i - 1][j] + 1.0:
+            pairs.append((i - 1, None, 1.0))
+            i -= 1
+        else:
+            pairs.append((None, j - 1, 1.0))
+            j -= 1
+    pairs.reverse()
+    return pairs
+
+
+def score_pronunciation(expected, transcript):
+    """Score (0-100) and per-word alignment of a transcript against the phrase the student was asked to say."""
+    expected_words = pronunciation_words(expected)[:PRONUNCIATION_MAX_WORDS]
+    heard_words = pronunciation_words(transcript)
+    pairs = align_pronunciation(expected_words, heard_words[:PRONUNCIATION_MAX_WORDS])
+    # Heard words past the cap are not aligned, but still count as extra so they dilute the score.
+    pairs += [(None, index, 1.0) for index in range(PRONUNCIATION_MAX_WORDS, len(heard_words))]
+    words = []
+    counts = dict.fromkeys(("correct", "close", "mispronounced", "missing", "extra"), 0)
+    for expected_index, heard_index, distance in pairs:
+        if heard_index is None:
+            status = "missing"
+        elif expected_index is None:
+            status = "extra"
+        elif distance == 0:
+            status = "correct"
+        elif 1.0 - distance >= PRONUNCIATION_CLOSE_THRESHOLD:
+            status = "close"
+        else:
+            status = "mispronounced"
+        counts[status] += 1
+        words.append(
+            {
+                "expected": expected_words[expected_index] if expected_index is not None else None,
+                "heard": heard_words[heard_index] if heard_index is not None else None,
+                "status": status,
+                "score": round(100 * (1.0 - distance), 1),
+            }
+        )
+    # Missing words earn nothing and every extra word dilutes the average, so padding cannot raise a score.
+    attempted = len(expected_words) + counts["extra"]
+    score = sum(word["score"] for word in words if word["expected"] and word["heard"]) / attempted if attempted else 0.0
+    return {"score": round(score, 1), "words": words, "counts": counts}
+
+
+def expected_phrase_error(expected, missing_error):
+    """Why ``expected`` can't be scored against, or None."""
+    words = pronunciation_words(expected) if isinstance(expected, str) else []
+    if not words:
+        return missing_error
+    if len(words) > PRONUNCIATION_MAX_WORDS:
+        return f"An expected phrase can have at most {PRONUNCIATION_MAX_WORDS} words"
+    return None
+
+
+def pronunciation_result(item, expected, transcript):
+    result = {"expected": expected, "transcript": transcript, **score_pronunciation(expected, transcript)}
+    if isinstance(item, dict) and "id" in item:
+        result = {"id": item["id"], **result}
+    return result
+
+
+@app.route("/pronunciation_score", methods=["POST"])
+def pronunciation_score():
+    """Score attempts at an expected phrase.
+
+    JSON ``{expected, transcript}`` scores one transcript; ``{attempts: [{id, expected, transcript}]}``
+    scores a batch for teacher review. A multipart form with ``file`` and ``expected`` transcribes the
+    recording first; several ``file`` parts are scored together, against one ``expected`` each or a
+    single shared one.
+    """
+    if request.files:
+        return score_recorded_pronunciation()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Body must be a JSON object"}), 400
+    attempts = data.get("attempts")
+    if attempts is None:
+        expected = data.get("expected")
+        error = expected_phrase_error(expected, "No expected phrase provided")
+        if error:
+            return jsonify({"error": error}), 400
+        transcript = data.get("transcript") if isinstance(data.get("transcript"), str) else ""
+        return jsonify(pronunciation_result(data, expected, transcript))
+
+    if not isinstance(attempts, list) or not attempts:
+        return jsonify({"error": "No attempts provided"}), 400
+    if len(attempts) > PRONUNCIATION_BATCH_MAX_ITEMS:
+        return jsonify({"error": f"A batch can contain at most {PRONUNCIATION_BATCH_MAX_ITEMS} attempts"}), 400
+    results = []
+    for item in attempts:
+        expected = item.get("expected") if isinstance(item, dict) else None
+        error = expected_phrase_error(expected, "Every attempt needs an expected phrase")
+        if error:
+            return jsonify({"error": error}), 400
+        transcript = item.get("transcript") if isinstance(item.get("transcript"), str) else ""
+        results.append(pronunciation_result(item, expected, transcript))
+    return jsonify({"results": results})
+
+
+def score_recorded_pronunciation():
+    audio_files = request.files.getlist("file")
+    expected_phrases = request.form.getlist("expected")
+    source_language = request.form.get("source_language", "")
+    if not audio_files:
+        return jsonify({"error": "No file uploaded"}), 400
+    if len(audio_files) > PRONUNCIATION_BATCH_MAX_ITEMS:
+        return jsonify({"error": f"A batch can contain at most {PRONUNCIATION_BATCH_MAX_ITEMS} attempts"}), 400
+    if len(expected_phrases) == 1:
+        expected_phrases = expected_phrases * len(audio_files)
+    if len(expected_phrases) != len(audio_files):
+        return jsonify({"error": "Provide one expected phrase, or one per file"}), 400
+    for expected in set(expected_phrases):
+        error = expected_phrase_error(expected, "Provide one expected phrase, or one per file")
+        if error:
+            return jsonify({"error": error}), 400
+
+    route = current_ai_route()
+    usage = current_ai_usage()
+
+    def transcribe_one(audio_file):
+        with labelled_ai_route(route, usage):
+            return transcribe_upload(audio_file, source_language)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(len(audio_files), STT_CHUNK_CONCURRENCY))) as pool:
+            transcripts = list(pool.map(transcribe_one, audio_files))
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return ai_error_response(exc)
+    results = [
+        pronunciation_result(None, expected, transcript)
+        for expected, transcript in zip(expected_phrases, transcripts)
+    ]
+    return jsonify(results[0] if len(results) == 1 else {"results": results})
+
+
+def start_background_workers():
+    """Resume queued pre-translation and speech rendering; returns the workers started."""
+    workers = []
+    if PRETRANSLATE_ENABLED and TRANSLATION_CACHE_DB:
+        workers.append(PRETRANSLATION_WORKER)
+    if SPEECH_PRERENDER_ENABLED:
+        workers.append(SPEECH_PRERENDER_WORKER)
+    for worker in workers:
+        worker.schedule()
+    return workers
+
+
+@app.cli.command("queue-workers")
+def run_queue_workers():
+    """Work through the pre-translation and speech pre-render queues until interrupted.
+
+    Run this as one long-lived process next to the web workers, which no longer start the queues on import.
+    """
+    workers = start_background_workers()
+    if SPEECH_PRERENDER_REQUESTED and not TTS_CACHE_SHARED:
+        print(
+            "[queue-workers] Speech pre-rendering is off: set TTS_CACHE_SHARED=true once the web processes "
+            f"share this TTS_CACHE_DIR ({TTS_CACHE_DIR})."
+        )
+    if not workers:
+        print("[queue-workers] Pre-translation and speech pre-rendering are both disabled.")
+        return
+    print(f"[queue-workers] Running {', '.join(worker.name for worker in workers)}.")
+    while True:
+        time.sleep(3600)
 
 
 if __name__ == "__main__":
+    start_background_workers()
     app.run(
         host="0.0.0.0",
         port=443,
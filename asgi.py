@@ -0,0 +1,835 @@
+"""ASGI entry point: asyncio versions of the AI routes mounted in front of the Flask app.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+/translate_simple, /translate_explain, /translate_speak, /tts, /stt_simple and /stt_explain are
+served here with the async OpenAI client, so a request waiting on the model holds a coroutine
+instead of a worker thread. Every other path (pages, /api/*, streaming and batch routes) is passed
+through to the Flask app, which shares configuration, caches, glossary and prompts with this module.
+"""
+
+import asyncio
+import base64
+import random
+import time
+from contextlib import asynccontextmanager
+
+import anyio
+from a2wsgi import WSGIMiddleware
+from itsdangerous import BadSignature
+from openai import APITimeoutError
+from starlette.applications import Starlette
+from starlette.datastructures import Headers
+from starlette.formparsers import MultiPartParser
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+import app as flask_module
+from app import (
+    AI_CHAT_MODEL,
+    AUDIO_UPLOAD_MAX_BYTES,
+    UPLOAD_FORM_OVERHEAD_BYTES,
+    UPLOAD_SPOOL_BYTES,
+    AI_QUOTA,
+    AI_QUOTA_ENABLED,
+    AI_DEADLINE_SECONDS,
+    AI_MAX_RETRIES,
+    AI_RETRY_BASE_SECONDS,
+    AI_RETRY_MAX_SECONDS,
+    AI_ROUTE_DEADLINES,
+    AI_BULKHEAD,
+    AI_TRANSCRIBE_MODEL,
+    AI_TTS_MODEL,
+    AI_TTS_VOICE,
+    AI_USAGE,
+    DIALECT_GLOSSARY,
+    PROXY_FIX_HOPS,
+    STT_CHUNK_CONCURRENCY,
+    STT_CHUNK_MIN_SECONDS,
+    TRANSCRIPTION_CACHE,
+    TRANSLATION_CACHE,
+    TRANSLATION_MEMORY,
+    TRANSLATION_SEGMENT_CONCURRENCY,
+    TRANSLATION_SEGMENT_MIN_CHARS,
+    TTS_CACHE,
+    TTS_CACHE_MAX_AGE_SECONDS,
+    TTS_SEGMENT_CONCURRENCY,
+    TTS_STREAM_CHUNK_BYTES,
+    USAGE_RECORDER,
+    AIUsage,
+    QuotaExceededError,
+    UpstreamBusyError,
+    UpstreamTimeoutError,
+    audio_chunk_windows,
+    build_explain_messages,
+    build_simple_messages,
+    build_transcription_key,
+    build_translation_key,
+    create_ai_backend,
+    estimate_ai_cost,
+    hash_stream,
+    identify_source_language,
+    is_retryable_ai_error,
+    normalize_explain_languages,
+    normalize_simple_languages,
+    note_ai_languages,
+    note_ai_usage,
+    open_pcm_audio,
+    parse_route_settings,
+    parse_translation_response,
+    remaining_route_budget,
+    retry_after_hint,
+    speech_cache_key,
+    split_speech_segments,
+    split_translation_segments,
+    stitch_transcripts,
+    strip_id3_header,
+    untranslated_result,
+)
+
+class AsyncBulkhead:
+    """Admits coroutines to the process-wide app.Bulkhead without blocking the event loop.
+
+    The async routes and the Flask routes mounted behind them share one set of slots and one queue,
+    so ``AI_MAX_CONCURRENCY`` bounds the upstream calls of the whole worker.
+    """
+
+    def __init__(self, bulkhead):
+        self.bulkhead = bulkhead
+
+    @asynccontextmanager
+    async def slot(self, route, timeout=None):
+        bulkhead = self.bulkhead
+        started = time.monotonic()
+        deadline = started + (bulkhead.queue_timeout if timeout is None else min(bulkhead.queue_timeout, timeout))
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+
+        def wake():
+            loop.call_soon_threadsafe(ready.set)
+
+        queued = False
+        try:
+            while True:
+                with bulkhead._condition:
+                    stats = bulkhead._route_stats(route)
+                    if bulkhead.in_flight < bulkhead.max_concurrent:
+                        bulkhead._admit(stats, started)
+                        break
+                    if deadline - time.monotonic() <= 0 or (not queued and bulkhead.waiting >= bulkhead.max_queue):
+                        stats["rejected"] += 1
+                        raise UpstreamBusyError(bulkhead.retry_after)
+                    if not queued:
+                        queued = True
+                        bulkhead.waiting += 1
+                        bulkhead.wakers.add(wake)
+                    ready.clear()
+                try:
+                    await asyncio.wait_for(ready.wait(), max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if queued:
+                with bulkhead._condition:
+                    bulkhead.waiting -= 1
+                    bulkhead.wakers.discard(wake)
+        try:
+            yield
+        finally:
+            bulkhead._release(stats)
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent coroutines sharing a key so only one of them calls the model."""
+
+    def __init__(self):
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader was cancelled (its client left or its deadline passed), not this waiter:
+                # run the call again instead of failing a request that is still being waited on.
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                return await self.do(key, fn)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.executions += 1
+        try:
+            result = await fn()
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved when nobody else was waiting on it.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            # CancelledError is a BaseException, so a cancelled leader skips both branches above.
+            if not future.done():
+                future.cancel()
+            self._calls.pop(key, None)
+
+    def stats(self):
+        return {"in_flight": len(self._calls), "executions": self.executions, "coalesced": self.coalesced}
+
+
+ASYNC_BULKHEAD = AsyncBulkhead(AI_BULKHEAD)
+ASYNC_FLIGHTS = AsyncSingleFlight()
+ASYNC_CLIENT = create_ai_backend().async_client()
+ROUTE_DEADLINES = parse_route_settings(AI_ROUTE_DEADLINES)
+UPSTREAM_STATS = {"calls": 0, "retries": 0, "failures": 0, "deadline_exceeded": 0}
+
+
+async def call_upstream(route, make_call):
+    """Run one model call under the route deadline, adding its tokens and failure to the usage record."""
+    usage = AI_USAGE.get()
+    try:
+        response = await call_with_retries(route, make_call)
+    except Exception as exc:
+        if usage is not None:
+            usage.fail(exc)
+        raise
+    finally:
+        note_ai_usage(upstream_calls=1)
+    if usage is not None:
+        usage.add_tokens(getattr(response, "usage", None))
+    return response
+
+
+async def call_with_retries(route, make_call):
+    """Bulkhead admission and jittered retries within the route deadline, counted from the request start."""
+    budget = ROUTE_DEADLINES.get(route, AI_DEADLINE_SECONDS)
+    usage = AI_USAGE.get()
+    deadline = (usage.started if usage is not None else time.monotonic()) + budget
+    UPSTREAM_STATS["calls"] += 1
+    attempt = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            UPSTREAM_STATS["deadline_exceeded"] += 1
+            raise UpstreamTimeoutError(budget)
+        attempt += 1
+        try:
+            async with ASYNC_BULKHEAD.slot(route, remaining):
+                # Upstream time covers the attempt only, not the queue wait or backoff around it.
+                started = time.monotonic()
+                try:
+                    return await make_call(deadline - time.monotonic())
+                finally:
+                    note_ai_usage(upstream_seconds=time.monotonic() - started)
+        except UpstreamBusyError as exc:
+            if deadline - time.monotonic() <= 0:
+                UPSTREAM_STATS["deadline_exceeded"] += 1
+                raise UpstreamTimeoutError(budget) from exc
+            raise
+        except Exception as exc:
+            if isinstance(exc, APITimeoutError) and deadline - time.monotonic() <= 0.05:
+                UPSTREAM_STATS["deadline_exceeded"] += 1
+                raise UpstreamTimeoutError(budget) from exc
+            backoff = random.uniform(0, min(AI_RETRY_MAX_SECONDS, AI_RETRY_BASE_SECONDS * 2 ** (attempt - 1)))
+            backoff = max(backoff, retry_after_hint(exc) or 0)
+            if attempt > AI_MAX_RETRIES or not is_retryable_ai_error(exc) or time.monotonic() + backoff >= deadline:
+                UPSTREAM_STATS["failures"] += 1
+                raise
+            UPSTREAM_STATS["retries"] += 1
+            await asyncio.sleep(backoff)
+
+
+async def chat_text(route, messages):
+    response = await call_upstream(
+        route,
+        lambda timeout: ASYNC_CLIENT.chat.completions.create(model=AI_CHAT_MODEL, messages=messages, timeout=timeout),
+    )
+    return response.choices[0].message.content or ""
+
+
+async def cached_speech(route, text):
+    """Async twin of app.cached_speech; the same files serve both entry points."""
+    note_ai_usage(characters=len(text))
+    key = speech_cache_key(text)
+    return (key, *await load_speech(route, key, text))
+
+
+async def load_speech(route, key, text):
+    path = await anyio.to_thread.run_sync(TTS_CACHE.get, key)
+    if path is not None:
+        note_ai_usage(cache_hits=1)
+        return path, None
+
+    async def load():
+        stored = await anyio.to_thread.run_sync(TTS_CACHE.get, key, False)
+        if stored is not None:
+            return stored, None
+        response = await call_upstream(
+            route,
+            lambda timeout: ASYNC_CLIENT.audio.speech.create(
+                model=AI_TTS_MODEL, voice=AI_TTS_VOICE, input=text, timeout=timeout
+            ),
+        )
+        audio = await response.aread()
+        try:
+            return await anyio.to_thread.run_sync(TTS_CACHE.put, key, audio), None
+        except OSError as exc:
+            print(f"[tts-cache] Could not store audio: {exc}")
+            return None, audio
+
+    note_ai_usage(cache_misses=1)
+    return await ASYNC_FLIGHTS.do(f"tts:{key}", load)
+
+
+async def stream_speech(route, key, text):
+    """Open the upstream speech stream and return an async iterator of MP3 chunks teed into the audio cache."""
+    manager = None
+
+    async def open_stream(timeout):
+        nonlocal manager
+        manager = ASYNC_CLIENT.audio.speech.with_streaming_response.create(
+            model=AI_TTS_MODEL, voice=AI_TTS_VOICE, input=text, timeout=timeout
+        )
+        return await manager.__aenter__()
+
+    response = await call_upstream(route, open_stream)
+
+    async def chunks():
+        try:
+            async for chunk in response.iter_bytes(TTS_STREAM_CHUNK_BYTES):
+                yield chunk
+        finally:
+            with anyio.CancelScope(shield=True):
+                await manager.__aexit__(None, None, None)
+
+    return tee_into_cache(key, chunks())
+
+
+async def tee_into_cache(key, chunks):
+    """Async twin of app.tee_into_cache."""
+    try:
+        handle, temp_path = await anyio.to_thread.run_sync(TTS_CACHE.begin, key)
+    except OSError as exc:
+        print(f"[tts-cache] Could not store audio: {exc}")
+        handle = None
+    completed = False
+    try:
+        async for chunk in chunks:
+            if handle is not None:
+                try:
+                    await anyio.to_thread.run_sync(handle.write, chunk)
+                except OSError as exc:
+                    print(f"[tts-cache] Could not store audio: {exc}")
+                    await anyio.to_thread.run_sync(TTS_CACHE.abort, handle, temp_path)
+                    handle = None
+            yield chunk
+        completed = True
+    finally:
+        # A client disconnect cancels this task; shield the cleanup so the temp file is still dropped.
+        with anyio.CancelScope(shield=True):
+            await chunks.aclose()
+            if handle is not None and completed:
+                try:
+                    await anyio.to_thread.run_sync(TTS_CACHE.commit, key, handle, temp_path)
+                except OSError as exc:
+                    print(f"[tts-cache] Could not store audio: {exc}")
+            elif handle is not None:
+                await anyio.to_thread.run_sync(TTS_CACHE.abort, handle, temp_path)
+
+
+async def stream_segmented_speech(route, sentences):
+    """Async twin of app.stream_segmented_speech."""
+    limit = asyncio.Semaphore(TTS_SEGMENT_CONCURRENCY)
+
+    async def render(sentence):
+        async with limit:
+            path, audio = await load_speech(route, speech_cache_key(sentence), sentence)
+        return audio if path is None else await anyio.Path(path).read_bytes()
+
+    rest = [asyncio.ensure_future(render(sentence)) for sentence in sentences[1:]]
+    try:
+        first_key = speech_cache_key(sentences[0])
+        first_path = await anyio.to_thread.run_sync(TTS_CACHE.get, first_key)
+        if first_path is not None:
+            note_ai_usage(cache_hits=1)
+            yield await anyio.Path(first_path).read_bytes()
+        else:
+            note_ai_usage(cache_misses=1)
+            first = await stream_speech(route, first_key, sentences[0])
+            try:
+                async for chunk in first:
+                    yield chunk
+            finally:
+                await first.aclose()
+        for task in rest:
+            yield strip_id3_header(await task)
+    finally:
+        for task in rest:
+            task.cancel()
+
+
+async def synthesize_speech(route, text):
+    _, path, audio = await cached_speech(route, text)
+    if path is None:
+        return audio
+    return await anyio.Path(path).read_bytes()
+
+
+async def transcribe_in_chunks(route, stream):
+    """Async twin of app.transcribe_in_chunks."""
+    timeout = remaining_route_budget(route, AI_USAGE.get())
+    audio = await anyio.to_thread.run_sync(open_pcm_audio, stream, STT_CHUNK_MIN_SECONDS, timeout)
+    if audio is None:
+        return None
+    try:
+        if audio.duration < STT_CHUNK_MIN_SECONDS:
+            return None
+        limiter = asyncio.Semaphore(STT_CHUNK_CONCURRENCY)
+
+        async def transcribe_window(index, window):
+            async with limiter:
+                clip = await anyio.to_thread.run_sync(audio.clip, *window)
+                response = await call_upstream(
+                    route,
+                    lambda timeout: ASYNC_CLIENT.audio.transcriptions.create(
+                        model=AI_TRANSCRIBE_MODEL, file=(f"chunk-{index}.wav", clip, "audio/wav"), timeout=timeout
+                    ),
+                )
+                return response.text
+
+        windows = audio_chunk_windows(audio.duration)
+        parts = await asyncio.gather(*(transcribe_window(index, window) for index, window in enumerate(windows)))
+        return stitch_transcripts(parts)
+    finally:
+        audio.close()
+        stream.seek(0)
+
+
+async def transcribe(route, upload, language, chunked=False):
+    """Async twin of app.transcribe_upload."""
+    audio_digest, audio_bytes = await anyio.to_thread.run_sync(hash_stream, upload.file)
+    cache_key = build_transcription_key(audio_digest, language, chunked)
+    transcript = await anyio.to_thread.run_sync(TRANSCRIPTION_CACHE.get, cache_key)
+    if transcript is not None:
+        note_ai_usage(cache_hits=1)
+        return transcript
+
+    async def load():
+        text = await transcribe_in_chunks(route, upload.file) if chunked else None
+        if text is None:
+            response = await call_upstream(
+                route,
+                lambda timeout: ASYNC_CLIENT.audio.transcriptions.create(
+                    model=AI_TRANSCRIBE_MODEL, file=(upload.filename, upload.file, upload.content_type), timeout=timeout
+                ),
+            )
+            text = response.text
+        await anyio.to_thread.run_sync(TRANSCRIPTION_CACHE.set, cache_key, text, language, audio_bytes)
+        return text
+
+    note_ai_usage(cache_misses=1)
+    return await ASYNC_FLIGHTS.do(f"stt:{cache_key}", load)
+
+
+async def run_cached_translation(mode, text, source, target, fetch, source_detected=False):
+    """Async twin of app.run_cached_translation; cache and memory I/O runs on worker threads."""
+    cache_key = build_translation_key(mode, text, source, target)
+    cached = await anyio.to_thread.run_sync(TRANSLATION_CACHE.get, cache_key)
+    if cached is not None:
+        note_ai_usage(cache_hits=1)
+        return cached
+    match = await anyio.to_thread.run_sync(TRANSLATION_MEMORY.lookup, mode, text, source, target)
+    if TRANSLATION_MEMORY.exact(match):
+        note_ai_usage(cache_hits=1)
+        return match[2]
+    reference = match[1:] if match else None
+    fetched = []
+
+    async def load():
+        fetched.append(True)
+        value = await fetch(reference)
+        await anyio.to_thread.run_sync(
+            TRANSLATION_CACHE.set, cache_key, value, mode, text, source, target, source_detected
+        )
+        return value
+
+    value = await ASYNC_FLIGHTS.do(cache_key, load)
+    if fetched:
+        note_ai_usage(cache_misses=1)
+    else:
+        note_ai_usage(cache_hits=1)
+    return value
+
+
+async def perform_simple_translation(route, text, source_language, target_language):
+    source, target = normalize_simple_languages(source_language, target_language)
+    source, auto_detect, untranslated, source_detected = await anyio.to_thread.run_sync(
+        identify_source_language, text, source, target, source.lower() == "auto"
+    )
+    prompt_source = "auto" if auto_detect else source
+    note_ai_languages(source, target)
+    note_ai_usage(characters=len(text))
+    glossary_entry = await anyio.to_thread.run_sync(
+        DIALECT_GLOSSARY.lookup, text, None if auto_detect else source, target
+    )
+    if glossary_entry is None and untranslated:
+        glossary_entry = untranslated_result(text, target)
+    if glossary_entry is not None:
+        note_ai_usage(cache_hits=1)
+        return glossary_entry[0]
+
+    async def translate(segment):
+        return await run_cached_translation(
+            "simple",
+            segment,
+            source,
+            target,
+            lambda reference: chat_text(route, build_simple_messages(segment, prompt_source, target, reference)),
+            source_detected,
+        )
+
+    if len(text) > TRANSLATION_SEGMENT_MIN_CHARS:
+        segments = split_translation_segments(text)
+        if len(segments) > 1:
+            limiter = asyncio.Semaphore(TRANSLATION_SEGMENT_CONCURRENCY)
+            unique = [sentence for sentence in dict.fromkeys(sentence for sentence, _ in segments) if sentence.strip()]
+
+            async def translate_limited(sentence):
+                async with limiter:
+                    return await translate(sentence)
+
+            translated = dict(zip(unique, await asyncio.gather(*(translate_limited(item) for item in unique))))
+            return "".join(translated.get(sentence, sentence) + separator for sentence, separator in segments)
+    return await translate(text)
+
+
+async def perform_explain_translation(route, text, source_language, target_language):
+    source, target, auto_detect = normalize_explain_languages(source_language, target_language)
+    glossary_source = None if auto_detect else source
+    source, auto_detect, untranslated, source_detected = await anyio.to_thread.run_sync(
+        identify_source_language, text, source, target, auto_detect
+    )
+    note_ai_languages(source, target)
+    note_ai_usage(characters=len(text))
+    glossary_entry = await anyio.to_thread.run_sync(DIALECT_GLOSSARY.lookup, text, glossary_source, target)
+    if glossary_entry is None and untranslated:
+        glossary_entry = untranslated_result(text, target)
+    if glossary_entry is not None:
+        note_ai_usage(cache_hits=1)
+        return glossary_entry
+
+    async def fetch(reference):
+        raw = await chat_text(route, build_explain_messages(text, source, target, auto_detect, reference))
+        return parse_translation_response(raw)
+
+    return await run_cached_translation("explain", text, source, target, fetch, source_detected)
+
+
+def error_response(exc):
+    if isinstance(exc, QuotaExceededError):
+        return JSONResponse({"error": str(exc)}, status_code=429, headers={"Retry-After": str(exc.retry_after)})
+    if isinstance(exc, UpstreamBusyError):
+        return JSONResponse({"error": str(exc)}, status_code=503, headers={"Retry-After": str(exc.retry_after)})
+    if isinstance(exc, UpstreamTimeoutError):
+        return JSONResponse({"error": str(exc)}, status_code=504)
+    return JSONResponse({"error": str(exc)}, status_code=500)
+
+
+async def read_json(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def speech_payload(route, text):
+    try:
+        audio_bytes = await synthesize_speech(route, text)
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return {"audio": None, "audio_error": str(exc)}
+    return {"audio": base64.b64encode(audio_bytes).decode("ascii"), "audio_mime_type": "audio/mpeg"}
+
+
+async def translate_simple(request):
+    data = await read_json(request)
+    text = data.get("text", "")
+    if not text:
+        return JSONResponse({"error": "No text provided"}, status_code=400)
+    try:
+        translation = await perform_simple_translation(
+            "translate_simple", text, data.get("source_language", ""), data.get("target_language", "")
+        )
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return error_response(exc)
+    return JSONResponse({"translation": translation})
+
+
+async def translate_explain(request):
+    data = await read_json(request)
+    text = data.get("text", "")
+    if not text:
+        return JSONResponse({"error": "No text provided"}, status_code=400)
+    try:
+        translation, explanation = await perform_explain_translation(
+            "translate_explain", text, data.get("source_language", ""), data.get("target_language", "")
+        )
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return error_response(exc)
+    return JSONResponse({"translation": translation, "explanation": explanation})
+
+
+async def translate_speak(request):
+    data = await read_json(request)
+    text = data.get("text", "")
+    if not text:
+        return JSONResponse({"error": "No text provided"}, status_code=400)
+    try:
+        translation = await perform_simple_translation(
+            "translate_speak", text, data.get("source_language", ""), data.get("target_language", "")
+        )
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return error_response(exc)
+    return JSONResponse({"translation": translation, **await speech_payload("translate_speak", translation)})
+
+
+async def tts(request):
+    data = await read_json(request)
+    text = data.get("text", "")
+    if not isinstance(text, str):
+        return JSONResponse({"error": "text must be a string"}, status_code=400)
+    if not text:
+        return JSONResponse({"error": "No text provided"}, status_code=400)
+    note_ai_usage(characters=len(text))
+    key = speech_cache_key(text)
+    path = await anyio.to_thread.run_sync(TTS_CACHE.get, key)
+    if path is None:
+        note_ai_usage(cache_misses=1)
+        sentences = split_speech_segments(text)
+        try:
+            if sentences:
+                chunks = tee_into_cache(key, stream_segmented_speech("tts", sentences))
+                first_chunk = await anext(chunks, b"")
+            else:
+                chunks = await stream_speech("tts", key, text)
+                first_chunk = b""
+        except Exception as exc:  # pragma: no cover - OpenAI dependency
+            return error_response(exc)
+
+        async def body():
+            if first_chunk:
+                yield first_chunk
+            async for chunk in chunks:
+                yield chunk
+
+        headers = {"Cache-Control": "no-cache", "Content-Location": f"/tts/audio/{key}.mp3", "X-Accel-Buffering": "no"}
+        return StreamingResponse(body(), media_type="audio/mpeg", headers=headers)
+    note_ai_usage(cache_hits=1)
+    headers = {
+        "ETag": f'"{key}"',
+        "Cache-Control": f"public, max-age={TTS_CACHE_MAX_AGE_SECONDS}, immutable",
+        "Content-Location": f"/tts/audio/{key}.mp3",
+    }
+    return FileResponse(path, media_type="audio/mpeg", headers=headers)
+
+
+async def stt_explain(request):
+    form = await request.form()
+    upload = form.get("file")
+    if upload is None or isinstance(upload, str):
+        return JSONResponse({"error": "No file uploaded"}, status_code=400)
+    try:
+        chunked = (form.get("chunked") or "").lower() in ("1", "true", "yes")
+        text = await transcribe("stt_explain", upload, form.get("source_language", ""), chunked)
+        translation, explanation = await perform_explain_translation(
+            "stt_explain", text, form.get("source_language", ""), form.get("target_language", "")
+        )
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return error_response(exc)
+    return JSONResponse({"original": text, "translation": translation, "explanation": explanation})
+
+
+async def stt_simple(request):
+    form = await request.form()
+    upload = form.get("file")
+    if upload is None or isinstance(upload, str):
+        return JSONResponse({"error": "No file uploaded"}, status_code=400)
+    try:
+        chunked = (form.get("chunked") or "").lower() in ("1", "true", "yes")
+        text = await transcribe("stt_simple", upload, form.get("source_language", ""), chunked)
+        translation = await perform_simple_translation(
+            "stt_simple", text, form.get("source_language", ""), form.get("target_language", "")
+        )
+    except Exception as exc:  # pragma: no cover - OpenAI dependency
+        return error_response(exc)
+    payload = {"original": text, "translation": translation}
+    if (form.get("speak") or "").lower() in ("1", "true", "yes") and translation:
+        payload.update(await speech_payload("stt_simple", translation))
+    return JSONResponse(payload)
+
+
+def asgi_stats():
+    return {
+        "singleflight": ASYNC_FLIGHTS.stats(),
+        "upstream_calls": dict(UPSTREAM_STATS),
+    }
+
+
+flask_module.AI_METRICS_PROVIDERS["asgi"] = asgi_stats
+
+# Flask-Cors already answers for the mounted app, so CORS is added per route here to avoid
+# duplicate headers; OPTIONS is listed so preflight requests reach the middleware.
+AI_ROUTE_MIDDLEWARE = [Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])]
+
+
+SESSION_SERIALIZER = flask_module.app.session_interface.get_signing_serializer(flask_module.app)
+
+
+def session_user_id(request):
+    """user_id from the Flask session cookie, so quotas follow the same login on both servers."""
+    cookie = request.cookies.get(flask_module.app.config["SESSION_COOKIE_NAME"])
+    if not cookie or SESSION_SERIALIZER is None:
+        return None
+    try:
+        return SESSION_SERIALIZER.loads(cookie).get("user_id")
+    except BadSignature:
+        return None
+
+
+def client_address(request):
+    """Client IP for per-IP quotas, read from X-Forwarded-For the same way app.py's ProxyFix does."""
+    peer = request.client.host if request.client else "unknown"
+    if PROXY_FIX_HOPS <= 0:
+        return peer
+    forwarded = [value.strip() for value in ",".join(request.headers.getlist("x-forwarded-for")).split(",")]
+    forwarded = [value for value in forwarded if value]
+    return forwarded[-PROXY_FIX_HOPS] if len(forwarded) >= PROXY_FIX_HOPS else peer
+
+
+async def request_cost(route, request):
+    """Same weighting as app.current_request_cost."""
+    if route in ("stt_simple", "stt_explain"):
+        return estimate_ai_cost(audio_bytes=int(request.headers.get("content-length") or 0))
+    data = await read_json(request)
+    if route == "translate_batch":
+        texts = data.get("texts") if isinstance(data.get("texts"), list) else []
+        return estimate_ai_cost(characters=sum(len(text) for text in texts if isinstance(text, str)))
+    text = data.get("text") if isinstance(data.get("text"), str) else ""
+    return estimate_ai_cost(characters=len(text) * (2 if route == "translate_speak" else 1))
+
+
+async def charge_quota(route, request):
+    user_id = session_user_id(request)
+    kind, identity = ("user", user_id) if user_id else ("ip", client_address(request))
+    cost = await request_cost(route, request)
+    if AI_QUOTA.store.blocking:
+        await anyio.to_thread.run_sync(AI_QUOTA.take, kind, identity, route, cost)
+    else:
+        AI_QUOTA.take(kind, identity, route, cost)
+
+
+def tracked(endpoint):
+    """Charge the caller's quota and collect the handler's AI calls into one usage record, like the Flask hooks."""
+
+    async def handler(request):
+        if request.method != "POST":
+            return await endpoint(request)
+        usage = AIUsage(endpoint.__name__)
+        token = AI_USAGE.set(usage)
+        try:
+            if AI_QUOTA_ENABLED:
+                try:
+                    await charge_quota(endpoint.__name__, request)
+                except QuotaExceededError as exc:
+                    usage.status = 429
+                    return error_response(exc)
+            response = await endpoint(request)
+            usage.status = response.status_code
+            return response
+        except Exception as exc:
+            usage.fail(exc)
+            raise
+        finally:
+            AI_USAGE.reset(token)
+            USAGE_RECORDER.record(usage)
+
+    return handler
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+class UploadLimitMiddleware:
+    """Per-route body limit: rejects from Content-Length up front, and stops chunked bodies once they pass it."""
+
+    def __init__(self, app, max_bytes):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            return await self.reject(scope, receive, send)
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise UploadTooLargeError()
+            return message
+
+        async def tracked_send(message):
+            nonlocal started
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except UploadTooLargeError:
+            if started:
+                raise
+            await self.reject(scope, receive, send)
+
+    async def reject(self, scope, receive, send):
+        message = f"Upload exceeds the {self.max_bytes // (1024 * 1024)} MB limit."
+        await JSONResponse({"error": message}, status_code=413)(scope, receive, send)
+
+
+def ai_route(path, endpoint, max_upload_bytes=None):
+    middleware = list(AI_ROUTE_MIDDLEWARE)
+    if max_upload_bytes:
+        middleware.append(Middleware(UploadLimitMiddleware, max_bytes=max_upload_bytes))
+    return Route(path, tracked(endpoint), methods=["POST", "OPTIONS"], middleware=middleware)
+
+
+MultiPartParser.spool_max_size = UPLOAD_SPOOL_BYTES
+AUDIO_ROUTE_MAX_BYTES = AUDIO_UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD_BYTES
+
+
+application = Starlette(
+    routes=[
+        ai_route("/translate_simple", translate_simple),
+        ai_route("/translate_explain", translate_explain),
+        ai_route("/translate_speak", translate_speak),
+        ai_route("/tts", tts),
+        ai_route("/stt_explain", stt_explain, max_upload_bytes=AUDIO_ROUTE_MAX_BYTES),
+        ai_route("/stt_simple", stt_simple, max_upload_bytes=AUDIO_ROUTE_MAX_BYTES),
+        Mount("/", app=WSGIMiddleware(flask_module.app)),
+    ],
+)
@@ -0,0 +1,228 @@
+"""Closed-loop load generator for the AI routes.
+
+Start scripts/fake_openai_server.py and the app with AI_BACKEND=fake (and AI_QUOTA_ENABLED=false,
+since every request comes from one client IP), then:
+
+    python scripts/bench_ai_routes.py --route translate_simple --concurrency 32 --requests 500
+
+Texts are drawn from a small pool (--unique) so cache and coalescing behaviour
+shows up in the numbers; pass --unique 0 to make every request distinct.
+
+To compare the Flask (sync) and ASGI (asyncio) serving paths, run both against the same fake
+server and pass the second one with --compare-url:
+
+    python scripts/bench_ai_routes.py --base-url http://127.0.0.1:5000 \
+        --compare-url http://127.0.0.1:5001 --concurrency 200 --requests 2000 --unique 0
+
+For the stt routes, --audio-seconds uploads WAV recordings of that length instead of opaque bytes;
+with the fake server's --stt-realtime-factor this shows the effect of --chunked (parallel
+transcription of overlapping windows) on long recordings:
+
+    python scripts/bench_ai_routes.py --route stt_simple --audio-seconds 180 --concurrency 1 --requests 5 --unique 0
+    python scripts/bench_ai_routes.py --route stt_simple --audio-seconds 180 --concurrency 1 --requests 5 --unique 0 --chunked
+
+--route stt_stream sends each recording to the live transcription endpoint as raw 16-bit PCM in
+--chunk-seconds pieces, paced like a microphone (--pace 0 sends them back to back); "latency" is
+then the wait for the final transcript after the last chunk:
+
+    python scripts/bench_ai_routes.py --route stt_stream --audio-seconds 60 --concurrency 4 --requests 8 --unique 0
+"""
+
+import argparse
+import array
+import io
+import json
+import statistics
+import threading
+import time
+import uuid
+import wave
+from urllib import error, request
+
+SAMPLE_TEXTS = [
+    "Good morning, teacher.",
+    "Where is the library?",
+    "Thank you very much for your help.",
+    "Let's eat together after class.",
+    "How do you say this word in our dialect?",
+    "The rain poured down during the journey.",
+]
+
+
+def build_wav(seconds, seed):
+    """16 kHz mono WAV whose half-second blocks each hold a distinct sample value (see the fake server)."""
+    block = 8000
+    samples = array.array("h")
+    for index in range(int(seconds * 2)):
+        samples.extend([1 + (seed * 7919 + index) % 32000] * block)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(16000)
+        writer.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def build_request(base_url, route, text, audio_bytes, chunked=False):
+    if route in ("translate_simple", "translate_explain", "translate_explain_stream"):
+        body = json.dumps({"text": text, "source_language": "English", "target_language": "Cebuano"}).encode("utf-8")
+        return request.Request(f"{base_url}/{route}", data=body, headers={"Content-Type": "application/json"})
+    if route == "tts":
+        body = json.dumps({"text": text}).encode("utf-8")
+        return request.Request(f"{base_url}/tts", data=body, headers={"Content-Type": "application/json"})
+    if route in ("stt_simple", "stt_explain"):
+        boundary = uuid.uuid4().hex
+        fields = {"target_language": "Tagalog", **({"chunked": "true"} if chunked else {})}
+        filename, content_type = ("speech.wav", "audio/wav") if audio_bytes[:4] == b"RIFF" else ("speech.webm", "audio/webm")
+        parts = [
+            *(
+                f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n".encode("utf-8")
+                for name, value in fields.items()
+            ),
+            (
+                f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+                f"Content-Type: {content_type}\r\n\r\n"
+            ).encode("utf-8")
+            + audio_bytes
+            + b"\r\n",
+            f"--{boundary}--\r\n".encode("utf-8"),
+        ]
+        return request.Request(
+            f"{base_url}/{route}",
+            data=b"".join(parts),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+    raise SystemExit(f"Unsupported route: {route}")
+
+
+def stream_recording(base_url, wav_bytes, options):
+    """Live-transcribe one recording chunk by chunk; returns the seconds from the last chunk to the final transcript."""
+    with wave.open(io.BytesIO(wav_bytes), "rb") as reader:
+        rate = reader.getframerate()
+        pcm = reader.readframes(reader.getnframes())
+    body = json.dumps({"format": "pcm16", "sample_rate": rate, "source_language": "Cebuano"}).encode("utf-8")
+    start = request.Request(f"{base_url}/stt_stream", data=body, headers={"Content-Type": "application/json"})
+    with request.urlopen(start, timeout=options.timeout) as response:
+        chunk_url = base_url + json.load(response)["chunk_url"]
+    step = int(rate * options.chunk_seconds) * 2
+    for offset in range(0, len(pcm), step):
+        chunk = request.Request(chunk_url, data=pcm[offset:offset + step], headers={"Content-Type": "audio/pcm"})
+        request.urlopen(chunk, timeout=options.timeout).read()
+        time.sleep(options.chunk_seconds * options.pace)
+    started = time.perf_counter()
+    final = request.Request(f"{chunk_url}?final=1", data=b"", headers={"Content-Type": "audio/pcm"})
+    with request.urlopen(final, timeout=options.timeout) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_load(base_url, options):
+    counter = {"next": 0}
+    lock = threading.Lock()
+    latencies = []
+    first_byte = []
+    statuses = {}
+    audio_bytes = b"\x1aE\xdf\xa3" + b"\x00" * max(0, options.audio_bytes - 4)
+    run_tag = uuid.uuid4().hex[:6]
+
+    def worker():
+        while True:
+            with lock:
+                index = counter["next"]
+                if index >= options.requests:
+                    return
+                counter["next"] += 1
+            if options.unique:
+                text = SAMPLE_TEXTS[index % min(options.unique, len(SAMPLE_TEXTS))]
+            else:
+                text = f"{SAMPLE_TEXTS[index % len(SAMPLE_TEXTS)]} #{run_tag}-{index}"
+            upload = audio_bytes
+            if options.audio_seconds:
+                seed = index % options.unique if options.unique else hash((run_tag, index)) % 32000
+                upload = build_wav(options.audio_seconds, seed)
+            started = time.perf_counter()
+            ttfb = None
+            final_wait = None
+            try:
+                if options.route == "stt_stream":
+                    final_wait = stream_recording(base_url, upload, options)
+                    status = 200
+                else:
+                    req = build_request(base_url, options.route, text, upload, options.chunked)
+                    with request.urlopen(req, timeout=options.timeout) as response:
+                        response.read(1)
+                        ttfb = time.perf_counter() - started
+                        response.read()
+                        status = response.status
+            except error.HTTPError as exc:
+                status = exc.code
+            except OSError:
+                status = "error"
+            elapsed = time.perf_counter() - started if final_wait is None else final_wait
+            with lock:
+                latencies.append(elapsed)
+                if ttfb is not None:
+                    first_byte.append(ttfb)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    threads = [threading.Thread(target=worker) for _ in range(options.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    print(f"[{base_url}]")
+    print(f"route={options.route} requests={len(latencies)} concurrency={options.concurrency} wall={wall:.2f}s")
+    print(f"throughput={len(latencies) / wall:.1f} req/s statuses={statuses}")
+    if latencies:
+        print(
+            "latency  p50={:.3f}s p95={:.3f}s p99={:.3f}s mean={:.3f}s".format(
+                percentile(latencies, 0.50),
+                percentile(latencies, 0.95),
+                percentile(latencies, 0.99),
+                statistics.mean(latencies),
+            )
+        )
+    if first_byte:
+        print(
+            "ttfb     p50={:.3f}s p95={:.3f}s".format(percentile(first_byte, 0.50), percentile(first_byte, 0.95))
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--compare-url", default=None, help="Run the same load against a second server")
+    parser.add_argument("--route", default="translate_simple")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--unique", type=int, default=len(SAMPLE_TEXTS), help="Size of the text pool (0 = all unique)")
+    parser.add_argument("--audio-bytes", type=int, default=64 * 1024, help="Upload size for stt routes")
+    parser.add_argument("--audio-seconds", type=float, default=0, help="Upload WAV recordings of this length instead")
+    parser.add_argument("--chunked", action="store_true", help="Ask the stt routes for chunked transcription")
+    parser.add_argument("--chunk-seconds", type=float, default=1.0, help="Audio per request for stt_stream")
+    parser.add_argument("--pace", type=float, default=1.0, help="stt_stream send rate relative to real time (0 = no wait)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    options = parser.parse_args()
+    if options.route == "stt_stream" and not options.audio_seconds:
+        parser.error("--route stt_stream needs --audio-seconds")
+
+    run_load(options.base_url, options)
+    if options.compare_url:
+        print()
+        run_load(options.compare_url, options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Local OpenAI-compatible fake server for offline load tests of the AI routes.
+
+Run it, then start the app with AI_BACKEND=fake (and AI_FAKE_SERVER_URL if the
+port differs) so /translate_*, /tts and /stt_* exercise the full request path
+without network access or API spend:
+
+    python scripts/fake_openai_server.py --port 8089 \
+        --chat-latency lognormal:0.8,0.4 --tts-latency uniform:0.3,1.2 --tts-bytes-per-second 16000 \
+        --error-rate 0.02
+
+WAV uploads take --stt-realtime-factor seconds per second of audio on top of --stt-latency and are
+"recognized" as one word per half second, named after that block's first sample value, so the
+transcript of any window of a recording is a predictable slice of the whole one.
+
+Latency specs: fixed:<s>, uniform:<low>,<high>, normal:<mean>,<stddev>,
+lognormal:<median>,<sigma> (all in seconds).
+"""
+
+import argparse
+import array
+import hashlib
+import io
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def parse_latency(spec):
+    kind, _, raw_args = (spec or "fixed:0").partition(":")
+    args = [float(value) for value in raw_args.split(",") if value.strip()]
+    kind = kind.strip().lower()
+    if kind == "fixed":
+        return lambda: args[0] if args else 0.0
+    if kind == "uniform":
+        return lambda: random.uniform(args[0], args[1])
+    if kind == "normal":
+        return lambda: max(0.0, random.gauss(args[0], args[1]))
+    if kind == "lognormal":
+        return lambda: random.lognormvariate(math.log(args[0]), args[1])
+    raise argparse.ArgumentTypeError(f"Unknown latency distribution: {spec}")
+
+
+class FakeState:
+    def __init__(self, options):
+        self.chat_latency = parse_latency(options.chat_latency)
+        self.first_token_latency = parse_latency(options.first_token_latency)
+        self.tts_latency = parse_latency(options.tts_latency)
+        self.stt_latency = parse_latency(options.stt_latency)
+        self.error_rate = options.error_rate
+        self.rate_limit_rate = options.rate_limit_rate
+        self.tokens_per_second = options.tokens_per_second
+        self.tts_bytes_per_second = options.tts_bytes_per_second
+        self.stt_realtime_factor = options.stt_realtime_factor
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def pick_failure(self):
+        roll = random.random()
+        if roll < self.rate_limit_rate:
+            return 429, "rate_limit_exceeded", "Fake rate limit reached."
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500, "server_error", "Fake upstream failure."
+        return None
+
+
+def extract_user_text(messages):
+    content = ""
+    for message in messages or []:
+        if message.get("role") == "user":
+            content = message.get("content") or ""
+    match = re.search(r"^Text: (.*)", content, flags=re.MULTILINE | re.DOTALL)
+    return match.group(1) if match else content
+
+
+def build_chat_reply(payload):
+    messages = payload.get("messages") or []
+    system_prompt = " ".join(m.get("content") or "" for m in messages if m.get("role") == "system")
+    target_match = re.search(r"Translate [^.]*?(?:into| to) ([A-Za-z -]+?)\.", system_prompt)
+    target = target_match.group(1) if target_match else "Target"
+
+    if (payload.get("response_format") or {}).get("type") == "json_object":
+        try:
+            items = json.loads(messages[-1].get("content") or "{}").get("items") or []
+        except ValueError:
+            items = []
+        translations = [
+            {
+                "id": item.get("id"),
+                "translation": f"[{target}] {item.get('text', '')}",
+                "explanation": "Fake usage note.",
+            }
+            for item in items
+        ]
+        return json.dumps({"translations": translations}, ensure_ascii=False)
+
+    text = extract_user_text(messages)
+    if "Explanation:" in system_prompt:
+        return f"Translation: [{target}] {text}\nExplanation: Fake usage note for {len(text)} characters."
+    return f"[{target}] {text}"
+
+
+def read_wav_upload(body):
+    """(duration seconds, transcript) for a multipart upload holding a 16-bit WAV, or None."""
+    start = body.find(b"RIFF")
+    if start < 0:
+        return None
+    try:
+        with wave.open(io.BytesIO(body[start:]), "rb") as reader:
+            rate, channels = reader.getframerate(), reader.getnchannels()
+            samples = array.array("h", reader.readframes(reader.getnframes()))
+    except (wave.Error, EOFError):
+        return None
+    block = max(1, rate // 2) * channels
+    words = [f"w{samples[offset]}" for offset in range(0, len(samples), block) if samples[offset] > 0]
+    return len(samples) / channels / rate, " ".join(words)
+
+
+def fake_mp3_bytes(text, voice):
+    # Not decodable audio, but deterministic and sized roughly like real speech output.
+    seed = hashlib.sha256(f"{voice}:{text}".encode("utf-8")).digest()
+    frame = b"\xff\xfb\x90\x64" + seed * 13
+    return b"ID3\x03\x00\x00\x00\x00\x00\x00" + frame * max(4, len(text) * 2)
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, format, *args):  # noqa: A002 - signature defined by BaseHTTPRequestHandler
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            with self.state.lock:
+                body = dict(self.state.counts)
+            return self.send_json(200, body)
+        return self.send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        path = self.path.split("?", 1)[0].rstrip("/")
+
+        if path.endswith("/chat/completions"):
+            return self.handle_chat(body)
+        if path.endswith("/audio/speech"):
+            return self.handle_speech(body)
+        if path.endswith("/audio/transcriptions"):
+            return self.handle_transcription(body)
+        return self.send_json(404, {"error": {"message": f"Unknown route {path}", "type": "invalid_request_error"}})
+
+    def fail_if_unlucky(self, name):
+        failure = self.state.pick_failure()
+        if not failure:
+            return False
+        status, code, message = failure
+        self.state.count(f"{name}_errors")
+        self.send_json(status, {"error": {"message": message, "type": code, "code": code}})
+        return True
+
+    def handle_chat(self, body):
+        self.state.count("chat")
+        payload = json.loads(body or b"{}")
+        if self.fail_if_unlucky("chat"):
+            return
+
+        reply = build_chat_reply(payload)
+        model = payload.get("model") or "fake-chat"
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        prompt_tokens = sum(len((m.get("content") or "").split()) for m in payload.get("messages") or [])
+        completion_tokens = max(1, len(reply.split()))
+
+        if not payload.get("stream"):
+            time.sleep(self.state.chat_latency())
+            return self.send_json(
+                200,
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                },
+            )
+
+        time.sleep(self.state.first_token_latency())
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        token_delay = 1.0 / self.state.tokens_per_second if self.state.tokens_per_second > 0 else 0
+        pieces = re.findall(r"\S+\s*|\s+", reply)
+        for piece in pieces:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+            self.write_chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            if token_delay:
+                time.sleep(token_delay)
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        self.write_chunk(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+        self.write_chunk(b"data: [DONE]\n\n")
+        self.write_chunk(b"")
+
+    def handle_speech(self, body):
+        self.state.count("speech")
+        payload = json.loads(body or b"{}")
+        if self.fail_if_unlucky("speech"):
+            return
+        time.sleep(self.state.tts_latency())
+        audio = fake_mp3_bytes(payload.get("input") or "", payload.get("voice") or "alloy")
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        chunk_delay = 4096 / self.state.tts_bytes_per_second if self.state.tts_bytes_per_second > 0 else 0
+        for offset in range(0, len(audio), 4096):
+            self.write_chunk(audio[offset:offset + 4096])
+            if chunk_delay:
+                time.sleep(chunk_delay)
+        self.write_chunk(b"")
+
+    def handle_transcription(self, body):
+        self.state.count("transcription")
+        if self.fail_if_unlucky("transcription"):
+            return
+        recognized = read_wav_upload(body)
+        if recognized:
+            duration, text = recognized
+            time.sleep(self.state.stt_latency() + duration * self.state.stt_realtime_factor)
+            return self.send_json(200, {"text": text})
+        time.sleep(self.state.stt_latency())
+        digest = hashlib.sha256(body).hexdigest()[:8]
+        self.send_json(200, {"text": f"fake transcript {digest} ({len(body)} bytes)"})
+
+    def write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--chat-latency", default="lognormal:0.8,0.4", help="Full completion latency")
+    parser.add_argument("--first-token-latency", default="lognormal:0.3,0.3", help="Delay before the first streamed token")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="Streaming rate after the first token")
+    parser.add_argument("--tts-latency", default="lognormal:0.7,0.3")
+    parser.add_argument("--tts-bytes-per-second", type=float, default=0.0, help="Audio streaming rate, 0 sends it at once")
+    parser.add_argument("--stt-latency", default="lognormal:0.9,0.3")
+    parser.add_argument("--stt-realtime-factor", type=float, default=0.0, help="Extra seconds per second of WAV audio")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 429")
+    parser.add_argument("--seed", type=int, default=None)
+    options = parser.parse_args()
+
+    if options.seed is not None:
+        random.seed(options.seed)
+    FakeOpenAIHandler.state = FakeState(options)
+    server = ThreadingHTTPServer((options.host, options.port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    print(f"[fake-openai] listening on http://{options.host}:{options.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# app.py configures itself from the environment at import time; keep the tests off OpenAI and MySQL.
+os.environ.setdefault("AI_BACKEND", "fake")
+os.environ.setdefault("TRANSLATION_CACHE_DB", "false")
+os.environ.setdefault("TRANSCRIPTION_CACHE_DB", "false")
+os.environ.setdefault("USAGE_LOG_ENABLED", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
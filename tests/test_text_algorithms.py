@@ -0,0 +1,125 @@
+import random
+
+import pytest
+
+import app
+
+
+def reference_levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+@pytest.mark.parametrize(
+    "a, b, expected",
+    [("", "", 0), ("", "abc", 3), ("kitten", "sitting", 3), ("salamat", "salamat", 0), ("flaw", "lawn", 2)],
+)
+def test_levenshtein_known_distances(a, b, expected):
+    assert app.levenshtein(a, b) == expected
+    assert app.levenshtein(b, a) == expected
+
+
+def test_levenshtein_matches_dynamic_programming():
+    rng = random.Random(7)
+    for _ in range(300):
+        a = "".join(rng.choice("aiukmnŋ") for _ in range(rng.randint(0, 90)))
+        b = "".join(rng.choice("aiukmnŋ") for _ in range(rng.randint(0, 90)))
+        assert app.levenshtein(a, b) == reference_levenshtein(a, b)
+
+
+def test_phonetic_key_folds_spelling_variants():
+    assert app.phonetic_key("Ñaño") == app.phonetic_key("nyanyo")
+    assert app.phonetic_key("ditto") == app.phonetic_key("dito")
+    assert app.phonetic_key("Kape") == app.phonetic_key("cafe")
+
+
+def test_phonetic_key_keeps_doubled_vowels():
+    assert app.phonetic_key("saan") != app.phonetic_key("san")
+    assert app.phonetic_key("oo") == "uu"
+
+
+def test_align_pronunciation_pairs_every_word():
+    expected = "magandang umaga po".split()
+    pairs = app.align_pronunciation(expected, "magandang umaga po".split())
+    assert pairs == [(0, 0, 0.0), (1, 1, 0.0), (2, 2, 0.0)]
+
+
+def test_align_pronunciation_skips_a_dropped_word_without_shifting():
+    expected = "salamat po sa inyo".split()
+    pairs = app.align_pronunciation(expected, "salamat sa inyo".split())
+    assert (1, None, 1.0) in pairs
+    assert (2, 1, 0.0) in pairs
+    assert (3, 2, 0.0) in pairs
+
+
+def test_align_pronunciation_marks_extra_words():
+    pairs = app.align_pronunciation(["kumusta"], "uh kumusta".split())
+    assert pairs == [(None, 0, 1.0), (0, 1, 0.0)]
+
+
+def test_stitch_transcripts_drops_overlap():
+    parts = ["ang bata ay naglalaro sa labas", "naglalaro sa labas ng bahay"]
+    assert app.stitch_transcripts(parts) == "ang bata ay naglalaro sa labas ng bahay"
+
+
+def test_stitch_transcripts_appends_without_overlap():
+    assert app.stitch_transcripts(["maayong buntag", "kumusta ka"]) == "maayong buntag kumusta ka"
+    assert app.stitch_transcripts(["", "kumusta ka", ""]) == "kumusta ka"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Magandang umaga. Kumusta ka? Mabuti naman!",
+        "Line one\nLine two\n\n  Line three",
+        "  leading space. trailing space  ",
+        "你好。谢谢！",
+        "",
+    ],
+)
+def test_split_translation_segments_round_trips(text):
+    segments = app.split_translation_segments(text)
+    assert "".join(sentence + separator for sentence, separator in segments) == text
+
+
+def test_split_translation_segments_splits_sentences():
+    segments = app.split_translation_segments("Magandang umaga. Kumusta ka? Mabuti naman!")
+    assert [sentence for sentence, _ in segments] == ["Magandang umaga.", "Kumusta ka?", "Mabuti naman!"]
+
+
+TRAINING_SAMPLES = [
+    ("Magandang umaga sa inyong lahat, salamat po sa pagdating ninyo", "Tagalog"),
+    ("Kumusta ka na? Mabuti naman ako, salamat sa Diyos", "Tagalog"),
+    ("Ang bata ay naglalaro sa labas ng bahay kasama ang kanyang aso", "Tagalog"),
+    ("Maayong buntag kaninyong tanan, salamat kaayo sa inyong pag-anhi", "Cebuano"),
+    ("Kumusta ka? Maayo man ko, salamat sa Ginoo", "Cebuano"),
+    ("Ang bata nagdula sa gawas sa balay uban sa iyang iro", "Cebuano"),
+]
+
+
+@pytest.fixture
+def identifier(monkeypatch):
+    monkeypatch.setattr(app, "collect_language_samples", lambda: (TRAINING_SAMPLES, True))
+    identifier = app.LanguageIdentifier(min_chars=8, min_confidence=0.6, refresh_seconds=3600)
+    identifier.rebuild()
+    return identifier
+
+
+def test_language_identifier_names_the_language(identifier):
+    assert identifier.identify("Salamat kaayo, maayong buntag")[0] == "Cebuano"
+    assert identifier.identify("Salamat po, magandang umaga")[0] == "Tagalog"
+
+
+def test_language_identifier_skips_short_text(identifier):
+    assert identifier.identify("po") is None
+
+
+def test_language_identifier_keeps_model_when_sources_are_incomplete(identifier, monkeypatch):
+    monkeypatch.setattr(app, "collect_language_samples", lambda: ([("hello there friend", "English")], False))
+    identifier.rebuild()
+    assert identifier.stats()["languages"] == ["Cebuano", "Tagalog"]
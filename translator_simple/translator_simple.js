@@ -14,6 +14,7 @@ const DEFAULT_AVATAR = "../assets/avatar.png";
 
 // const API_BASE = "https://pronocoach.duckdns.org";
 const API_BASE = "http://127.0.0.1:5000";
+const LIVE_CHUNK_MS = 1000;
 
 updateWelcomeText();
 
@@ -65,7 +66,7 @@ chatBtn.addEventListener("click", async () => {
   }
 });
 
-// Translate → TTS
+// Translate → TTS (one round trip: the server synthesizes as soon as the translation is ready)
 voiceBtn.addEventListener("click", async () => {
   const text = input.value.trim();
   if (!text) {
@@ -75,25 +76,23 @@ voiceBtn.addEventListener("click", async () => {
   const languages = getSelectedLanguages();
   try {
     hideAudioPlayer();
-    const res1 = await fetch(`${API_BASE}/translate_simple`, {
+    const res = await fetch(`${API_BASE}/translate_speak`, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({ text, ...languages })
     });
-    const data1 = await res1.json();
-    if (!res1.ok) {
-      throw new Error(data1.error || `Request failed (${res1.status})`);
+    const data = await res.json();
+    if (!res.ok) {
+      throw new Error(data.error || `Request failed (${res.status})`);
     }
-    const translatedText = data1.translation;
-    result.innerText = formatTranslationOutput(languages, translatedText);
-
-    await playTts(translatedText);
+    result.innerText = formatTranslationOutput(languages, data.translation);
+    await playSpeechPayload(data);
   } catch (err) {
     result.innerText = "❌ Error: " + err.message;
   }
 });
 
-// Speech → Translation (Simple)
+// Speech → Translation → Speech (one streamed request: transcript, translation, then audio clips)
 micBtn.addEventListener("click", async () => {
   if (!navigator.mediaDevices || !navigator.mediaDevices.getUserMedia) {
     alert("❌ Microphone not supported.");
@@ -104,27 +103,50 @@ micBtn.addEventListener("click", async () => {
     const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
     const mediaRecorder = new MediaRecorder(stream);
     let audioChunks = [];
+    const live = await startLiveTranscript(stream, getSelectedLanguages(), (text) => { result.innerText = `🎙 ${text}`; })
+      .catch(err => {
+        console.warn("⚠ Live transcript unavailable:", err);
+        return null;
+      });
     mediaRecorder.ondataavailable = e => { if (e.data.size > 0) audioChunks.push(e.data); };
     mediaRecorder.onstop = async () => {
       const audioBlob = new Blob(audioChunks, { type: "audio/webm" });
+      const streamSession = live ? await live.stop() : null;
       const formData = new FormData();
-      formData.append("file", audioBlob, "speech.webm");
+      if (streamSession) {
+        formData.append("stream_session", streamSession);
+      } else {
+        formData.append("file", audioBlob, "speech.webm");
+      }
       const languages = getSelectedLanguages();
       formData.append("source_language", languages.source_language);
       formData.append("target_language", languages.target_language);
       result.innerText = "⏳ Recognizing speech...";
       try {
-        const res = await fetch(`${API_BASE}/stt_simple`, { method: "POST", body: formData });
-        const data = await res.json();
-        const original = data.original || "";
-        const translation = data.translation || "";
-        if (!res.ok) {
-          throw new Error(data.error || `Request failed (${res.status})`);
+        let recognized = "";
+        let translation = "";
+        const clips = createClipQueue();
+        const render = () => {
+          result.innerText =
+            recognized + (translation ? formatTranslationOutput(languages, translation) : "⏳ Translating...");
+        };
+        await streamSpeechTranslation(formData, {
+          transcript: (payload) => {
+            recognized = payload.text ? `Recognized: ${payload.text}\n\n` : "";
+            render();
+          },
+          translation: (payload) => {
+            translation += payload.delta || "";
+            render();
+          },
+          audio: (payload) => clips.push(payload),
+          audio_error: (payload) => {
+            result.innerText += `\n\n⚠ TTS unavailable: ${payload.audio_error}`;
+          },
+        });
+        if (!translation) {
+          result.innerText = recognized + formatTranslationOutput(languages, "");
         }
-        const recognized = original ? `Recognized: ${original}\n\n` : "";
-        result.innerText =
-          recognized + formatTranslationOutput(languages, translation || "⚠ No translation received.");
-        await playTts(translation);
       } catch (err) {
         result.innerText = "❌ Error: " + err.message;
       }
@@ -137,6 +159,137 @@ micBtn.addEventListener("click", async () => {
   }
 });
 
+// Live transcript while recording: 16 kHz PCM captured by an AudioWorklet goes to /stt_stream once a
+// second, which the server transcribes in windows as it arrives. stop() resolves to the finished
+// session id, which /stt_speak accepts instead of the recording, or null so the caller uploads it.
+const PCM_CAPTURE_WORKLET = `
+class PcmCapture extends AudioWorkletProcessor {
+  process(inputs) {
+    const channel = inputs[0][0];
+    if (channel) this.port.postMessage(channel.slice(0));
+    return true;
+  }
+}
+registerProcessor("pcm-capture", PcmCapture);
+`;
+
+async function startLiveTranscript(stream, languages, onText) {
+  if (typeof AudioWorkletNode === "undefined") return null;
+  const context = new AudioContext({ sampleRate: 16000 });
+  const moduleUrl = URL.createObjectURL(new Blob([PCM_CAPTURE_WORKLET], { type: "application/javascript" }));
+  try {
+    await context.audioWorklet.addModule(moduleUrl);
+  } finally {
+    URL.revokeObjectURL(moduleUrl);
+  }
+  const source = context.createMediaStreamSource(stream);
+  const capture = new AudioWorkletNode(context, "pcm-capture");
+  let blocks = [];
+  capture.port.onmessage = event => blocks.push(event.data);
+  source.connect(capture);
+
+  let session = fetch(`${API_BASE}/stt_stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      source_language: languages.source_language,
+      format: "pcm16",
+      sample_rate: context.sampleRate,
+    }),
+  }).then(res => (res.ok ? res.json() : Promise.reject(new Error(`Request failed (${res.status})`))));
+
+  const send = (final) => {
+    const length = blocks.reduce((total, block) => total + block.length, 0);
+    const pcm = new Int16Array(length);
+    let offset = 0;
+    for (const block of blocks) {
+      for (const sample of block) pcm[offset++] = Math.max(-1, Math.min(1, sample)) * 0x7fff;
+    }
+    blocks = [];
+    session = session.then(async data => {
+      const res = await fetch(`${API_BASE}${data.chunk_url}${final ? "?final=1" : ""}`, { method: "POST", body: pcm });
+      const payload = await res.json().catch(() => ({}));
+      if (!res.ok) throw new Error(payload.error || `Request failed (${res.status})`);
+      if (payload.text) onText(payload.text);
+      return data;
+    });
+    return session;
+  };
+  const timer = setInterval(() => send(false).catch(() => {}), LIVE_CHUNK_MS);
+
+  return {
+    stop: async () => {
+      clearInterval(timer);
+      source.disconnect();
+      capture.disconnect();
+      context.close();
+      try {
+        return (await send(true)).session_id;
+      } catch (err) {
+        console.warn("⚠ Live transcript unavailable:", err);
+        return null;
+      }
+    },
+  };
+}
+
+async function streamSpeechTranslation(formData, handlers) {
+  const res = await fetch(`${API_BASE}/stt_speak`, { method: "POST", body: formData });
+  if (!res.ok || !res.body) {
+    const data = await res.json().catch(() => ({}));
+    throw new Error(data.error || `Request failed (${res.status})`);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      const event = (block.match(/^event: (.*)$/m) || [])[1];
+      const payload = JSON.parse((block.match(/^data: (.*)$/m) || [])[1] || "{}");
+      if (event === "error") {
+        throw new Error(payload.error || "Speech translation failed");
+      }
+      handlers[event]?.(payload);
+    }
+  }
+}
+
+// Plays streamed clips back to back as they arrive.
+function createClipQueue() {
+  const clips = [];
+  let playing = false;
+
+  const playNext = () => {
+    const clip = clips.shift();
+    if (!clip) {
+      playing = false;
+      return;
+    }
+    playing = true;
+    audioPlayer.src = URL.createObjectURL(clip);
+    audioPlayer.style.display = "block";
+    audioPlayer.onended = playNext;
+    audioPlayer.play().catch(() => {
+      /* autoplay might be blocked; pressing play continues the queue */
+    });
+  };
+
+  return {
+    push(payload) {
+      const bytes = Uint8Array.from(atob(payload.audio), c => c.charCodeAt(0));
+      clips.push(new Blob([bytes], { type: payload.audio_mime_type || "audio/mpeg" }));
+      if (!playing) playNext();
+    },
+  };
+}
+
 async function playTts(text) {
   if (!text) return;
   try {
@@ -161,12 +314,30 @@ async function playTts(text) {
   }
 }
 
+async function playSpeechPayload(data) {
+  if (!data.audio) {
+    if (data.audio_error) {
+      result.innerText += `\n\n⚠ TTS unavailable: ${data.audio_error}`;
+    } else if (data.translation) {
+      await playTts(data.translation);
+    }
+    return;
+  }
+  const bytes = Uint8Array.from(atob(data.audio), c => c.charCodeAt(0));
+  audioPlayer.src = URL.createObjectURL(new Blob([bytes], { type: data.audio_mime_type || "audio/mpeg" }));
+  audioPlayer.style.display = "block";
+  await audioPlayer.play().catch(() => {
+    /* autoplay might be blocked; user can press play manually */
+  });
+}
+
 function hideAudioPlayer() {
   try {
     audioPlayer.pause();
   } catch {
     /* ignore */
   }
+  audioPlayer.onended = null;
   audioPlayer.removeAttribute("src");
   audioPlayer.style.display = "none";
   audioPlayer.load();